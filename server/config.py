@@ -9,6 +9,20 @@ try:
         debug: bool = False
         # antgather 回调地址（标注结果提交目标）
         antgather_url: str = "http://localhost:8200"
+        # 渲染页面缓存：容量 (MB，0 = 关闭) 与存活时间 (秒)
+        render_cache_mb: int = 256
+        render_cache_ttl: int = 600
+        # 标注结果暂存：sqlite（默认，持久化、多 worker 共享）或 memory
+        submission_store: str = "sqlite"
+        submission_db: str = "submissions.db"
+        # 向 antgather 推送结果（关闭时由 antgather 轮询 /api/submit/pending 拉取）
+        dispatch_enabled: bool = False
+        dispatch_path: str = "/api/datalabel/submissions"
+        dispatch_batch_size: int = 500
+        dispatch_interval: float = 1.0
+        dispatch_max_backoff: float = 300.0
+        # /api/merge/iaa 的 Bootstrap 进程数（默认在请求线程内计算，0 = CPU 核数）
+        bootstrap_workers: int = 1
 
         class Config:
             env_prefix = "DATA_LABEL_"
@@ -22,6 +36,16 @@ except ImportError:
         port: int = 8210
         debug: bool = False
         antgather_url: str = "http://localhost:8200"
+        render_cache_mb: int = 256
+        render_cache_ttl: int = 600
+        submission_store: str = "sqlite"
+        submission_db: str = "submissions.db"
+        dispatch_enabled: bool = False
+        dispatch_path: str = "/api/datalabel/submissions"
+        dispatch_batch_size: int = 500
+        dispatch_interval: float = 1.0
+        dispatch_max_backoff: float = 300.0
+        bootstrap_workers: int = 1
 
 
 settings = Settings()
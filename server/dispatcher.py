@@ -0,0 +1,209 @@
+"""结果推送 -- 把暂存的标注结果批量推送到 antgather
+
+启用后（``DATA_LABEL_DISPATCH_ENABLED=true``）服务在后台运行一个推送循环：
+新提交累计到 ``batch_size`` 条立即推送，否则每 ``interval`` 秒推送一次已有
+结果。每批以一个 POST 发给 ``antgather_url + dispatch_path``::
+
+    {"submissions": [{...}, {...}]}
+
+接收方返回 2xx 即视为送达，记录从暂存中删除；否则这批记录按指数退避
+（加随机抖动，上限 ``max_backoff`` 秒）稍后重试。暂存表就是发件箱：记录
+在送达前一直留在 SQLite 中，服务重启或 worker 崩溃后继续推送；多个 worker
+通过领取租约分担，不会重复推送同一批。推送与 ``GET /api/submit/pending``
+拉取二选一使用。
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .submission_store import SubmissionStore, get_submission_store
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# 领取的记录在此时间内未确认则视为推送中断，可被重新领取
+DEFAULT_LEASE = 120.0
+
+
+class Dispatcher:
+    """后台推送循环（在事件循环中运行，数据库操作放在线程池）"""
+
+    def __init__(
+        self,
+        store: Optional[SubmissionStore],
+        url: str,
+        batch_size: int = 500,
+        interval: float = 1.0,
+        max_backoff: float = 300.0,
+        timeout: float = 30.0,
+        lease: float = DEFAULT_LEASE,
+        max_connections: int = 4,
+    ):
+        self._store = store
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.lease = max(lease, timeout * 2)
+        self.max_connections = max_connections
+
+        self.delivered = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.last_error: Optional[str] = None
+        self.last_delivery_at: Optional[float] = None
+
+        self._client: Any = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._new = 0
+
+    @property
+    def store(self) -> SubmissionStore:
+        """推送来源；构造时未指定则用服务共享的暂存后端"""
+        return self._store if self._store is not None else get_submission_store()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, transport: Any = None) -> None:
+        """创建连接池并启动推送循环；``transport`` 供测试替换 HTTP 传输层
+
+        Raises:
+            RuntimeError: 未安装 httpx
+        """
+        if self.running:
+            return
+        if httpx is None:
+            raise RuntimeError("结果推送需要 httpx: pip install knowlyr-datalabel[server]")
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            transport=transport,
+        )
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止推送循环；已领取未送达的记录在租约到期后重新推送"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def notify(self, count: int = 1) -> None:
+        """有新结果写入暂存；累计满一批时立即唤醒推送循环"""
+        self._new += count
+        if self._wake is not None and self._new >= self.batch_size:
+            self._wake.set()
+
+    def _backoff(self) -> float:
+        delay = min(self.max_backoff, 2 ** (self.consecutive_failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._new = 0
+            try:
+                # 连续推送满批，直到发件箱中没有到期记录或推送失败
+                while await self.dispatch_once() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # 数据库异常等：记录后下一轮再试
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("结果推送失败")
+            # 失败的批次已由 retry_later 按退避时间推迟，这里不再额外等待
+
+    async def dispatch_once(self) -> int:
+        """领取并推送一批，返回送达条数（没有到期记录或推送失败时为 0）"""
+        batch = await run_in_threadpool(self.store.claim, self.batch_size, self.lease)
+        if not batch:
+            return 0
+        ids = [sid for sid, _ in batch]
+        # 暂存中即是编码好的 JSON，直接拼接，不再解码
+        payload = '{"submissions":[' + ",".join(body for _, body in batch) + "]}"
+        self.in_flight += len(batch)
+        try:
+            response = await self._client.post(
+                self.url,
+                content=payload.encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            error = None if response.is_success else f"HTTP {response.status_code}"
+        except Exception as exc:  # 网络错误及其他异常都按推送失败处理，立即释放这批记录
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.in_flight -= len(batch)
+
+        if error is not None:
+            self.failed_batches += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            delay = self._backoff()
+            logger.warning("推送 %d 条结果失败（%s），%.1f 秒后重试", len(batch), error, delay)
+            await run_in_threadpool(self.store.retry_later, ids, delay)
+            return 0
+
+        await run_in_threadpool(self.store.delete_many, ids)
+        self.delivered += len(batch)
+        self.batches += 1
+        self.consecutive_failures = 0
+        self.last_delivery_at = time.time()
+        return len(batch)
+
+    async def stats(self) -> Dict[str, Any]:
+        """推送状态与发件箱积压"""
+        outbox = await run_in_threadpool(self.store.outbox_stats)
+        return {
+            "enabled": self.running,
+            "url": self.url,
+            "queue_depth": outbox["depth"],
+            "retrying": outbox["retrying"],
+            "max_attempts": outbox["max_attempts"],
+            "oldest_submitted_at": outbox["oldest_submitted_at"],
+            "in_flight": self.in_flight,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_delivery_at": self.last_delivery_at,
+        }
+
+
+dispatcher = Dispatcher(
+    None,
+    settings.antgather_url.rstrip("/") + settings.dispatch_path,
+    batch_size=settings.dispatch_batch_size,
+    interval=settings.dispatch_interval,
+    max_backoff=settings.dispatch_max_backoff,
+)
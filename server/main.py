@@ -1,15 +1,47 @@
 """data-label 在线服务 -- FastAPI 应用入口"""
 
+from contextlib import asynccontextmanager
+from typing import Any
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from datalabel import jsonlib
 
 from .config import settings
-from .routers import schemas, render, submit, merge
+from .dispatcher import dispatcher
+from .routers import batches, merge, render, schemas, submit
+from .submission_store import close_submission_store, get_submission_store
+
+
+class _JSONResponse(JSONResponse):
+    """经 datalabel.jsonlib 编码的 JSON 响应（orjson / msgspec 可用时更快）"""
+
+    def render(self, content: Any) -> bytes:
+        return jsonlib.dumpb(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时打开结果暂存（SQLite 建库建表），而不是在导入模块时
+    await run_in_threadpool(get_submission_store)
+    if settings.dispatch_enabled:
+        await dispatcher.start()
+    try:
+        yield
+    finally:
+        await dispatcher.stop()
+        await run_in_threadpool(close_submission_store)
+
 
 app = FastAPI(
     title="data-label API",
     version="0.1.0",
     description="标注 Schema 管理、界面渲染、结果收集、IAA 计算",
+    default_response_class=_JSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -21,6 +53,7 @@ app.add_middleware(
 )
 
 app.include_router(schemas.router, prefix="/api/schemas", tags=["schemas"])
+app.include_router(batches.router, prefix="/api/batches", tags=["batches"])
 app.include_router(render.router, prefix="/api/render", tags=["render"])
 app.include_router(submit.router, prefix="/api/submit", tags=["submit"])
 app.include_router(merge.router, prefix="/api/merge", tags=["merge"])
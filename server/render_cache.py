@@ -0,0 +1,203 @@
+"""渲染结果缓存 -- 相同 schema + tasks 的请求直接返回已渲染的页面
+
+同一批任务常被重复请求（重试、多名标注员领取同一批次），页面按请求内容的
+哈希缓存：LRU + TTL 淘汰，入缓存时预先压缩（gzip；装有 brotli 时另存 br），
+并以内容哈希作 ETag，支持 If-None-Match 返回 304。``render_page`` 供各路由
+共用同一个生成器与缓存。
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from datalabel import __version__, jsonlib
+from datalabel.generator import AnnotatorGenerator
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 默认容量（渲染后 HTML 及其压缩版本的总字节数）与存活时间
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 600.0
+
+# 同时可接受时优先 br
+_ENCODINGS = ("br", "gzip")
+
+
+def render_key(params: Dict[str, Any]) -> str:
+    """渲染参数的内容哈希（sha256 十六进制）；datalabel 版本一并计入，升级后模板变化即失效"""
+    return hashlib.sha256(jsonlib.dumpb([__version__, params])).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+@dataclass
+class RenderedPage:
+    """一份渲染好的页面：UTF-8 HTML 及其预压缩版本"""
+
+    etag: str
+    html: bytes
+    created: float = field(default_factory=time.monotonic)
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, key: str, html: str, compress: bool = True) -> "RenderedPage":
+        page = cls(etag=etag_for(key), html=html.encode("utf-8"))
+        if compress:
+            page.encoded["gzip"] = gzip.compress(page.html, compresslevel=6)
+            if brotli is not None:
+                page.encoded["br"] = brotli.compress(page.html, quality=5)
+        return page
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.html) + sum(len(body) for body in self.encoded.values())
+
+
+class RenderCache:
+    """按内容哈希缓存 ``RenderedPage`` 的 LRU 缓存（线程安全）
+
+    超过 ``ttl`` 秒的条目视为未命中并移除；总字节数超过 ``max_bytes``
+    时淘汰最久未使用的条目。``max_bytes`` 为 0 表示不缓存。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        ttl: Optional[float] = DEFAULT_TTL,
+        compress: bool = True,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, RenderedPage]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[RenderedPage]:
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None and self.ttl and time.monotonic() - page.created > self.ttl:
+                del self._entries[key]
+                self._bytes -= page.nbytes
+                page = None
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: str, html: str) -> RenderedPage:
+        """压缩并缓存一份页面；超过容量的页面只返回、不缓存"""
+        page = RenderedPage.build(key, html, compress=self.compress)
+        if page.nbytes > self.max_bytes:
+            return page
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = page
+            self._bytes += page.nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return page
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """请求的 If-None-Match 是否包含 etag（忽略弱校验前缀 W/）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def page_response(page: RenderedPage, request: Request) -> Response:
+    """按 If-None-Match / Accept-Encoding 返回 304 或（压缩的）页面"""
+    headers = {"ETag": page.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if etag_matches(request, page.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = page.html
+    accepted = _accepted_encodings(request)
+    for encoding in _ENCODINGS:
+        if encoding in page.encoded and (encoding in accepted or "*" in accepted):
+            body = page.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+            break
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+generator = AnnotatorGenerator()
+
+render_cache = RenderCache(
+    max_bytes=settings.render_cache_mb * 1024 * 1024,
+    ttl=settings.render_cache_ttl or None,
+)
+
+
+def render_page(params: Dict[str, Any], key: Optional[str] = None) -> RenderedPage:
+    """从缓存取页面，未命中则渲染并入缓存（阻塞调用，应放在线程池中执行）
+
+    Args:
+        params: ``AnnotatorGenerator.render_to_string`` 的参数
+        key: 缓存键，默认为 ``render_key(params)``
+
+    Raises:
+        ValueError: schema 或任务数据不合法
+    """
+    if key is None:
+        key = render_key(params)
+    page = render_cache.get(key)
+    if page is None:
+        page = render_cache.put(key, generator.render_to_string(**params))
+    return page
@@ -0,0 +1,126 @@
+"""任务批次路由 -- 服务端保存 schema_id + 任务列表，标注员按批次 ID 打开页面"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from ..render_cache import render_key, render_page
+from ..submission_store import get_submission_store
+from .schemas import find_schema
+
+router = APIRouter()
+
+# 批次与 schema 一样以文档形式保存在共享存储中（Phase 3 迁移到 antgather DB）
+# key: task_batch_id, value: schema_id、任务列表与渲染选项
+BATCH_DOC = "batch"
+
+# 批次中与渲染有关的字段（schema 另按 schema_id 取最新版本）
+_RENDER_FIELDS = ("title", "guidelines", "theme", "callback_url")
+
+
+def get_batch(task_batch_id: str) -> dict:
+    """按 ID 取批次，不存在时返回 404"""
+    batch = get_submission_store().get_document(BATCH_DOC, task_batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch '{task_batch_id}' 不存在")
+    return batch
+
+
+def batch_render_params(
+    task_batch_id: str, batch: dict, callback_url: Optional[str] = None
+) -> Tuple[Dict[str, Any], str]:
+    """批次的渲染参数与缓存键
+
+    批次的任务与选项创建后不变，缓存键只需由批次 ID、当前 schema 与
+    callback_url 计算，不必每次对整个任务列表求哈希；schema 更新后键随之变化。
+
+    Raises:
+        KeyError: 批次引用的 schema 已被删除
+    """
+    schema_id = batch["schema_id"]
+    schema = find_schema(schema_id)
+    if schema is None:
+        raise KeyError(f"Schema '{schema_id}' 不存在")
+    params = {field: batch[field] for field in _RENDER_FIELDS}
+    if callback_url:
+        params["callback_url"] = callback_url
+    params["schema"] = schema
+    key = render_key({
+        "task_batch_id": task_batch_id,
+        "schema": params["schema"],
+        "callback_url": params["callback_url"],
+    })
+    params["tasks"] = batch["tasks"]
+    return params, key
+
+
+def _summary(task_batch_id: str, batch: dict) -> dict:
+    return {
+        "task_batch_id": task_batch_id,
+        "schema_id": batch["schema_id"],
+        "task_count": len(batch["tasks"]),
+        "created_at": batch["created_at"],
+        "url": f"/api/render/{task_batch_id}",
+    }
+
+
+@router.post("")
+async def create_batch(body: dict):
+    """创建任务批次，并预先渲染其标注页面
+
+    Body:
+        schema_id: str — 已创建的 Schema ID（POST /api/schemas）
+        tasks: list — 待标注任务数据
+        title / guidelines / theme / callback_url: 可选，同 POST /api/render/generate
+
+    Returns:
+        task_batch_id 与页面地址；标注员通过 GET /api/render/{task_batch_id} 打开
+    """
+    schema_id = body.get("schema_id")
+    if not isinstance(schema_id, str) or await run_in_threadpool(find_schema, schema_id) is None:
+        raise HTTPException(status_code=404, detail=f"Schema '{schema_id}' 不存在")
+
+    tasks = body.get("tasks")
+    if not isinstance(tasks, list):
+        raise HTTPException(status_code=422, detail="缺少 tasks 数组")
+
+    task_batch_id = uuid.uuid4().hex[:12]
+    batch = {
+        "schema_id": schema_id,
+        "tasks": tasks,
+        "title": body.get("title"),
+        "guidelines": body.get("guidelines"),
+        "theme": body.get("theme", "default"),
+        "callback_url": body.get("callback_url"),
+        "created_at": datetime.now().isoformat(),
+    }
+
+    # 创建时即渲染：校验任务数据，并让首次打开页面直接命中缓存
+    try:
+        params, key = await run_in_threadpool(batch_render_params, task_batch_id, batch)
+        page = await run_in_threadpool(render_page, params, key)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    await run_in_threadpool(get_submission_store().put_document, BATCH_DOC, task_batch_id, batch)
+    return {**_summary(task_batch_id, batch), "etag": page.etag}
+
+
+@router.get("/{task_batch_id}")
+async def get_batch_info(task_batch_id: str):
+    """获取批次信息（不含任务内容）"""
+    return _summary(task_batch_id, await run_in_threadpool(get_batch, task_batch_id))
+
+
+@router.delete("/{task_batch_id}")
+async def delete_batch(task_batch_id: str):
+    """删除任务批次"""
+    deleted = await run_in_threadpool(
+        get_submission_store().delete_document, BATCH_DOC, task_batch_id
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Batch '{task_batch_id}' 不存在")
+    return {"deleted": task_batch_id}
@@ -1,19 +1,38 @@
 """合并 + IAA 计算路由"""
 
-import json
 import tempfile
 from pathlib import Path
 from typing import List
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from datalabel import jsonlib
 from datalabel.merger import ResultMerger
+from datalabel.table import AnnotationTable
+
+from ..config import settings
 
 router = APIRouter()
 
 _merger = ResultMerger()
 
 
+def _build_table(responses_data: list) -> AnnotationTable:
+    """把请求体中的各份标注结果直接载入内存表。
+
+    不经临时文件和 load_table，请求数据不会滞留在进程级加载缓存中。
+    """
+    table = AnnotationTable()
+    for i, data in enumerate(responses_data):
+        if isinstance(data, dict):
+            metadata, responses = data.get("metadata", {}), data.get("responses", [])
+        else:
+            metadata, responses = {}, data
+        table.add_source(f"ann_{i}.json", responses, metadata)
+    return table
+
+
 @router.post("")
 async def merge_results(body: dict):
     """合并多人标注结果
@@ -37,33 +56,34 @@ async def merge_results(body: dict):
     if strategy not in ("majority", "average", "strict"):
         raise HTTPException(status_code=422, detail=f"不支持的合并策略: {strategy}")
 
-    # ResultMerger 需要文件路径，写入临时文件
-    with tempfile.TemporaryDirectory() as tmpdir:
-        files = []
-        for i, data in enumerate(responses_data):
-            path = Path(tmpdir) / f"ann_{i}.json"
-            path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-            files.append(str(path))
+    try:
+        table = _build_table(responses_data)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=422, detail=f"标注结果格式错误: {e}")
 
+    # 合并结果经临时文件输出
+    with tempfile.TemporaryDirectory() as tmpdir:
         output_path = Path(tmpdir) / "merged.json"
 
+        # 输出只在本进程内读回，无需缩进
         result = _merger.merge(
-            result_files=files,
+            result_files=table,
             output_path=str(output_path),
             strategy=strategy,
+            compact=True,
         )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.error)
 
-        merged_data = json.loads(output_path.read_text(encoding="utf-8"))
+        merged_data = jsonlib.load(output_path)
 
     return {
         "success": True,
         "annotator_count": result.annotator_count,
         "total_tasks": result.total_tasks,
         "agreement_rate": result.agreement_rate,
-        "conflict_count": len(result.conflicts),
+        "conflict_count": result.conflict_count,
         "merged": merged_data,
     }
 
@@ -74,6 +94,11 @@ async def calculate_iaa(body: dict):
 
     Body:
         responses: list[dict] — 多个标注者的结果文件内容（至少 2 份）
+        alpha_metric: str — Krippendorff's Alpha 距离度量
+            ("nominal" / "ordinal" / "interval" / "ratio")，默认 "nominal"
+        bootstrap: int — Bootstrap 重采样次数，>0 时在 metrics.bootstrap 中返回置信区间
+        seed: int — Bootstrap 随机种子（可选）
+        confidence: float — 置信水平，默认 0.95
 
     Returns:
         IAA 指标（exact_agreement_rate, Cohen's Kappa, Fleiss' Kappa, Krippendorff's Alpha）
@@ -85,15 +110,39 @@ async def calculate_iaa(body: dict):
     if len(responses_data) < 2:
         raise HTTPException(status_code=422, detail="至少需要 2 份标注结果才能计算 IAA")
 
-    # 写入临时文件供 merger 读取
-    with tempfile.TemporaryDirectory() as tmpdir:
-        files = []
-        for i, data in enumerate(responses_data):
-            path = Path(tmpdir) / f"ann_{i}.json"
-            path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-            files.append(str(path))
-
-        metrics = _merger.calculate_iaa(result_files=files)
+    # bool 是 int 的子类，需单独排除
+    bootstrap = body.get("bootstrap", 0)
+    if isinstance(bootstrap, bool) or not isinstance(bootstrap, int) or bootstrap < 0:
+        raise HTTPException(status_code=422, detail="bootstrap 必须是非负整数")
+
+    confidence = body.get("confidence", 0.95)
+    if (
+        isinstance(confidence, bool)
+        or not isinstance(confidence, (int, float))
+        or not 0 < confidence < 1
+    ):
+        raise HTTPException(status_code=422, detail="confidence 必须是 0 到 1 之间（不含）的数")
+
+    seed = body.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        raise HTTPException(status_code=422, detail="seed 必须是整数或 null")
+
+    try:
+        table = _build_table(responses_data)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=422, detail=f"标注结果格式错误: {e}")
+
+    # Bootstrap 重采样较重，放到线程池避免阻塞事件循环
+    metrics = await run_in_threadpool(
+        _merger.calculate_iaa,
+        result_files=table,
+        alpha_metric=body.get("alpha_metric", "nominal"),
+        bootstrap=bootstrap,
+        seed=seed,
+        confidence=confidence,
+        # 每个请求都起一个 CPU 核数大小的进程池会压垮服务，由配置决定
+        workers=settings.bootstrap_workers or None,
+    )
 
     if "error" in metrics:
         raise HTTPException(status_code=422, detail=metrics["error"])
@@ -1,23 +1,32 @@
 """标注界面渲染路由"""
 
-import tempfile
-from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import HTMLResponse
-
-from datalabel.generator import AnnotatorGenerator
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+from ..render_cache import (
+    etag_for,
+    etag_matches,
+    generator,
+    page_response,
+    render_cache,
+    render_key,
+    render_page,
+)
+from .batches import batch_render_params, get_batch
 
 router = APIRouter()
 
-_generator = AnnotatorGenerator()
-
 
 @router.post("/generate")
-async def generate_annotation_page(body: dict):
+async def generate_annotation_page(body: dict, request: Request):
     """接收 schema + tasks，返回标注页面 HTML
 
+    相同参数的请求命中渲染缓存，直接返回已渲染（并预压缩）的页面；
+    响应带内容哈希 ETag，If-None-Match 匹配时返回 304。
+
     Body:
         schema: dict — 标注 Schema 定义
         tasks: list — 待标注任务数据
@@ -30,80 +39,63 @@ async def generate_annotation_page(body: dict):
     if not schema:
         raise HTTPException(status_code=422, detail="缺少 schema 字段")
 
-    tasks = body.get("tasks", [])
-    callback_url = body.get("callback_url")
-    title = body.get("title")
-    guidelines = body.get("guidelines")
-    theme = body.get("theme", "default")
-
-    # 生成到临时文件
-    with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as tmp:
-        tmp_path = tmp.name
-
-    result = _generator.generate(
-        schema=schema,
-        tasks=tasks,
-        output_path=tmp_path,
-        guidelines=guidelines,
-        title=title,
-        theme=theme,
-    )
-
-    if not result.success:
-        raise HTTPException(status_code=422, detail=result.error)
-
-    html_content = Path(tmp_path).read_text(encoding="utf-8")
-
-    # 如果有 callback_url，注入在线提交脚本替换 localStorage 保存
-    if callback_url:
-        html_content = _inject_callback(html_content, callback_url)
-
-    # 清理临时文件
-    Path(tmp_path).unlink(missing_ok=True)
-
-    return HTMLResponse(content=html_content)
+    params = {
+        "schema": schema,
+        "tasks": body.get("tasks", []),
+        "guidelines": body.get("guidelines"),
+        "title": body.get("title"),
+        "theme": body.get("theme", "default"),
+        "callback_url": body.get("callback_url"),
+    }
+
+    # 校验、哈希与渲染都放到线程池，避免阻塞事件循环。
+    # callback_url 作为模板变量注入在线提交逻辑
+    if not render_cache.enabled:
+        # 不缓存时边渲染边发送（StreamingResponse 在线程池中迭代）
+        try:
+            chunks = await run_in_threadpool(generator.render_stream, **params)
+        except (ValueError, KeyError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return StreamingResponse(chunks, media_type="text/html; charset=utf-8")
+
+    key = await run_in_threadpool(render_key, params)
+    etag = etag_for(key)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        page = await run_in_threadpool(render_page, params, key)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return page_response(page, request)
 
 
 @router.get("/{task_batch_id}")
 async def render_labeling_page(
     task_batch_id: str,
+    request: Request,
     token: Optional[str] = Query(None),
     callback_url: Optional[str] = Query(None),
 ):
     """通过 task_batch_id 渲染标注页面
 
-    从内存 schema store 查找关联的 batch 数据。
-    目前返回提示信息，待与 batch 管理集成后启用。
+    批次由 POST /api/batches 创建（schema_id + 任务列表存在服务端），页面在创建时
+    已预先渲染入缓存，这里直接返回；缓存过期或被淘汰时重新渲染。
+    callback_url 可覆盖批次创建时的提交地址。token 预留给访问控制，暂未校验。
     """
-    # Phase 1: batch 管理尚未实现，返回说明
-    raise HTTPException(
-        status_code=501,
-        detail=f"Batch '{task_batch_id}' 渲染尚未实现。请使用 POST /api/render/generate 直接传入 schema + tasks。"
-    )
-
-
-def _inject_callback(html: str, callback_url: str) -> str:
-    """将 HTML 中的 localStorage 保存逻辑增强为同时 POST 到 callback_url。
-
-    在 saveCurrentResponse 函数的 localStorage.setItem 后面注入 fetch 调用。
-    """
-    inject_script = f"""
-                // === Online callback (injected by data-label server) ===
-                try {{
-                    fetch('{callback_url}', {{
-                        method: 'POST',
-                        headers: {{ 'Content-Type': 'application/json' }},
-                        body: JSON.stringify(responses[taskId]),
-                    }}).catch(err => console.warn('回调提交失败:', err));
-                }} catch(e) {{ console.warn('回调异常:', e); }}
-                // === End online callback ==="""
-
-    # 在 localStorage.setItem 行之后注入
-    target = "localStorage.setItem(storageKey, JSON.stringify(responses));"
-    if target in html:
-        html = html.replace(
-            target,
-            target + "\n" + inject_script,
+    batch = await run_in_threadpool(get_batch, task_batch_id)
+    try:
+        params, key = await run_in_threadpool(
+            batch_render_params, task_batch_id, batch, callback_url
         )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    if etag_matches(request, etag_for(key)):
+        return Response(status_code=304, headers={"ETag": etag_for(key)})
 
-    return html
+    try:
+        page = await run_in_threadpool(render_page, params, key)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return page_response(page, request)
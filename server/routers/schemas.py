@@ -1,80 +1,106 @@
 """Schema 管理路由"""
 
 import uuid
-from typing import Dict
+from functools import lru_cache
+from typing import Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
-from datalabel.validator import SchemaValidator
+from datalabel import jsonlib
+from datalabel.validator import CompiledSchema, ResponseValidator, SchemaValidator
+
+from ..submission_store import get_submission_store
 
 router = APIRouter()
 
-# 内存存储（Phase 3 迁移到 antgather DB）
-_schemas: Dict[str, dict] = {}
+# Schema 以文档形式保存在共享存储中（Phase 3 迁移到 antgather DB），
+# 各 worker 看到的是同一份，重启后仍在
+SCHEMA_DOC = "schema"
 
 _validator = SchemaValidator()
 
 
+def find_schema(schema_id: str) -> Optional[dict]:
+    """按 ID 取 schema，不存在时返回 None"""
+    return get_submission_store().get_document(SCHEMA_DOC, schema_id)
+
+
+@lru_cache(maxsize=256)
+def _responses_for(body: str) -> ResponseValidator:
+    """按 schema 的 JSON 文本缓存结果校验器：同一 schema 只编译一次，更新后自然换新"""
+    return _validator.compile(jsonlib.loads(body)).responses
+
+
+def get_response_validator(schema_id: str) -> ResponseValidator:
+    """按 ID 取 schema 的提交结果校验器，不存在时返回 404"""
+    body = get_submission_store().get_document(SCHEMA_DOC, schema_id, raw=True)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Schema '{schema_id}' 不存在")
+    return _responses_for(body)
+
+
 def _gen_schema_id() -> str:
     """生成短格式 schema ID"""
     return uuid.uuid4().hex[:12]
 
 
+def _compile_or_422(body: dict) -> CompiledSchema:
+    """编译 schema，不合法时返回 422（附错误与警告）"""
+    compiled = _validator.compile(body)
+    if not compiled.valid:
+        raise HTTPException(status_code=422, detail={
+            "errors": list(compiled.errors),
+            "warnings": list(compiled.warnings),
+        })
+    return compiled
+
+
 @router.post("")
 async def create_schema(body: dict):
     """创建标注 Schema
 
-    验证 schema 合法性后存入内存，返回 schema_id。
+    验证 schema 合法性后存入共享存储，返回 schema_id。
     """
-    result = _validator.validate_schema(body)
-    if not result.valid:
-        raise HTTPException(status_code=422, detail={
-            "errors": result.errors,
-            "warnings": result.warnings,
-        })
-
+    compiled = _compile_or_422(body)
     schema_id = _gen_schema_id()
-    _schemas[schema_id] = body
+    await run_in_threadpool(get_submission_store().put_document, SCHEMA_DOC, schema_id, body)
 
     return {
         "schema_id": schema_id,
-        "warnings": result.warnings,
+        "warnings": list(compiled.warnings),
     }
 
 
 @router.get("/{schema_id}")
 async def get_schema(schema_id: str):
     """获取标注 Schema"""
-    if schema_id not in _schemas:
+    schema = await run_in_threadpool(find_schema, schema_id)
+    if schema is None:
         raise HTTPException(status_code=404, detail=f"Schema '{schema_id}' 不存在")
-    return {"schema_id": schema_id, "schema": _schemas[schema_id]}
+    return {"schema_id": schema_id, "schema": schema}
 
 
 @router.put("/{schema_id}")
 async def update_schema(schema_id: str, body: dict):
     """更新标注 Schema"""
-    if schema_id not in _schemas:
+    if await run_in_threadpool(find_schema, schema_id) is None:
         raise HTTPException(status_code=404, detail=f"Schema '{schema_id}' 不存在")
 
-    result = _validator.validate_schema(body)
-    if not result.valid:
-        raise HTTPException(status_code=422, detail={
-            "errors": result.errors,
-            "warnings": result.warnings,
-        })
-
-    _schemas[schema_id] = body
+    compiled = _compile_or_422(body)
+    await run_in_threadpool(get_submission_store().put_document, SCHEMA_DOC, schema_id, body)
     return {
         "schema_id": schema_id,
-        "warnings": result.warnings,
+        "warnings": list(compiled.warnings),
     }
 
 
 @router.delete("/{schema_id}")
 async def delete_schema(schema_id: str):
     """删除标注 Schema"""
-    if schema_id not in _schemas:
+    deleted = await run_in_threadpool(
+        get_submission_store().delete_document, SCHEMA_DOC, schema_id
+    )
+    if not deleted:
         raise HTTPException(status_code=404, detail=f"Schema '{schema_id}' 不存在")
-
-    del _schemas[schema_id]
     return {"deleted": schema_id}
@@ -1,24 +1,119 @@
 """结果收集路由"""
 
+import threading
 import uuid
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from datalabel.agreement import AgreementState
+from datalabel.merger import ResultMerger
+from datalabel.validator import ResponseValidator
+
+from ..dispatcher import dispatcher
+from ..submission_store import SubmissionFilter, SubmissionStore, get_submission_store
+from .batches import get_batch
+from .schemas import get_response_validator
 
 router = APIRouter()
 
-# 内存暂存（后续由 antgather 拉取或主动推送）
-# key: submission_id, value: 标注结果
-_submissions: Dict[str, dict] = {}
+# 提交的结果写入 get_submission_store() 暂存，直到 antgather 拉取并确认
+
+# /pending 单页默认条数与上限；NDJSON 输出每次从存储读取的条数
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+_STREAM_BATCH = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_merger = ResultMerger()
+
+
+class _LiveAgreement:
+    """实时一致性统计
+
+    带 annotator 字段的提交把标注写入共享存储的 labels 表（每个标注者每个
+    任务只保留最新一条），各 worker 在查询时只读取上次之后的变化增量更新
+    进程内的 ``AgreementState``，不必重读全部结果；因此所有 worker 给出
+    相同的指标，重启后从 labels 表重建。占用随不同的（标注者, 任务）数
+    增长，重复提交只覆盖旧值。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._store: Optional[SubmissionStore] = None
+        self._state = AgreementState()
+        self._seq = 0
+
+    def record(self, results: List[dict]) -> None:
+        """按标注者把提交结果的标注写入共享存储"""
+        by_annotator: Dict[str, List[dict]] = {}
+        for result in results:
+            annotator = result.get("annotator")
+            if annotator:
+                by_annotator.setdefault(str(annotator), []).append(result)
+        store = get_submission_store()
+        for annotator, responses in by_annotator.items():
+            store.put_labels(annotator, _merger.agreement_labels(responses))
+
+    def metrics(self, alpha_metric: str) -> dict:
+        """追上共享存储中的新标注后计算指标"""
+        store = get_submission_store()
+        with self._lock:
+            if store is not self._store:
+                # 存储重新打开（或切换）后从头重建
+                self._store, self._state, self._seq = store, AgreementState(), 0
+            rows = store.fetch_labels(self._seq)
+            for _, annotator, task_id, label in rows:
+                self._state.update(annotator, {task_id: label})
+            if rows:
+                self._seq = rows[-1][0]
+            return self._state.metrics(alpha_metric=alpha_metric)
+
+
+_agreement = _LiveAgreement()
+
+
+def _response_validator(
+    ref: dict, default: Optional[ResponseValidator] = None
+) -> Optional[ResponseValidator]:
+    """ref 中 schema_id / task_batch_id 指向的 schema 的结果校验器，都没有时返回 default"""
+    schema_id = ref.get("schema_id")
+    if not schema_id and ref.get("task_batch_id"):
+        schema_id = get_batch(ref["task_batch_id"])["schema_id"]
+    if schema_id:
+        return get_response_validator(schema_id)
+    return default
+
+
+def _request_validator(
+    body: dict, schema_id: Optional[str], task_batch_id: Optional[str]
+) -> Optional[ResponseValidator]:
+    """请求体或查询参数中 schema_id / task_batch_id 指向的结果校验器（请求体优先）"""
+    return _response_validator(
+        body, _response_validator({"schema_id": schema_id, "task_batch_id": task_batch_id})
+    )
 
 
 @router.post("")
-async def submit_result(body: dict):
+async def submit_result(
+    body: dict,
+    schema_id: Optional[str] = None,
+    task_batch_id: Optional[str] = None,
+):
     """提交单条标注结果
 
+    给出 schema_id 或 task_batch_id（请求体字段或查询参数，例如页面的
+    callback_url 设为 ``/api/submit?task_batch_id=...``）时，按该 schema
+    校验标注值（评分是否在评分标准中、选项是否存在、multi_field 子字段类型），
+    不合法直接返回 422。
+
     Body:
         task_id: str — 任务 ID
+        annotator: str (可选) — 标注者 ID，提供时计入实时一致性统计
+        schema_id / task_batch_id: str (可选) — 用于校验的 schema
         其他字段取决于标注类型（score / choice / choices / text / ranking / fields）
 
     Returns:
@@ -27,13 +122,21 @@ async def submit_result(body: dict):
     task_id = body.get("task_id")
     if not task_id:
         raise HTTPException(status_code=422, detail="缺少 task_id 字段")
+    validator = await run_in_threadpool(_request_validator, body, schema_id, task_batch_id)
+    if validator is not None:
+        error = validator.validate(body)
+        if error:
+            raise HTTPException(status_code=422, detail=error)
 
     submission_id = uuid.uuid4().hex[:16]
-    _submissions[submission_id] = {
+    record = {
         **body,
         "submission_id": submission_id,
         "submitted_at": datetime.now().isoformat(),
     }
+    await run_in_threadpool(get_submission_store().add, [record])
+    dispatcher.notify()
+    await run_in_threadpool(_agreement.record, [body])
 
     return {
         "success": True,
@@ -43,11 +146,19 @@ async def submit_result(body: dict):
 
 
 @router.post("/batch")
-async def submit_batch(body: dict):
+async def submit_batch(
+    body: dict,
+    schema_id: Optional[str] = None,
+    task_batch_id: Optional[str] = None,
+):
     """批量提交标注结果
 
+    schema 校验同单条提交；请求体顶层或查询参数的 schema_id / task_batch_id
+    对整批生效，单条结果中的同名字段优先。任何一条不合法则整批拒绝。
+
     Body:
-        results: list[dict] — 标注结果数组，每条包含 task_id
+        results: list[dict] — 标注结果数组，每条包含 task_id（可选 annotator）
+        schema_id / task_batch_id: str (可选) — 用于校验的 schema
 
     Returns:
         submission_ids 列表 + 统计信息
@@ -55,43 +166,169 @@ async def submit_batch(body: dict):
     results = body.get("results")
     if not results or not isinstance(results, list):
         raise HTTPException(status_code=422, detail="缺少 results 数组")
+    default_validator = await run_in_threadpool(
+        _request_validator, body, schema_id, task_batch_id
+    )
 
-    submission_ids = []
+    records = []
     for i, result in enumerate(results):
         if not isinstance(result, dict):
             raise HTTPException(status_code=422, detail=f"results[{i}] 必须是字典")
         task_id = result.get("task_id")
         if not task_id:
             raise HTTPException(status_code=422, detail=f"results[{i}] 缺少 task_id")
+        validator = default_validator
+        if "schema_id" in result or "task_batch_id" in result:
+            validator = await run_in_threadpool(_response_validator, result, default_validator)
+        if validator is not None:
+            error = validator.validate(result)
+            if error:
+                raise HTTPException(status_code=422, detail=f"results[{i}] {error}")
 
-        submission_id = uuid.uuid4().hex[:16]
-        _submissions[submission_id] = {
+        records.append({
             **result,
-            "submission_id": submission_id,
+            "submission_id": uuid.uuid4().hex[:16],
             "submitted_at": datetime.now().isoformat(),
-        }
-        submission_ids.append(submission_id)
+        })
+    # 整批在一个事务中写入：要么全部暂存，要么全部失败
+    await run_in_threadpool(get_submission_store().add, records)
+    dispatcher.notify(len(records))
+    await run_in_threadpool(_agreement.record, results)
 
     return {
         "success": True,
-        "count": len(submission_ids),
-        "submission_ids": submission_ids,
+        "count": len(records),
+        "submission_ids": [r["submission_id"] for r in records],
     }
 
 
+def _stream_ndjson(
+    cursor: int, through: int, where: SubmissionFilter, first: List[tuple]
+) -> Iterator[str]:
+    """逐批读取 (cursor, through] 内的记录并按行输出（存储中的 JSON 原样输出）"""
+    rows = first
+    while rows:
+        yield "".join(body + "\n" for _, body in rows)
+        if len(rows) < _STREAM_BATCH:
+            return
+        cursor = rows[-1][0]
+        rows = get_submission_store().fetch(cursor, _STREAM_BATCH, through, where, raw=True)
+
+
 @router.get("/pending")
-async def list_pending():
-    """列出所有暂存的标注结果（供 antgather 拉取）"""
+async def list_pending(
+    request: Request,
+    cursor: int = Query(0, ge=0, description="上一页返回的 next_cursor，0 表示从头开始"),
+    limit: Optional[int] = Query(None, ge=1, description="最多返回条数"),
+    task_id: Optional[str] = None,
+    annotator: Optional[str] = None,
+    since: Optional[str] = Query(None, description="submitted_at 下限（ISO 8601，含）"),
+    until: Optional[str] = Query(None, description="submitted_at 上限（ISO 8601，含）"),
+    format: Optional[str] = Query(None, description="json（默认）或 ndjson"),
+):
+    """按提交顺序分页列出暂存的标注结果（供 antgather 拉取）
+
+    JSON 响应每页默认 1000 条（limit 最大 10000），带 ``next_cursor`` 与
+    ``has_more``；将 ``next_cursor`` 作为下一次请求的 ``cursor`` 继续拉取。
+
+    ``format=ndjson``（或 ``Accept: application/x-ndjson``）时流式输出，
+    每行一条结果，不设 limit 则一次输出请求时刻已有的全部结果；下一个游标
+    在响应头 ``X-Next-Cursor`` 中，可直接用于 ``POST /ack`` 的 ``cursor``。
+    """
+    where = SubmissionFilter(task_id, annotator, since, until)
+    ndjson = format == "ndjson" or (
+        format is None and NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    )
+    if format not in (None, "json", "ndjson"):
+        raise HTTPException(status_code=422, detail=f"不支持的输出格式: {format}")
+
+    if ndjson:
+        if limit is None:
+            # 截至请求时刻的快照：之后的新提交留给下一次拉取
+            through = await run_in_threadpool(get_submission_store().last_seq)
+            first = await run_in_threadpool(
+                get_submission_store().fetch, cursor, _STREAM_BATCH, through, where, True
+            )
+        else:
+            first = await run_in_threadpool(
+                get_submission_store().fetch, cursor, limit, None, where, True
+            )
+            through = first[-1][0] if first else cursor
+        next_cursor = max(through, cursor)
+        return StreamingResponse(
+            _stream_ndjson(cursor, through, where, first),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"X-Next-Cursor": str(next_cursor)},
+        )
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = await run_in_threadpool(get_submission_store().fetch, cursor, limit + 1, None, where)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     return {
-        "count": len(_submissions),
-        "submissions": list(_submissions.values()),
+        "count": len(rows),
+        "submissions": [record for _, record in rows],
+        "next_cursor": rows[-1][0] if rows else cursor,
+        "has_more": has_more,
     }
 
 
 @router.delete("/pending/{submission_id}")
 async def ack_submission(submission_id: str):
     """确认已拉取，删除暂存记录"""
-    if submission_id not in _submissions:
+    if not await run_in_threadpool(get_submission_store().delete, submission_id):
         raise HTTPException(status_code=404, detail=f"Submission '{submission_id}' 不存在")
-    del _submissions[submission_id]
     return {"deleted": submission_id}
+
+
+@router.post("/ack")
+async def ack_bulk(body: dict):
+    """批量确认已拉取的结果
+
+    Body（二选一）:
+        submission_ids: list[str] — 按 ID 删除
+        cursor: int — 删除 seq 不超过该游标的全部结果；可同时给出与拉取时
+            相同的 task_id / annotator / since / until，只删除其中符合条件的
+
+    Returns:
+        deleted: 实际删除的条数
+    """
+    submission_ids = body.get("submission_ids")
+    cursor = body.get("cursor")
+    if (submission_ids is None) == (cursor is None):
+        raise HTTPException(status_code=422, detail="需要 submission_ids 或 cursor 之一")
+
+    if submission_ids is not None:
+        if not isinstance(submission_ids, list) or not all(
+            isinstance(sid, str) for sid in submission_ids
+        ):
+            raise HTTPException(status_code=422, detail="submission_ids 必须是字符串数组")
+        deleted = await run_in_threadpool(get_submission_store().delete_many, submission_ids)
+    else:
+        if isinstance(cursor, str) and cursor.isdigit():
+            cursor = int(cursor)
+        if not isinstance(cursor, int) or isinstance(cursor, bool) or cursor < 0:
+            raise HTTPException(status_code=422, detail="cursor 必须是非负整数")
+        where = SubmissionFilter(
+            body.get("task_id"), body.get("annotator"), body.get("since"), body.get("until")
+        )
+        deleted = await run_in_threadpool(get_submission_store().delete_through, cursor, where)
+    return {"success": True, "deleted": deleted}
+
+
+@router.get("/outbox")
+async def outbox_status():
+    """推送状态：发件箱积压、重试中的条数、已送达批次与最近错误"""
+    return await dispatcher.stats()
+
+
+@router.get("/iaa")
+async def live_iaa(alpha_metric: str = Query("nominal")):
+    """基于已提交结果的实时一致性指标（增量统计，开销与任务数无关）
+
+    统计来自共享存储中的标注，各 worker 一致，结果被确认删除后仍然计入。
+    """
+    metrics = await run_in_threadpool(_agreement.metrics, alpha_metric)
+    if "error" in metrics:
+        raise HTTPException(status_code=422, detail=metrics["error"])
+    return {"success": True, "metrics": metrics}
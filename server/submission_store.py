@@ -0,0 +1,622 @@
+"""标注结果暂存 -- 提交的结果在被 antgather 拉取确认前的持久化存储
+
+默认使用 SQLite（WAL 模式）：结果落盘后才返回，服务重启不丢；多个 uvicorn
+worker 进程可同时读写同一个数据库文件。task_id、annotator、submitted_at
+建有索引，自增的 ``seq`` 列给出稳定的提交顺序。``MemoryStore`` 保留原先的
+进程内字典行为，用于测试或不需要持久化的部署。
+
+暂存表同时是推送给 antgather 的发件箱（见 ``dispatcher``）：``claim`` 领取
+一批到期的记录并在 ``lease`` 秒内对其他 worker 不可见，推送成功后删除，
+失败则 ``retry_later`` 记一次失败并推迟下次尝试。进程崩溃时租约到期后
+记录自动重新可领取，不会丢失。
+
+同一个库里还按 (类别, 键) 保存 JSON 文档：Schema 与任务批次登记在这里
+（见 ``routers.schemas`` / ``routers.batches``），因此在任一 worker 上创建的
+schema_id、task_batch_id 在所有 worker 上都可用，服务重启后仍然有效。
+``labels`` 表记录每个标注者对每个任务的最新标注（用于实时一致性统计），
+结果被拉取确认删除后仍然保留。
+
+通过配置选择后端::
+
+    DATA_LABEL_SUBMISSION_STORE=sqlite   # 默认
+    DATA_LABEL_SUBMISSION_DB=/data/submissions.db
+    DATA_LABEL_SUBMISSION_STORE=memory
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from datalabel import jsonlib
+
+from .config import settings
+
+DEFAULT_DB_PATH = "submissions.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id TEXT NOT NULL UNIQUE,
+    task_id TEXT NOT NULL,
+    annotator TEXT,
+    submitted_at TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_task_id ON submissions (task_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_annotator ON submissions (annotator);
+CREATE INDEX IF NOT EXISTS idx_submissions_submitted_at ON submissions (submitted_at);
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS labels (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    annotator TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    UNIQUE (annotator, task_id)
+);
+"""
+
+# 旧版数据库缺少的发件箱列
+_OUTBOX_COLUMNS = {
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "next_attempt": "REAL NOT NULL DEFAULT 0",
+}
+
+
+class SubmissionFilter:
+    """按 task_id / annotator / 提交时间筛选记录（时间为 ISO 8601 字符串，闭区间）"""
+
+    __slots__ = ("task_id", "annotator", "since", "until")
+
+    def __init__(
+        self,
+        task_id: Optional[str] = None,
+        annotator: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ):
+        self.task_id = task_id
+        self.annotator = annotator
+        self.since = since
+        self.until = until
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        if self.task_id is not None and str(record.get("task_id")) != self.task_id:
+            return False
+        if self.annotator is not None and str(record.get("annotator")) != self.annotator:
+            return False
+        submitted_at = record["submitted_at"]
+        if self.since is not None and submitted_at < self.since:
+            return False
+        if self.until is not None and submitted_at > self.until:
+            return False
+        return True
+
+
+_NO_FILTER = SubmissionFilter()
+
+
+class SubmissionStore(ABC):
+    """暂存后端接口
+
+    每条记录是提交的结果字典，已带 ``submission_id``、``task_id``、
+    ``submitted_at``（可选 ``annotator``），并按写入顺序编号 ``seq``
+    （单调递增，删除后不复用），分页游标即上一页最后一条的 ``seq``。
+    新后端须实现除 ``close`` 外的全部方法，缺一个即无法实例化。
+    """
+
+    @abstractmethod
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        """原子地写入一批记录（全部写入或全部不写）"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        through: Optional[int] = None,
+        where: SubmissionFilter = _NO_FILTER,
+        raw: bool = False,
+    ) -> List[Tuple[int, Any]]:
+        """按 seq 顺序取 ``after`` < seq <= ``through`` 的记录，返回 (seq, 记录)
+
+        ``raw`` 为真时记录是已编码的 JSON 字符串，省去解码再编码。
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def last_seq(self) -> int:
+        """当前最大的 seq（没有记录时为 0）"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, submission_id: str) -> bool:
+        """删除一条记录；不存在时返回 False"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_many(self, submission_ids: Iterable[str]) -> int:
+        """删除一批记录，返回实际删除的条数"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_through(self, through: int, where: SubmissionFilter = _NO_FILTER) -> int:
+        """删除 seq <= ``through`` 且符合筛选条件的记录，返回删除条数"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, where: SubmissionFilter = _NO_FILTER) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim(self, limit: int, lease: float) -> List[Tuple[str, str]]:
+        """领取最多 ``limit`` 条到期待推送的记录，返回 (submission_id, JSON)
+
+        领取的记录在 ``lease`` 秒内不会再被领取。
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def retry_later(self, submission_ids: Iterable[str], delay: float) -> None:
+        """推送失败：记一次失败，``delay`` 秒后再领取"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def outbox_stats(self) -> Dict[str, Any]:
+        """发件箱状态：积压条数、重试中的条数、最多失败次数、最早提交时间"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_document(self, kind: str, key: str, doc: Dict[str, Any]) -> None:
+        """保存（或覆盖）类别 ``kind`` 下键为 ``key`` 的 JSON 文档"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_document(self, kind: str, key: str, raw: bool = False) -> Any:
+        """取文档，不存在时返回 None；``raw`` 为真时返回已编码的 JSON 字符串"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_document(self, kind: str, key: str) -> bool:
+        """删除文档；不存在时返回 False"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_labels(self, annotator: str, labels: Mapping[Any, str]) -> None:
+        """记录 ``annotator`` 对各任务的最新标注（task_id -> label），覆盖旧值
+
+        每次写入都取得新的 seq，读者据此只取上次之后的变化。
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_labels(self, after: int = 0) -> List[Tuple[int, str, str, str]]:
+        """按 seq 顺序取 seq > ``after`` 的标注，返回 (seq, annotator, task_id, label)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空暂存的提交结果（不影响文档与标注）"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """释放连接等资源；默认无资源可释放"""
+
+
+class MemoryStore(SubmissionStore):
+    """进程内字典（不持久化，不跨 worker 共享）"""
+
+    def __init__(self) -> None:
+        # submission_id -> (seq, record)；字典按插入顺序即 seq 顺序
+        self._records: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # submission_id -> [失败次数, 下次可领取时间]
+        self._delivery: Dict[str, List[float]] = {}
+        # (kind, key) -> JSON；按编码后的字符串保存，读出的总是副本
+        self._documents: Dict[Tuple[str, str], str] = {}
+        # (annotator, task_id) -> (seq, label)；覆盖时移到末尾，保持按 seq 排序
+        self._labels: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._label_seq = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for record in records:
+                self._seq += 1
+                self._records[record["submission_id"]] = (self._seq, record)
+
+    def fetch(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        through: Optional[int] = None,
+        where: SubmissionFilter = _NO_FILTER,
+        raw: bool = False,
+    ) -> List[Tuple[int, Any]]:
+        with self._lock:
+            entries = list(self._records.values())
+        page = []
+        for seq, record in entries:
+            if seq <= after or not where.matches(record):
+                continue
+            if through is not None and seq > through:
+                break
+            if limit is not None and len(page) >= limit:
+                break
+            page.append((seq, jsonlib.dumps(record) if raw else record))
+        return page
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return next(reversed(self._records.values()))[0] if self._records else 0
+
+    def delete(self, submission_id: str) -> bool:
+        with self._lock:
+            self._delivery.pop(submission_id, None)
+            return self._records.pop(submission_id, None) is not None
+
+    def delete_many(self, submission_ids: Iterable[str]) -> int:
+        deleted = 0
+        with self._lock:
+            for sid in set(submission_ids):
+                self._delivery.pop(sid, None)
+                deleted += self._records.pop(sid, None) is not None
+        return deleted
+
+    def delete_through(self, through: int, where: SubmissionFilter = _NO_FILTER) -> int:
+        with self._lock:
+            doomed = [
+                sid for sid, (seq, record) in self._records.items()
+                if seq <= through and where.matches(record)
+            ]
+            for sid in doomed:
+                del self._records[sid]
+                self._delivery.pop(sid, None)
+        return len(doomed)
+
+    def count(self, where: SubmissionFilter = _NO_FILTER) -> int:
+        if where is _NO_FILTER:
+            return len(self._records)
+        with self._lock:
+            return sum(where.matches(record) for _, record in self._records.values())
+
+    def claim(self, limit: int, lease: float) -> List[Tuple[str, str]]:
+        now = time.time()
+        claimed = []
+        with self._lock:
+            for sid, (_, record) in self._records.items():
+                if len(claimed) >= limit:
+                    break
+                state = self._delivery.setdefault(sid, [0, 0.0])
+                if state[1] <= now:
+                    state[1] = now + lease
+                    claimed.append((sid, jsonlib.dumps(record)))
+        return claimed
+
+    def retry_later(self, submission_ids: Iterable[str], delay: float) -> None:
+        with self._lock:
+            for sid in submission_ids:
+                if sid in self._records:
+                    state = self._delivery.setdefault(sid, [0, 0.0])
+                    state[0] += 1
+                    state[1] = time.time() + delay
+
+    def outbox_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = [
+                self._delivery[sid][0] for sid in self._records if sid in self._delivery
+            ]
+            oldest = next(iter(self._records.values()))[1] if self._records else None
+            return {
+                "depth": len(self._records),
+                "retrying": sum(1 for a in attempts if a > 0),
+                "max_attempts": int(max(attempts, default=0)),
+                "oldest_submitted_at": oldest["submitted_at"] if oldest else None,
+            }
+
+    def put_document(self, kind: str, key: str, doc: Dict[str, Any]) -> None:
+        body = jsonlib.dumps(doc)
+        with self._lock:
+            self._documents[kind, key] = body
+
+    def get_document(self, kind: str, key: str, raw: bool = False) -> Any:
+        body = self._documents.get((kind, key))
+        if body is None or raw:
+            return body
+        return jsonlib.loads(body)
+
+    def delete_document(self, kind: str, key: str) -> bool:
+        with self._lock:
+            return self._documents.pop((kind, key), None) is not None
+
+    def put_labels(self, annotator: str, labels: Mapping[Any, str]) -> None:
+        with self._lock:
+            for task_id, label in labels.items():
+                key = (annotator, str(task_id))
+                self._labels.pop(key, None)
+                self._label_seq += 1
+                self._labels[key] = (self._label_seq, label)
+
+    def fetch_labels(self, after: int = 0) -> List[Tuple[int, str, str, str]]:
+        rows = []
+        with self._lock:
+            for (annotator, task_id), (seq, label) in reversed(self._labels.items()):
+                if seq <= after:
+                    break
+                rows.append((seq, annotator, task_id, label))
+        rows.reverse()
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._delivery.clear()
+
+
+class SQLiteStore(SubmissionStore):
+    """SQLite 暂存（WAL + synchronous=FULL，提交返回即已落盘）
+
+    每个线程使用自己的连接；多个进程打开同一文件时由 SQLite 的文件锁协调，
+    写冲突在 ``busy_timeout`` 内等待而不是报错。
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, busy_timeout: float = 10.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(submissions)")}
+        for name, decl in _OUTBOX_COLUMNS.items():
+            if name not in columns:
+                conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} {decl}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: 自行用 BEGIN IMMEDIATE 控制事务
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务（BEGIN IMMEDIATE：开始即取得写锁，避免读后升级写锁时死锁）"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        rows = [
+            (
+                r["submission_id"],
+                str(r["task_id"]),
+                None if r.get("annotator") is None else str(r["annotator"]),
+                r["submitted_at"],
+                jsonlib.dumps(r),
+            )
+            for r in records
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO submissions (submission_id, task_id, annotator, submitted_at, body)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def fetch(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        through: Optional[int] = None,
+        where: SubmissionFilter = _NO_FILTER,
+        raw: bool = False,
+    ) -> List[Tuple[int, Any]]:
+        clauses, params = _where_sql(where)
+        clauses.append("seq > ?")
+        params.append(after)
+        if through is not None:
+            clauses.append("seq <= ?")
+            params.append(through)
+        sql = f"SELECT seq, body FROM submissions WHERE {' AND '.join(clauses)} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn().execute(sql, params).fetchall()
+        if raw:
+            return rows
+        return [(seq, jsonlib.loads(body)) for seq, body in rows]
+
+    def last_seq(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM submissions").fetchone()[0]
+
+    def delete(self, submission_id: str) -> bool:
+        cursor = self._conn().execute(
+            "DELETE FROM submissions WHERE submission_id = ?", (submission_id,)
+        )
+        return cursor.rowcount > 0
+
+    def delete_many(self, submission_ids: Iterable[str]) -> int:
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "DELETE FROM submissions WHERE submission_id = ?",
+                [(sid,) for sid in set(submission_ids)],
+            )
+        return max(cursor.rowcount, 0)
+
+    def delete_through(self, through: int, where: SubmissionFilter = _NO_FILTER) -> int:
+        clauses, params = _where_sql(where)
+        clauses.append("seq <= ?")
+        params.append(through)
+        cursor = self._conn().execute(
+            f"DELETE FROM submissions WHERE {' AND '.join(clauses)}", params
+        )
+        return cursor.rowcount
+
+    def count(self, where: SubmissionFilter = _NO_FILTER) -> int:
+        clauses, params = _where_sql(where)
+        sql = "SELECT COUNT(*) FROM submissions"
+        if clauses:
+            sql += f" WHERE {' AND '.join(clauses)}"
+        return self._conn().execute(sql, params).fetchone()[0]
+
+    def claim(self, limit: int, lease: float) -> List[Tuple[str, str]]:
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT submission_id, body FROM submissions WHERE next_attempt <= ?"
+                " ORDER BY seq LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE submissions SET next_attempt = ? WHERE submission_id = ?",
+                [(now + lease, sid) for sid, _ in rows],
+            )
+        return rows
+
+    def retry_later(self, submission_ids: Iterable[str], delay: float) -> None:
+        next_attempt = time.time() + delay
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE submissions SET attempts = attempts + 1, next_attempt = ?"
+                " WHERE submission_id = ?",
+                [(next_attempt, sid) for sid in submission_ids],
+            )
+
+    def outbox_stats(self) -> Dict[str, Any]:
+        depth, retrying, max_attempts, oldest = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(attempts > 0), 0), COALESCE(MAX(attempts), 0),"
+            " MIN(submitted_at) FROM submissions"
+        ).fetchone()
+        return {
+            "depth": depth,
+            "retrying": retrying,
+            "max_attempts": max_attempts,
+            "oldest_submitted_at": oldest,
+        }
+
+    def put_document(self, kind: str, key: str, doc: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO documents (kind, key, body) VALUES (?, ?, ?)",
+            (kind, key, jsonlib.dumps(doc)),
+        )
+
+    def get_document(self, kind: str, key: str, raw: bool = False) -> Any:
+        row = self._conn().execute(
+            "SELECT body FROM documents WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0] if raw else jsonlib.loads(row[0])
+
+    def delete_document(self, kind: str, key: str) -> bool:
+        cursor = self._conn().execute(
+            "DELETE FROM documents WHERE kind = ? AND key = ?", (kind, key)
+        )
+        return cursor.rowcount > 0
+
+    def put_labels(self, annotator: str, labels: Mapping[Any, str]) -> None:
+        # REPLACE 删除旧行再插入，新行取得新的 seq
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO labels (annotator, task_id, label) VALUES (?, ?, ?)",
+                [(annotator, str(task_id), label) for task_id, label in labels.items()],
+            )
+
+    def fetch_labels(self, after: int = 0) -> List[Tuple[int, str, str, str]]:
+        return self._conn().execute(
+            "SELECT seq, annotator, task_id, label FROM labels WHERE seq > ? ORDER BY seq",
+            (after,),
+        ).fetchall()
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM submissions")
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def _where_sql(where: SubmissionFilter) -> Tuple[List[str], List[Any]]:
+    """筛选条件对应的 SQL 子句与参数（各列均有索引）"""
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column, op, value in (
+        ("task_id", "=", where.task_id),
+        ("annotator", "=", where.annotator),
+        ("submitted_at", ">=", where.since),
+        ("submitted_at", "<=", where.until),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    return clauses, params
+
+
+def create_store(kind: str, path: Optional[str] = None) -> SubmissionStore:
+    """按名称创建后端：``sqlite``（默认）或 ``memory``
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    kind = (kind or "sqlite").strip().lower()
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "sqlite":
+        return SQLiteStore(path or DEFAULT_DB_PATH)
+    raise ValueError(f"未知的结果暂存后端: {kind}（可选 sqlite / memory）")
+
+
+_store: Optional[SubmissionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_submission_store() -> SubmissionStore:
+    """进程内共享的暂存后端，首次使用时按配置创建（导入本模块不会创建数据库文件）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store(settings.submission_store, settings.submission_db)
+    return _store
+
+
+def close_submission_store() -> None:
+    """关闭共享的暂存后端；之后再次使用时重新打开"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
@@ -8,9 +8,11 @@ __version__ = "0.3.0"
 from datalabel.dashboard import DashboardGenerator
 from datalabel.generator import AnnotatorGenerator
 from datalabel.merger import ResultMerger
+from datalabel.table import AnnotationTable
 from datalabel.validator import SchemaValidator
 
 __all__ = [
+    "AnnotationTable",
     "AnnotatorGenerator",
     "DashboardGenerator",
     "ResultMerger",
@@ -0,0 +1,1182 @@
+"""Inter-annotator agreement kernels on integer-coded label matrices.
+
+Annotations are encoded once into an ``(n_tasks, n_annotators)`` matrix of
+category codes, with ``MISSING`` where an annotator did not label a task.
+Every metric then runs on that matrix: with NumPy installed via
+``bincount`` and array ops, otherwise with a pure-Python fallback that
+produces the same numbers.
+
+Labels are compared by ``str(value)``, matching ``ResultMerger``'s
+historical behaviour.
+"""
+
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from datalabel import jsonlib
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Code for "annotator did not label this task"
+MISSING = -1
+
+# Levels of measurement supported by krippendorff_alpha
+ALPHA_METRICS = ("nominal", "ordinal", "interval", "ratio")
+
+# Above this many categories, pairwise stats use per-pair bincounts
+# instead of one-hot matrix products
+_ONE_HOT_MAX_CATEGORIES = 64
+# Matrix cells per one-hot chunk
+_CHUNK_CELLS = 1 << 22
+# Fleiss' kappa counts agreeing rater pairs directly up to this many raters
+_FLEISS_PAIRS_MAX_RATERS = 16
+# Panels with at least this many pairs use the thread pool by default
+_PARALLEL_MIN_PAIRS = 64
+
+
+@dataclass
+class LabelMatrix:
+    """Annotations encoded as integer category codes.
+
+    ``codes[t][a]`` is the index into ``categories`` of annotator ``a``'s
+    label on task ``t``, or ``MISSING``. With NumPy, ``codes`` is an
+    ``int32`` array of shape ``(n_tasks, n_annotators)``; otherwise a list
+    of per-task lists.
+    """
+
+    codes: Any
+    categories: List[str]
+    task_ids: List[Any]
+    n_annotators: int
+
+    @property
+    def n_tasks(self) -> int:
+        return len(self.task_ids)
+
+    @property
+    def n_categories(self) -> int:
+        return len(self.categories)
+
+    @property
+    def is_numpy(self) -> bool:
+        return not isinstance(self.codes, list)
+
+
+def encode(
+    annotations: Sequence[Mapping[Any, Any]],
+    task_ids: Sequence[Any],
+    use_numpy: Optional[bool] = None,
+) -> LabelMatrix:
+    """Encode per-annotator labels into a ``LabelMatrix``.
+
+    Args:
+        annotations: One mapping per annotator of ``task_id -> label``;
+            tasks absent from a mapping are encoded as ``MISSING``
+        task_ids: Row order of the matrix
+        use_numpy: Force the NumPy (True) or pure-Python (False) backend;
+            defaults to NumPy when installed
+
+    Returns:
+        LabelMatrix
+    """
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+    task_ids = list(task_ids)
+
+    index: Dict[str, int] = {}
+    columns = []
+    for ann in annotations:
+        column = []
+        for tid in task_ids:
+            if tid in ann:
+                key = str(ann[tid])
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(index)
+                column.append(code)
+            else:
+                column.append(MISSING)
+        columns.append(column)
+
+    if use_numpy:
+        codes = np.array(columns, dtype=np.int32).reshape(len(columns), len(task_ids)).T
+    else:
+        codes = [list(row) for row in zip(*columns)] if columns else [[] for _ in task_ids]
+
+    return LabelMatrix(
+        codes=codes,
+        categories=list(index),
+        task_ids=task_ids,
+        n_annotators=len(columns),
+    )
+
+
+def encode_rows(rows: Sequence[Sequence[Any]], use_numpy: Optional[bool] = None) -> LabelMatrix:
+    """Encode a dense ``[[label_ann1, label_ann2, ...], ...]`` list (one row per task)."""
+    width = len(rows[0]) if rows else 0
+    annotations = [{t: row[a] for t, row in enumerate(rows)} for a in range(width)]
+    return encode(annotations, range(len(rows)), use_numpy=use_numpy)
+
+
+# ============================================================
+# Metrics
+# ============================================================
+
+
+def exact_agreement_rate(matrix: LabelMatrix) -> float:
+    """Share of fully-annotated tasks on which all annotators gave the same label."""
+    if matrix.is_numpy:
+        codes = _complete_rows(matrix)
+        if not len(codes):
+            return 0.0
+        return float((codes == codes[:, :1]).all(axis=1).mean())
+
+    rows = _complete_rows(matrix)
+    if not rows:
+        return 0.0
+    return sum(1 for row in rows if len(set(row)) == 1) / len(rows)
+
+
+def cohens_kappa(matrix: LabelMatrix, i: int, j: int) -> float:
+    """Cohen's kappa between annotators ``i`` and ``j`` over tasks both labelled.
+
+    kappa = (p_o - p_e) / (1 - p_e)
+    """
+    confusion, n = _pair_confusion(matrix, i, j)
+    return _kappa_from_confusion(confusion, n)
+
+
+@dataclass
+class PairwiseStats:
+    """Sufficient statistics for every annotator pair, gathered in one pass.
+
+    For annotators ``i`` and ``j``: ``shared[i][j]`` is the number of tasks
+    both labelled, ``agree[i][j]`` how many of those got the same label, and
+    ``chance[i][j]`` the sum over categories of the two annotators' label
+    counts on their shared tasks, so that ``p_e = chance / shared**2``.
+    """
+
+    shared: List[List[float]]
+    agree: List[List[float]]
+    chance: List[List[float]]
+
+    def agreement_matrix(self) -> List[List[float]]:
+        """Pairwise exact-agreement matrix (diagonal is 1.0)."""
+        m = len(self.shared)
+        result = [[1.0] * m for _ in range(m)]
+        for i in range(m):
+            for j in range(m):
+                if i != j:
+                    n = self.shared[i][j]
+                    result[i][j] = self.agree[i][j] / n if n else 0.0
+        return result
+
+    def kappa_matrix(self) -> List[List[float]]:
+        """Pairwise Cohen's kappa matrix (diagonal is 1.0)."""
+        m = len(self.shared)
+        result = [[1.0] * m for _ in range(m)]
+        for i in range(m):
+            for j in range(m):
+                if i == j:
+                    continue
+                n = self.shared[i][j]
+                if not n:
+                    result[i][j] = 0.0
+                    continue
+                p_o = self.agree[i][j] / n
+                p_e = self.chance[i][j] / (n * n)
+                result[i][j] = 1.0 if p_e >= 1.0 else (p_o - p_e) / (1 - p_e)
+        return result
+
+
+def pairwise_stats(matrix: LabelMatrix, workers: Optional[int] = None) -> PairwiseStats:
+    """Collect ``PairwiseStats`` for all annotator pairs.
+
+    With few categories this is a handful of one-hot matrix products over the
+    whole panel; with many (e.g. free text) it falls back to one
+    ``bincount`` per pair, fanned out over a thread pool.
+
+    Args:
+        matrix: Encoded labels
+        workers: Threads for the per-pair fallback; ``None`` picks
+            ``os.cpu_count()`` for large panels and 1 otherwise
+    """
+    if not matrix.is_numpy:
+        return _pairwise_stats_python(matrix)
+
+    m = matrix.n_annotators
+    k = max(matrix.n_categories, 1)
+    if k <= _ONE_HOT_MAX_CATEGORIES:
+        shared, agree, chance = _pairwise_stats_one_hot(matrix.codes, k)
+    else:
+        pairs = [(i, j) for i in range(m) for j in range(i + 1, m)]
+        if workers is None:
+            workers = (os.cpu_count() or 1) if len(pairs) >= _PARALLEL_MIN_PAIRS else 1
+        shared = np.zeros((m, m))
+        agree = np.zeros((m, m))
+        chance = np.zeros((m, m))
+
+        def run(pair: Tuple[int, int]) -> Tuple[int, int, int, int, float]:
+            return (*pair, *_pair_stats_numpy(matrix.codes, pair[0], pair[1], k))
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                stats = list(pool.map(run, pairs))
+        else:
+            stats = [run(pair) for pair in pairs]
+        for i, j, n, n_agree, n_chance in stats:
+            shared[i, j] = shared[j, i] = n
+            agree[i, j] = agree[j, i] = n_agree
+            chance[i, j] = chance[j, i] = n_chance
+
+    return PairwiseStats(shared=shared.tolist(), agree=agree.tolist(), chance=chance.tolist())
+
+
+def pairwise_agreement(matrix: LabelMatrix) -> List[List[float]]:
+    """Pairwise exact-agreement matrix (diagonal is 1.0)."""
+    return pairwise_stats(matrix).agreement_matrix()
+
+
+def pairwise_kappa(matrix: LabelMatrix) -> List[List[float]]:
+    """Pairwise Cohen's kappa matrix (diagonal is 1.0)."""
+    return pairwise_stats(matrix).kappa_matrix()
+
+
+def fleiss_kappa(matrix: LabelMatrix) -> float:
+    """Fleiss' kappa over fully-annotated tasks."""
+    n_raters = matrix.n_annotators
+    if matrix.is_numpy:
+        codes = _complete_rows(matrix)
+        n_subjects = len(codes)
+        if n_raters < 2 or n_subjects == 0:
+            return 0.0
+        if n_raters <= _FLEISS_PAIRS_MAX_RATERS:
+            # sum_j n_ij^2 = m + 2 * (agreeing rater pairs); cheaper than np.unique
+            sum_sq = np.full(n_subjects, float(n_raters))
+            for a in range(n_raters):
+                sum_sq += 2 * (codes[:, a + 1 :] == codes[:, a : a + 1]).sum(axis=1)
+        else:
+            rows, counts = _unit_category_counts(codes)
+            sum_sq = np.bincount(rows, weights=counts * counts, minlength=n_subjects)
+        p_bar = float(((sum_sq - n_raters) / (n_raters * (n_raters - 1))).mean())
+        p_j = np.bincount(codes.ravel(), minlength=matrix.n_categories) / (n_subjects * n_raters)
+        p_e_bar = float((p_j * p_j).sum())
+    else:
+        rows_list = _complete_rows(matrix)
+        n_subjects = len(rows_list)
+        if n_raters < 2 or n_subjects == 0:
+            return 0.0
+        totals: Counter = Counter()
+        p_sum = 0.0
+        for row in rows_list:
+            counts = Counter(row)
+            totals.update(counts)
+            p_sum += (sum(c * c for c in counts.values()) - n_raters) / (n_raters * (n_raters - 1))
+        p_bar = p_sum / n_subjects
+        p_e_bar = sum((c / (n_subjects * n_raters)) ** 2 for c in totals.values())
+
+    if p_e_bar >= 1.0:
+        return 1.0
+    return (p_bar - p_e_bar) / (1 - p_e_bar)
+
+
+def krippendorff_alpha(data: Union[LabelMatrix, "UnitCounts"], metric: str = "nominal") -> float:
+    """Krippendorff's alpha from the coincidence of labels within each task.
+
+    alpha = 1 - (n - 1) * sum_u sum_ck n_uc n_uk d_ck / (m_u - 1) / sum_ck n_c n_k d_ck
+
+    Every task with at least two labels is a pairable unit, so partially
+    annotated tasks contribute as well. The nominal, interval and ordinal
+    metrics reduce to per-task sums (ordinal is interval distance on the
+    categories' mid-ranks), so cost is linear in the number of labels and
+    no ``k x k`` coincidence matrix is built; ratio pairs up the distinct
+    labels inside each task.
+
+    Args:
+        data: Dense ``LabelMatrix`` or sparse ``UnitCounts``
+        metric: 'nominal', 'ordinal', 'interval' or 'ratio'; all but nominal
+            require numeric labels
+
+    Raises:
+        ValueError: Unknown metric, or non-numeric labels for a numeric metric
+    """
+    if metric not in ALPHA_METRICS:
+        raise ValueError(
+            f"Unknown Krippendorff's alpha metric '{metric}', "
+            f"supported: {', '.join(ALPHA_METRICS)}"
+        )
+    if isinstance(data, LabelMatrix):
+        if data.n_annotators < 2 or data.n_tasks == 0:
+            return 0.0
+        data = UnitCounts.from_matrix(data)
+
+    if data.is_numpy:
+        n, d_o, d_e = _alpha_terms_numpy(data, metric)
+    else:
+        n, d_o, d_e = _alpha_terms_python(data, metric)
+
+    if n < 2:
+        return 0.0
+    if d_e == 0.0:
+        return 1.0
+    return 1.0 - (n - 1) * d_o / d_e
+
+
+@dataclass
+class UnitCounts:
+    """Sparse per-task label counts as parallel ``(unit, category, count)`` sequences.
+
+    Only labelled cells are represented, so a design where each task is seen
+    by 3 of 40 annotators costs three entries per task instead of a dense
+    40-column row. Entries are sorted by unit.
+    """
+
+    units: Any
+    cats: Any
+    counts: Any
+    categories: List[str]
+
+    @property
+    def is_numpy(self) -> bool:
+        return not isinstance(self.units, list)
+
+    @classmethod
+    def from_matrix(cls, matrix: LabelMatrix) -> "UnitCounts":
+        if matrix.is_numpy:
+            units, cats, counts = _unit_category_counts(matrix.codes, with_categories=True)
+            return cls(units, cats, counts, matrix.categories)
+        units, cats, counts = [], [], []
+        for t, row in enumerate(matrix.codes):
+            for c, count in sorted(Counter(c for c in row if c != MISSING).items()):
+                units.append(t)
+                cats.append(c)
+                counts.append(count)
+        return cls(units, cats, counts, matrix.categories)
+
+
+def encode_units(
+    annotations: Sequence[Mapping[Any, Any]], use_numpy: Optional[bool] = None
+) -> UnitCounts:
+    """Encode per-annotator ``task_id -> label`` mappings straight into ``UnitCounts``.
+
+    Tasks are the union of all mappings' keys; no dense matrix is built.
+    """
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+
+    unit_index: Dict[Any, int] = {}
+    cat_index: Dict[str, int] = {}
+    units: List[int] = []
+    cats: List[int] = []
+    for ann in annotations:
+        for tid, value in ann.items():
+            u = unit_index.get(tid)
+            if u is None:
+                u = unit_index[tid] = len(unit_index)
+            key = str(value)
+            c = cat_index.get(key)
+            if c is None:
+                c = cat_index[key] = len(cat_index)
+            units.append(u)
+            cats.append(c)
+
+    if use_numpy:
+        k = max(len(cat_index), 1)
+        keys = np.array(units, dtype=np.int64) * k + np.array(cats, dtype=np.int64)
+        uniq, counts = np.unique(keys, return_counts=True)
+        return UnitCounts(uniq // k, uniq % k, counts.astype(np.float64), list(cat_index))
+
+    items = sorted(Counter(zip(units, cats)).items())
+    return UnitCounts(
+        units=[u for (u, _), _ in items],
+        cats=[c for (_, c), _ in items],
+        counts=[count for _, count in items],
+        categories=list(cat_index),
+    )
+
+
+# ============================================================
+# Bootstrap
+# ============================================================
+
+
+def bootstrap_intervals(
+    matrix: LabelMatrix,
+    units: Optional[UnitCounts] = None,
+    replicates: int = 1000,
+    seed: Optional[int] = None,
+    confidence: float = 0.95,
+    alpha_metric: str = "nominal",
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Percentile bootstrap confidence intervals for the IAA metrics.
+
+    Each replicate resamples tasks with replacement: rows of ``matrix`` for
+    exact agreement, Cohen's and Fleiss' kappa, and pairable tasks of
+    ``units`` (default: derived from ``matrix``) for Krippendorff's alpha.
+    Replicate ``i`` draws from its own generator seeded by ``(seed, i)``,
+    so the intervals depend only on ``seed``, not on how replicates are
+    split across worker processes.
+
+    Args:
+        matrix: Encoded labels on the tasks shared by all annotators
+        units: Sparse label counts for alpha, if it covers more tasks
+        replicates: Number of bootstrap samples
+        seed: Base seed; a random one is drawn (and reported) if ``None``
+        confidence: Two-sided coverage of the interval, in (0, 1)
+        alpha_metric: Distance metric for Krippendorff's alpha
+        workers: Processes to spread replicates over; ``None`` uses
+            ``os.cpu_count()``, ``1`` runs in this process
+
+    Returns:
+        ``{"replicates", "seed", "confidence", "intervals"}`` where each
+        interval is ``{"lower": ..., "upper": ...}``; for ``cohens_kappa``
+        the bounds are annotator x annotator matrices
+    """
+    if replicates < 1:
+        raise ValueError("replicates must be at least 1")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be between 0 and 1")
+    if units is None:
+        units = UnitCounts.from_matrix(matrix)
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+
+    state = (matrix, _BootstrapUnits.build(units), alpha_metric)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, replicates))
+
+    if workers == 1:
+        samples = _bootstrap_replicates(state, seed, 0, replicates)
+    else:
+        step = -(-replicates // (workers * 4))
+        bounds = [(lo, min(lo + step, replicates)) for lo in range(0, replicates, step)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_bootstrap_worker, initargs=(state,)
+        ) as pool:
+            futures = [pool.submit(_bootstrap_worker_chunk, seed, lo, hi) for lo, hi in bounds]
+            samples = [sample for future in futures for sample in future.result()]
+
+    tail = (1.0 - confidence) / 2
+    exact, fleiss, kappa, alpha = zip(*samples)
+    n = matrix.n_annotators
+
+    def interval(values: Sequence[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        return {"lower": _percentile(ordered, tail), "upper": _percentile(ordered, 1 - tail)}
+
+    pair_intervals = [[interval([k[i][j] for k in kappa]) for j in range(n)] for i in range(n)]
+    return {
+        "replicates": replicates,
+        "seed": seed,
+        "confidence": confidence,
+        "intervals": {
+            "exact_agreement_rate": interval(exact),
+            "fleiss_kappa": interval(fleiss),
+            "krippendorff_alpha": interval(alpha),
+            "cohens_kappa": {
+                "lower": [[cell["lower"] for cell in row] for row in pair_intervals],
+                "upper": [[cell["upper"] for cell in row] for row in pair_intervals],
+            },
+        },
+    }
+
+
+@dataclass
+class _BootstrapUnits:
+    """Pairable tasks of a ``UnitCounts``, renumbered ``0..n-1`` for resampling."""
+
+    units: UnitCounts
+    starts: Any
+    sizes: Any
+
+    @property
+    def n_units(self) -> int:
+        return len(self.sizes)
+
+    @classmethod
+    def build(cls, units: UnitCounts) -> "_BootstrapUnits":
+        if units.is_numpy:
+            _, first, sizes = np.unique(units.units, return_index=True, return_counts=True)
+            m_u = np.add.reduceat(units.counts, first) if len(first) else first
+            keep = np.repeat(m_u >= 2, sizes)
+            sizes = sizes[m_u >= 2]
+            renumbered = np.repeat(np.arange(len(sizes)), sizes)
+            compact = UnitCounts(
+                renumbered, units.cats[keep], units.counts[keep], units.categories
+            )
+            return cls(compact, np.cumsum(sizes) - sizes, sizes)
+
+        groups = []
+        for _, group in groupby(zip(units.units, units.cats, units.counts), key=itemgetter(0)):
+            entries = [(c, count) for _, c, count in group]
+            if sum(count for _, count in entries) >= 2:
+                groups.append(entries)
+        compact = UnitCounts(
+            [u for u, entries in enumerate(groups) for _ in entries],
+            [c for entries in groups for c, _ in entries],
+            [count for entries in groups for _, count in entries],
+            units.categories,
+        )
+        return cls(compact, groups, [len(entries) for entries in groups])
+
+    def resample(self, picks: Sequence[int]) -> UnitCounts:
+        if self.units.is_numpy:
+            sizes = self.sizes[picks]
+            offsets = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            rows = np.repeat(self.starts[picks], sizes) + offsets
+            renumbered = np.repeat(np.arange(len(picks)), sizes)
+            return UnitCounts(
+                renumbered, self.units.cats[rows], self.units.counts[rows], self.units.categories
+            )
+
+        out = UnitCounts([], [], [], self.units.categories)
+        for u, p in enumerate(picks):
+            for c, count in self.starts[p]:
+                out.units.append(u)
+                out.cats.append(c)
+                out.counts.append(count)
+        return out
+
+
+_BootstrapState = Tuple[LabelMatrix, _BootstrapUnits, str]
+
+# Set in each worker process by _init_bootstrap_worker
+_worker_state: Optional[_BootstrapState] = None
+
+
+def _init_bootstrap_worker(state: _BootstrapState) -> None:
+    global _worker_state
+    _worker_state = state
+
+
+def _bootstrap_worker_chunk(seed: int, start: int, stop: int) -> List[Tuple[Any, ...]]:
+    return _bootstrap_replicates(_worker_state, seed, start, stop)
+
+
+def _bootstrap_replicates(
+    state: _BootstrapState, seed: int, start: int, stop: int
+) -> List[Tuple[Any, ...]]:
+    """Metrics ``(exact, fleiss, kappa_matrix, alpha)`` for replicates ``start..stop-1``."""
+    matrix, units, alpha_metric = state
+    n_tasks, n_units = matrix.n_tasks, units.n_units
+    samples = []
+    for i in range(start, stop):
+        if matrix.is_numpy:
+            rng = np.random.default_rng([seed, i])
+            rows = rng.integers(0, n_tasks, n_tasks) if n_tasks else np.zeros(0, dtype=np.int64)
+            picks = rng.integers(0, n_units, n_units) if n_units else np.zeros(0, dtype=np.int64)
+            codes = matrix.codes[rows]
+        else:
+            rng = random.Random(f"{seed}:{i}")
+            rows = [rng.randrange(n_tasks) for _ in range(n_tasks)]
+            picks = [rng.randrange(n_units) for _ in range(n_units)]
+            codes = [matrix.codes[r] for r in rows]
+        sample = LabelMatrix(codes, matrix.categories, range(n_tasks), matrix.n_annotators)
+        samples.append(
+            (
+                exact_agreement_rate(sample),
+                fleiss_kappa(sample),
+                pairwise_stats(sample, workers=1).kappa_matrix(),
+                krippendorff_alpha(units.resample(picks), alpha_metric),
+            )
+        )
+    return samples
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear-interpolated quantile of an already sorted sequence."""
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+# ============================================================
+# Incremental state
+# ============================================================
+
+
+class AgreementState:
+    """Sufficient statistics for the IAA metrics, updated label by label.
+
+    Keeps every label plus running counts, so changing one annotator's label
+    on one task only touches that task's contribution:
+
+    - tasks labelled by every registered annotator ("complete" tasks, the
+      ones ``ResultMerger.calculate_iaa`` uses for kappa): unanimous count,
+      per-category totals and sum of squared counts for Fleiss' kappa, and a
+      confusion counter per annotator pair for Cohen's kappa;
+    - all tasks: integer coincidence counts ``n_uc * (n_uk - [c == k])``
+      grouped by labels per task, from which Krippendorff's alpha follows
+      without revisiting any task.
+
+    Queries cost ``O(categories^2)`` per pair, independent of the number of
+    tasks. Registering a new annotator empties the complete-task counts,
+    since no task is complete until they label it.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self) -> None:
+        self.annotators: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._labels: Dict[Any, Dict[int, str]] = {}
+        self._reset_complete()
+        # labels per task -> Counter[(c, k)]
+        self._coincidence: Dict[int, Counter] = {}
+
+    def _reset_complete(self) -> None:
+        self._complete = 0
+        self._unanimous = 0
+        self._sum_sq = 0
+        self._totals: Counter = Counter()
+        self._pairs: Dict[Tuple[int, int], Counter] = {}
+
+    @property
+    def n_annotators(self) -> int:
+        return len(self.annotators)
+
+    @property
+    def n_tasks(self) -> int:
+        return len(self._labels)
+
+    @property
+    def common_tasks(self) -> int:
+        return self._complete
+
+    def add_annotator(self, annotator: str) -> int:
+        """Register ``annotator`` (no-op if known) and return its index."""
+        idx = self._index.get(annotator)
+        if idx is None:
+            idx = self._index[annotator] = len(self.annotators)
+            self.annotators.append(annotator)
+            self._reset_complete()
+        return idx
+
+    def update(self, annotator: str, labels: Mapping[Any, Any]) -> None:
+        """Set ``annotator``'s labels for the given tasks; other tasks are untouched.
+
+        Labels are compared by ``str(value)``, like ``encode``.
+        """
+        a = self.add_annotator(annotator)
+        for task_id, value in labels.items():
+            self._set(a, task_id, str(value))
+
+    def remove(self, annotator: str, task_ids: Iterable[Any]) -> None:
+        """Drop ``annotator``'s labels for the given tasks."""
+        a = self._index.get(annotator)
+        if a is None:
+            return
+        for task_id in task_ids:
+            self._set(a, task_id, None)
+
+    def _set(self, a: int, task_id: Any, label: Optional[str]) -> None:
+        row = self._labels.get(task_id, {})
+        if row.get(a) == label:
+            return
+        self._apply(row, -1)
+        row = dict(row)
+        if label is None:
+            row.pop(a, None)
+        else:
+            row[a] = label
+        if row:
+            self._labels[task_id] = row
+        else:
+            self._labels.pop(task_id, None)
+        self._apply(row, 1)
+
+    def _apply(self, row: Dict[int, str], sign: int) -> None:
+        """Add (``sign=1``) or retract (``sign=-1``) one task's contribution."""
+        m = len(row)
+        if not m:
+            return
+        counts = Counter(row.values())
+        if m >= 2:
+            coincidence = self._coincidence.setdefault(m, Counter())
+            for c, n_c in counts.items():
+                for k, n_k in counts.items():
+                    pairs = n_c * (n_k - (c == k))
+                    if pairs:
+                        _bump(coincidence, (c, k), sign * pairs)
+            if not coincidence:
+                del self._coincidence[m]
+
+        if m == len(self.annotators):
+            self._complete += sign
+            self._unanimous += sign * (len(counts) == 1)
+            self._sum_sq += sign * sum(n * n for n in counts.values())
+            for c, n in counts.items():
+                _bump(self._totals, c, sign * n)
+            items = sorted(row.items())
+            for x, (i, label_i) in enumerate(items):
+                for j, label_j in items[x + 1 :]:
+                    confusion = self._pairs.setdefault((i, j), Counter())
+                    _bump(confusion, (label_i, label_j), sign)
+
+    # ---- queries ----
+
+    def exact_agreement_rate(self) -> float:
+        return self._unanimous / self._complete if self._complete else 0.0
+
+    def fleiss_kappa(self) -> float:
+        m, n_subjects = len(self.annotators), self._complete
+        if m < 2 or n_subjects == 0:
+            return 0.0
+        p_bar = (self._sum_sq - n_subjects * m) / (n_subjects * m * (m - 1))
+        p_e_bar = sum((t / (n_subjects * m)) ** 2 for t in self._totals.values())
+        if p_e_bar >= 1.0:
+            return 1.0
+        return (p_bar - p_e_bar) / (1 - p_e_bar)
+
+    def pairwise_stats(self) -> PairwiseStats:
+        m = len(self.annotators)
+        shared = [[0] * m for _ in range(m)]
+        agree = [[0] * m for _ in range(m)]
+        chance = [[0.0] * m for _ in range(m)]
+        for (i, j), confusion in self._pairs.items():
+            left: Counter = Counter()
+            right: Counter = Counter()
+            n = same = 0
+            for (a, b), count in confusion.items():
+                n += count
+                same += count if a == b else 0
+                left[a] += count
+                right[b] += count
+            p = float(sum(count * right[c] for c, count in left.items()))
+            shared[i][j] = shared[j][i] = n
+            agree[i][j] = agree[j][i] = same
+            chance[i][j] = chance[j][i] = p
+        return PairwiseStats(shared, agree, chance)
+
+    def krippendorff_alpha(self, metric: str = "nominal") -> float:
+        """Krippendorff's alpha from the accumulated coincidence counts."""
+        if metric not in ALPHA_METRICS:
+            raise ValueError(
+                f"Unknown Krippendorff's alpha metric '{metric}', "
+                f"supported: {', '.join(ALPHA_METRICS)}"
+            )
+        coincidence: Dict[Tuple[str, str], float] = {}
+        for m, counts in self._coincidence.items():
+            for key, count in counts.items():
+                coincidence[key] = coincidence.get(key, 0.0) + count / (m - 1)
+        if not coincidence:
+            return 0.0
+
+        categories = sorted({c for c, _ in coincidence})
+        index = {c: x for x, c in enumerate(categories)}
+        n_c = [0.0] * len(categories)
+        for (c, _), value in coincidence.items():
+            n_c[index[c]] += value
+        n = sum(n_c)
+        if n < 2:
+            return 0.0
+
+        if metric == "nominal":
+            def delta(a: int, b: int) -> float:
+                return float(a != b)
+        else:
+            values = _numeric_categories(categories, metric)
+            if metric == "ordinal":
+                values = _mid_ranks(values, n_c)
+            if metric == "ratio":
+                def delta(a: int, b: int) -> float:
+                    return _ratio_delta(values[a], values[b])
+            else:
+                def delta(a: int, b: int) -> float:
+                    return (values[a] - values[b]) ** 2
+
+        d_o = sum(v * delta(index[c], index[k]) for (c, k), v in coincidence.items())
+        present = [x for x, count in enumerate(n_c) if count]
+        d_e = sum(n_c[a] * n_c[b] * delta(a, b) for a in present for b in present)
+        if d_e == 0.0:
+            return 1.0
+        return 1.0 - (n - 1) * d_o / d_e
+
+    def metrics(self, alpha_metric: str = "nominal") -> Dict[str, Any]:
+        """Same metrics dict as ``ResultMerger.calculate_iaa``, with annotators as ``files``."""
+        if len(self.annotators) < 2:
+            return {"error": "Need at least 2 annotators to calculate IAA"}
+        if not self._complete:
+            return {"error": "No common tasks found between annotators"}
+        try:
+            alpha = self.krippendorff_alpha(alpha_metric)
+        except ValueError as e:
+            return {"error": str(e)}
+        pairwise = self.pairwise_stats()
+        return {
+            "annotator_count": len(self.annotators),
+            "common_tasks": self._complete,
+            "exact_agreement_rate": self.exact_agreement_rate(),
+            "pairwise_agreement": pairwise.agreement_matrix(),
+            "files": list(self.annotators),
+            "cohens_kappa": pairwise.kappa_matrix(),
+            "fleiss_kappa": self.fleiss_kappa(),
+            "krippendorff_alpha": alpha,
+            "alpha_metric": alpha_metric,
+        }
+
+    # ---- serialization ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot, restorable with ``from_dict``."""
+        return {
+            "version": self.FORMAT_VERSION,
+            "annotators": list(self.annotators),
+            "labels": [[tid, sorted(row.items())] for tid, row in self._labels.items()],
+            "complete": {
+                "tasks": self._complete,
+                "unanimous": self._unanimous,
+                "sum_sq": self._sum_sq,
+                "totals": sorted(self._totals.items()),
+            },
+            "pairs": [
+                [i, j, [[a, b, n] for (a, b), n in sorted(confusion.items())]]
+                for (i, j), confusion in sorted(self._pairs.items())
+            ],
+            "coincidence": [
+                [m, [[c, k, n] for (c, k), n in sorted(counts.items())]]
+                for m, counts in sorted(self._coincidence.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AgreementState":
+        if data.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported agreement state version: {data.get('version')!r}")
+        state = cls()
+        state.annotators = list(data["annotators"])
+        state._index = {name: i for i, name in enumerate(state.annotators)}
+        state._labels = {tid: {a: label for a, label in row} for tid, row in data["labels"]}
+        complete = data["complete"]
+        state._complete = complete["tasks"]
+        state._unanimous = complete["unanimous"]
+        state._sum_sq = complete["sum_sq"]
+        state._totals = Counter({c: n for c, n in complete["totals"]})
+        state._pairs = {
+            (i, j): Counter({(a, b): n for a, b, n in entries}) for i, j, entries in data["pairs"]
+        }
+        state._coincidence = {
+            m: Counter({(c, k): n for c, k, n in entries}) for m, entries in data["coincidence"]
+        }
+        return state
+
+    def save(self, path: str) -> None:
+        jsonlib.dump(self.to_dict(), path, compact=True)
+
+    @classmethod
+    def load(cls, path: str) -> "AgreementState":
+        return cls.from_dict(jsonlib.load(path))
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+
+def _bump(counter: Counter, key: Any, delta: int) -> None:
+    """Add ``delta`` to ``counter[key]``, dropping the key when it reaches zero."""
+    value = counter[key] + delta
+    if value:
+        counter[key] = value
+    else:
+        del counter[key]
+
+
+def _complete_rows(matrix: LabelMatrix) -> Any:
+    """Rows (tasks) labelled by every annotator."""
+    if matrix.is_numpy:
+        return matrix.codes[(matrix.codes != MISSING).all(axis=1)]
+    return [row for row in matrix.codes if MISSING not in row]
+
+
+def _unit_category_counts(codes: Any, with_categories: bool = False) -> Any:
+    """Sparse per-task category counts as parallel ``(row, [category,] count)`` arrays.
+
+    Avoids a dense ``n_tasks x n_categories`` table, which would explode for
+    free-text annotations where almost every label is its own category.
+    """
+    n_cat = max(int(codes.max()) + 1, 1) if codes.size else 1
+    row_idx = np.broadcast_to(np.arange(len(codes), dtype=np.int64)[:, None], codes.shape)
+    present = codes != MISSING
+    keys = row_idx[present] * n_cat + codes[present]
+    uniq, counts = np.unique(keys, return_counts=True)
+    counts = counts.astype(np.float64)
+    rows = uniq // n_cat
+    if with_categories:
+        return rows, uniq % n_cat, counts
+    return rows, counts
+
+
+def _pairwise_stats_one_hot(codes: Any, k: int) -> Tuple[Any, Any, Any]:
+    """All-pairs statistics from per-category one-hot matrix products.
+
+    For category ``c`` with one-hot ``A`` and presence mask ``P`` (both
+    ``n_tasks x n_annotators``): ``A.T @ A`` counts pairs agreeing on ``c``
+    and ``(A.T @ P)[i, j]`` counts ``i``'s ``c`` labels on tasks ``j`` also
+    labelled. Rows are processed in chunks small enough that float32 sums
+    stay exact.
+    """
+    n, m = codes.shape
+    shared = np.zeros((m, m))
+    agree = np.zeros((m, m))
+    marginal = np.zeros((k, m, m))
+    chunk = max(1, _CHUNK_CELLS // max(m, 1))
+    for start in range(0, n, chunk):
+        block = codes[start : start + chunk]
+        present = (block != MISSING).astype(np.float32)
+        shared += present.T @ present
+        for c in range(k):
+            one_hot = (block == c).astype(np.float32)
+            agree += one_hot.T @ one_hot
+            marginal[c] += one_hot.T @ present
+    chance = (marginal * marginal.transpose(0, 2, 1)).sum(axis=0)
+    # Self-pairs are not meaningful; keep the diagonal at zero like the other paths
+    for stat in (shared, agree, chance):
+        np.fill_diagonal(stat, 0.0)
+    return shared, agree, chance
+
+
+def _pair_stats_numpy(codes: Any, i: int, j: int, k: int) -> Tuple[int, int, float]:
+    """``(shared, agree, chance)`` for one annotator pair."""
+    ci = codes[:, i]
+    cj = codes[:, j]
+    both = (ci != MISSING) & (cj != MISSING)
+    ci = ci[both]
+    cj = cj[both]
+    chance = float(
+        np.bincount(ci, minlength=k).astype(np.float64) @ np.bincount(cj, minlength=k)
+    )
+    return len(ci), int(np.count_nonzero(ci == cj)), chance
+
+
+def _pairwise_stats_python(matrix: LabelMatrix) -> PairwiseStats:
+    """Single pass over the rows accumulating all-pairs statistics.
+
+    Fully-labelled rows only update per-annotator marginals; per-pair
+    marginals are tracked for partially-labelled rows alone.
+    """
+    m = matrix.n_annotators
+    shared = [[0.0] * m for _ in range(m)]
+    agree = [[0.0] * m for _ in range(m)]
+    full_marginals = [Counter() for _ in range(m)]
+    pair_marginals: Dict[Tuple[int, int], Counter] = {}
+    n_full = 0
+
+    for row in matrix.codes:
+        labelled = [(a, c) for a, c in enumerate(row) if c != MISSING]
+        complete = len(labelled) == m
+        if complete:
+            n_full += 1
+        for x, (i, ci) in enumerate(labelled):
+            if complete:
+                full_marginals[i][ci] += 1
+            for j, cj in labelled[x + 1 :]:
+                if ci == cj:
+                    agree[i][j] += 1
+                if not complete:
+                    shared[i][j] += 1
+                    pair_marginals.setdefault((i, j), Counter())[ci] += 1
+                    pair_marginals.setdefault((j, i), Counter())[cj] += 1
+
+    chance = [[0.0] * m for _ in range(m)]
+    for i in range(m):
+        for j in range(i + 1, m):
+            shared[i][j] += n_full
+            mi = full_marginals[i] + pair_marginals.get((i, j), Counter())
+            mj = full_marginals[j] + pair_marginals.get((j, i), Counter())
+            chance[i][j] = float(sum(count * mj[c] for c, count in mi.items()))
+            shared[j][i] = shared[i][j]
+            agree[j][i] = agree[i][j]
+            chance[j][i] = chance[i][j]
+    return PairwiseStats(shared=shared, agree=agree, chance=chance)
+
+
+def _pair_confusion(matrix: LabelMatrix, i: int, j: int) -> Any:
+    """Confusion counts between annotators ``i`` and ``j`` and the number of shared tasks.
+
+    Returned as a ``{(code_i, code_j): count}`` mapping (pure Python) or a
+    dense ``k x k`` array (NumPy).
+    """
+    if matrix.is_numpy:
+        ci = matrix.codes[:, i]
+        cj = matrix.codes[:, j]
+        both = (ci != MISSING) & (cj != MISSING)
+        ci = ci[both].astype(np.int64)
+        cj = cj[both]
+        k = max(matrix.n_categories, 1)
+        confusion = np.bincount(ci * k + cj, minlength=k * k).reshape(k, k)
+        return confusion, int(both.sum())
+
+    confusion: Counter = Counter(
+        (row[i], row[j]) for row in matrix.codes if row[i] != MISSING and row[j] != MISSING
+    )
+    return confusion, sum(confusion.values())
+
+
+def _trace(confusion: Any) -> float:
+    if isinstance(confusion, Counter):
+        return float(sum(c for (a, b), c in confusion.items() if a == b))
+    return float(np.trace(confusion))
+
+
+def _kappa_from_confusion(confusion: Any, n: int) -> float:
+    if n == 0:
+        return 0.0
+    p_o = _trace(confusion) / n
+    if isinstance(confusion, Counter):
+        rows: Counter = Counter()
+        cols: Counter = Counter()
+        for (a, b), c in confusion.items():
+            rows[a] += c
+            cols[b] += c
+        p_e = sum(rows[c] * cols[c] for c in rows) / (n * n)
+    else:
+        p_e = float(confusion.sum(axis=1) @ confusion.sum(axis=0)) / (n * n)
+    if p_e >= 1.0:
+        return 1.0
+    return (p_o - p_e) / (1 - p_e)
+
+
+def _numeric_categories(categories: List[str], metric: str) -> List[float]:
+    values = []
+    for cat in categories:
+        try:
+            values.append(float(cat))
+        except ValueError:
+            raise ValueError(
+                f"Krippendorff's alpha with the '{metric}' metric needs numeric labels, "
+                f"got {cat!r}"
+            ) from None
+    return values
+
+
+def _mid_ranks(values: List[float], n_c: Sequence[float]) -> List[float]:
+    """Ordinal metric positions: cumulative count up to each category minus half its own."""
+    ranks = [0.0] * len(values)
+    cumulative = 0.0
+    for c in sorted(range(len(values)), key=values.__getitem__):
+        cumulative += n_c[c]
+        ranks[c] = cumulative - n_c[c] / 2
+    return ranks
+
+
+def _ratio_delta(a: float, b: float) -> float:
+    total = a + b
+    return ((a - b) / total) ** 2 if total else 0.0
+
+
+def _alpha_terms_numpy(data: UnitCounts, metric: str) -> Tuple[float, float, float]:
+    """``(n, observed, expected)`` disagreement sums for alpha."""
+    units, cats, counts = data.units, data.cats, data.counts
+    if not len(units):
+        return 0.0, 0.0, 0.0
+    m_u = np.bincount(units, weights=counts)
+    pairable = m_u[units] >= 2
+    units, cats, counts = units[pairable], cats[pairable], counts[pairable]
+    n = float(counts.sum())
+    k = max(len(data.categories), 1)
+    n_c = np.bincount(cats, weights=counts, minlength=k)
+    unit_mask = m_u >= 2
+    m = m_u[unit_mask]
+
+    if metric == "nominal":
+        sq = np.bincount(units, weights=counts * counts, minlength=len(m_u))[unit_mask]
+        d_o = float(((m * m - sq) / (m - 1)).sum())
+        d_e = n * n - float(n_c @ n_c)
+        return n, d_o, d_e
+
+    values = np.array(_numeric_categories(data.categories, metric) or [0.0])
+    if metric in ("interval", "ordinal"):
+        if metric == "ordinal":
+            values = np.array(_mid_ranks(values.tolist(), n_c.tolist()))
+        # Shift to the mean to limit cancellation; squared differences are unchanged
+        values = values - (n_c @ values) / n if n else values
+        x = values[cats]
+        s1 = np.bincount(units, weights=counts * x, minlength=len(m_u))[unit_mask]
+        s2 = np.bincount(units, weights=counts * x * x, minlength=len(m_u))[unit_mask]
+        d_o = float((2 * (m * s2 - s1 * s1) / (m - 1)).sum())
+        d_e = 2 * (n * float(n_c @ (values * values)) - float(n_c @ values) ** 2)
+        return n, d_o, d_e
+
+    # ratio: every ordered pair of distinct labels inside each unit
+    sizes = np.bincount(units, minlength=len(m_u))
+    starts = np.cumsum(sizes) - sizes
+    partners = sizes[units]
+    left = np.repeat(np.arange(len(units)), partners)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+    right = starts[units[left]] + offsets
+    va = values[cats[left]]
+    vb = values[cats[right]]
+    total = va + vb
+    delta = np.divide((va - vb) ** 2, total * total, out=np.zeros_like(total), where=total != 0)
+    d_o = float((counts[left] * counts[right] * delta / (m_u[units[left]] - 1)).sum())
+    d_e = 0.0
+    for c in np.nonzero(n_c)[0]:
+        t = values[c] + values
+        row = np.divide((values[c] - values) ** 2, t * t, out=np.zeros_like(t), where=t != 0)
+        d_e += float(n_c[c] * (row @ n_c))
+    return n, d_o, d_e
+
+
+def _alpha_terms_python(data: UnitCounts, metric: str) -> Tuple[float, float, float]:
+    """Pure-Python counterpart of ``_alpha_terms_numpy``."""
+    pairable_units = []
+    n_c = [0.0] * len(data.categories)
+    for _, group in groupby(zip(data.units, data.cats, data.counts), key=itemgetter(0)):
+        unit = [(c, count) for _, c, count in group]
+        if sum(count for _, count in unit) >= 2:
+            pairable_units.append(unit)
+            for c, count in unit:
+                n_c[c] += count
+    n = float(sum(n_c))
+
+    if metric == "nominal":
+        d_o = 0.0
+        for unit in pairable_units:
+            m = sum(count for _, count in unit)
+            d_o += (m * m - sum(count * count for _, count in unit)) / (m - 1)
+        d_e = n * n - sum(x * x for x in n_c)
+        return n, d_o, d_e
+
+    values = _numeric_categories(data.categories, metric)
+    if metric == "ordinal":
+        values = _mid_ranks(values, n_c)
+
+    if metric in ("interval", "ordinal"):
+        mean = sum(x * v for x, v in zip(n_c, values)) / n if n else 0.0
+        values = [v - mean for v in values]
+        d_o = 0.0
+        for unit in pairable_units:
+            m = sum(count for _, count in unit)
+            s1 = sum(count * values[c] for c, count in unit)
+            s2 = sum(count * values[c] ** 2 for c, count in unit)
+            d_o += 2 * (m * s2 - s1 * s1) / (m - 1)
+        s1 = sum(x * v for x, v in zip(n_c, values))
+        s2 = sum(x * v * v for x, v in zip(n_c, values))
+        return n, d_o, 2 * (n * s2 - s1 * s1)
+
+    d_o = 0.0
+    for unit in pairable_units:
+        m = sum(count for _, count in unit)
+        for a, ca in unit:
+            for b, cb in unit:
+                d_o += ca * cb * _ratio_delta(values[a], values[b]) / (m - 1)
+    present = [c for c, x in enumerate(n_c) if x]
+    d_e = sum(
+        n_c[a] * n_c[b] * _ratio_delta(values[a], values[b]) for a in present for b in present
+    )
+    return n, d_o, d_e
@@ -1,27 +1,43 @@
 """DataLabel CLI - 命令行界面."""
 
-import json
 import sys
 from pathlib import Path
 from typing import Optional
 
 import click
 
-from datalabel import __version__
+from datalabel import __version__, jsonlib
 from datalabel.dashboard import DashboardGenerator
 from datalabel.generator import AnnotatorGenerator
-from datalabel.io import export_responses, extract_responses, import_tasks_from_file
-from datalabel.merger import ResultMerger
+from datalabel.io import (
+    export_responses,
+    extract_responses,
+    iter_tasks,
+    write_json_array,
+)
+from datalabel.manifest import assemble_results, load_manifest, missing_bundles
+from datalabel.merger import DEFAULT_BUFFER_SIZE, ResultMerger
+from datalabel.table import AnnotationTable
 
 
 @click.group()
 @click.version_option(version=__version__, prog_name="datalabel")
-def main():
+@click.option(
+    "--json-backend",
+    type=click.Choice(jsonlib.BACKENDS),
+    default=None,
+    help="JSON 编解码后端 (默认: 已安装的最快者 orjson > msgspec > json)",
+)
+def main(json_backend: Optional[str]):
     """DataLabel - 轻量级数据标注工具
 
     生成独立的 HTML 标注界面，无需服务器，浏览器直接打开即可使用。
     """
-    pass
+    if json_backend:
+        try:
+            jsonlib.set_backend(json_backend)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--json-backend")
 
 
 @main.command()
@@ -64,7 +80,13 @@ def generate(analysis_dir: str, output: Optional[str], theme: str):
 @main.command()
 @click.argument("schema_file", type=click.Path(exists=True))
 @click.argument("tasks_file", type=click.Path(exists=True))
-@click.option("-o", "--output", type=click.Path(), required=True, help="输出 HTML 文件路径")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(),
+    required=True,
+    help="输出 HTML 文件路径（--shard-size 时为输出目录）",
+)
 @click.option(
     "-g", "--guidelines", type=click.Path(exists=True), help="标注指南文件路径 (Markdown 格式)"
 )
@@ -76,6 +98,24 @@ def generate(analysis_dir: str, output: Optional[str], theme: str):
     default="default",
     help="界面主题 (默认: default)",
 )
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    help="分片大小：任务按此条数写入 <输出名>_tasks/ 目录并按需加载 (默认: 全部内嵌)",
+)
+@click.option(
+    "--shard-size",
+    type=click.IntRange(min=1),
+    help="每个标注包的任务数：拆分为多个 HTML 并在输出目录写入 manifest.json",
+)
+@click.option("--annotators", type=str, help="分配标注包的标注员，逗号分隔 (配合 --shard-size)")
+@click.option(
+    "--per-shard",
+    type=click.IntRange(min=1),
+    default=1,
+    help="每个分片分配的标注员数 (默认: 1)",
+)
+@click.option("--workers", type=int, default=1, help="并行渲染进程数 (默认 1，0 = CPU 核数)")
 def create(
     schema_file: str,
     tasks_file: str,
@@ -84,6 +124,11 @@ def create(
     title: Optional[str],
     page_size: int,
     theme: str,
+    chunk_size: Optional[int],
+    shard_size: Optional[int],
+    annotators: Optional[str],
+    per_shard: int,
+    workers: int,
 ):
     """从 Schema 和任务文件创建标注界面
 
@@ -91,12 +136,10 @@ def create(
     TASKS_FILE: 待标注任务 JSON 文件
     """
     # 加载 Schema
-    with open(schema_file, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = jsonlib.load(schema_file)
 
     # 加载任务
-    with open(tasks_file, "r", encoding="utf-8") as f:
-        tasks_data = json.load(f)
+    tasks_data = jsonlib.load(tasks_file)
 
     # 支持两种格式: 直接列表或 {"samples": [...]}
     if isinstance(tasks_data, list):
@@ -114,18 +157,43 @@ def create(
     click.echo(f"  任务数: {len(tasks)}")
 
     generator = AnnotatorGenerator()
-    result = generator.generate(
-        schema=schema,
-        tasks=tasks,
-        output_path=output,
-        guidelines=guidelines_content,
-        title=title,
-        page_size=page_size,
-        theme=theme,
-    )
+    if shard_size is not None:
+        annotator_names = [a.strip() for a in (annotators or "").split(",") if a.strip()]
+        result = generator.generate_sharded(
+            schema=schema,
+            tasks=tasks,
+            output_dir=output,
+            shard_size=shard_size,
+            guidelines=guidelines_content,
+            title=title,
+            page_size=page_size,
+            theme=theme,
+            annotators=annotator_names,
+            annotators_per_shard=per_shard,
+            chunk_size=chunk_size,
+            workers=workers or None,
+        )
+    else:
+        result = generator.generate(
+            schema=schema,
+            tasks=tasks,
+            output_path=output,
+            guidelines=guidelines_content,
+            title=title,
+            page_size=page_size,
+            theme=theme,
+            chunk_size=chunk_size,
+        )
 
-    if result.success:
+    if result.success and shard_size is not None:
+        click.echo(f"✓ 创建成功: {result.shard_count} 个分片, {len(result.bundle_paths)} 个标注包")
+        click.echo(f"  分片清单: {result.output_path}")
+        click.echo("\n合并结果时传入清单: merge --manifest <清单> <结果文件...>")
+    elif result.success:
         click.echo(f"✓ 创建成功: {result.output_path}")
+        if result.chunk_count:
+            chunk_dir = Path(result.output_path).with_name(f"{Path(result.output_path).stem}_tasks")
+            click.echo(f"  任务分片: {result.chunk_count} 个 ({chunk_dir})，需与 HTML 放在一起分发")
         click.echo("\n在浏览器中打开此文件即可开始标注")
     else:
         click.echo(f"✗ 创建失败: {result.error}", err=True)
@@ -142,12 +210,40 @@ def create(
     default="majority",
     help="合并策略 (默认: majority)",
 )
-def merge(result_files: tuple, output: str, strategy: str):
+@click.option("--stream", is_flag=True, help="流式合并：增量读取并在磁盘上排序，内存占用恒定")
+@click.option(
+    "--buffer-size",
+    type=int,
+    default=DEFAULT_BUFFER_SIZE,
+    help=f"流式合并时每批内存排序的记录数 (默认: {DEFAULT_BUFFER_SIZE})",
+)
+@click.option("--workers", type=int, default=1, help="并行合并进程数 (默认 1，0 = CPU 核数)")
+@click.option("--compact", is_flag=True, help="输出不缩进的紧凑 JSON（更小、写入更快）")
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True),
+    help="分片清单 (create --shard-size 生成)：按标注员拼合各分片的结果",
+)
+def merge(
+    result_files: tuple,
+    output: str,
+    strategy: str,
+    stream: bool,
+    buffer_size: int,
+    workers: int,
+    compact: bool,
+    manifest: Optional[str],
+):
     """合并多个标注员的标注结果
 
-    RESULT_FILES: 标注结果 JSON 文件列表
+    RESULT_FILES: 标注结果 JSON 文件列表（--stream 模式下也支持 JSONL）
     """
-    if len(result_files) < 2:
+    if manifest and stream:
+        click.echo("错误: --manifest 不支持 --stream", err=True)
+        sys.exit(1)
+
+    results = _load_results_with_manifest(manifest, result_files) if manifest else None
+    if (len(result_files) if results is None else results.n_sources) < 2:
         click.echo("错误: 至少需要 2 个标注结果文件", err=True)
         sys.exit(1)
 
@@ -156,9 +252,13 @@ def merge(result_files: tuple, output: str, strategy: str):
 
     merger = ResultMerger()
     result = merger.merge(
-        result_files=list(result_files),
+        result_files=list(result_files) if results is None else results,
         output_path=output,
         strategy=strategy,
+        streaming=stream,
+        buffer_size=buffer_size,
+        workers=workers or None,
+        compact=compact,
     )
 
     if result.success:
@@ -166,8 +266,8 @@ def merge(result_files: tuple, output: str, strategy: str):
         click.echo(f"  任务总数: {result.total_tasks}")
         click.echo(f"  标注员数: {result.annotator_count}")
         click.echo(f"  一致率: {result.agreement_rate:.1%}")
-        if result.conflicts:
-            click.echo(f"  冲突数: {len(result.conflicts)}")
+        if result.conflict_count:
+            click.echo(f"  冲突数: {result.conflict_count}")
     else:
         click.echo(f"✗ 合并失败: {result.error}", err=True)
         sys.exit(1)
@@ -175,7 +275,30 @@ def merge(result_files: tuple, output: str, strategy: str):
 
 @main.command()
 @click.argument("result_files", nargs=-1, type=click.Path(exists=True), required=True)
-def iaa(result_files: tuple):
+@click.option(
+    "--alpha-metric",
+    type=click.Choice(["nominal", "ordinal", "interval", "ratio"]),
+    default="nominal",
+    help="Krippendorff's Alpha 距离度量 (ordinal/interval/ratio 要求数值标签)",
+)
+@click.option(
+    "--bootstrap",
+    "replicates",
+    type=int,
+    default=0,
+    help="Bootstrap 重采样次数 (0 = 不计算置信区间)",
+)
+@click.option("--seed", type=int, default=None, help="Bootstrap 随机种子")
+@click.option("--confidence", type=float, default=0.95, help="置信水平 (默认 0.95)")
+@click.option("--workers", type=int, default=None, help="Bootstrap 并行进程数 (默认 CPU 核数)")
+def iaa(
+    result_files: tuple,
+    alpha_metric: str,
+    replicates: int,
+    seed: Optional[int],
+    confidence: float,
+    workers: Optional[int],
+):
     """计算标注员间一致性 (Inter-Annotator Agreement)
 
     RESULT_FILES: 标注结果 JSON 文件列表
@@ -187,7 +310,14 @@ def iaa(result_files: tuple):
     click.echo(f"正在计算 {len(result_files)} 个标注结果的 IAA...")
 
     merger = ResultMerger()
-    metrics = merger.calculate_iaa(list(result_files))
+    metrics = merger.calculate_iaa(
+        list(result_files),
+        alpha_metric=alpha_metric,
+        bootstrap=replicates,
+        seed=seed,
+        confidence=confidence,
+        workers=workers,
+    )
 
     if "error" in metrics:
         click.echo(f"✗ 计算失败: {metrics['error']}", err=True)
@@ -196,12 +326,31 @@ def iaa(result_files: tuple):
     click.echo("\n标注员间一致性 (IAA) 指标:")
     click.echo(f"  标注员数: {metrics['annotator_count']}")
     click.echo(f"  共同任务: {metrics['common_tasks']}")
-    click.echo(f"  完全一致率: {metrics['exact_agreement_rate']:.1%}")
+    intervals = metrics.get("bootstrap", {}).get("intervals", {})
+
+    def ci(name: str, fmt: str = ".3f") -> str:
+        if name not in intervals:
+            return ""
+        lower, upper = intervals[name]["lower"], intervals[name]["upper"]
+        return f"  [{lower:{fmt}}, {upper:{fmt}}]"
+
+    click.echo(
+        f"  完全一致率: {metrics['exact_agreement_rate']:.1%}{ci('exact_agreement_rate', '.1%')}"
+    )
 
     if "fleiss_kappa" in metrics:
-        click.echo(f"  Fleiss' Kappa: {metrics['fleiss_kappa']:.3f}")
+        click.echo(f"  Fleiss' Kappa: {metrics['fleiss_kappa']:.3f}{ci('fleiss_kappa')}")
     if "krippendorff_alpha" in metrics:
-        click.echo(f"  Krippendorff's Alpha: {metrics['krippendorff_alpha']:.3f}")
+        click.echo(
+            f"  Krippendorff's Alpha ({metrics['alpha_metric']}): "
+            f"{metrics['krippendorff_alpha']:.3f}{ci('krippendorff_alpha')}"
+        )
+    if intervals:
+        bs = metrics["bootstrap"]
+        click.echo(
+            f"  ({bs['confidence']:.0%} 置信区间, {bs['replicates']} 次 bootstrap, "
+            f"seed={bs['seed']})"
+        )
 
     click.echo("\n两两一致矩阵 (Agreement / Cohen's Kappa):")
     files = [Path(f).name for f in metrics["files"]]
@@ -223,19 +372,41 @@ def iaa(result_files: tuple):
         row_str = f"{files[i][:8]:>8}  " + "  ".join(parts)
         click.echo(row_str)
 
+    if "cohens_kappa" in intervals:
+        click.echo("\nCohen's Kappa 置信区间:")
+        lower, upper = intervals["cohens_kappa"]["lower"], intervals["cohens_kappa"]["upper"]
+        for i in range(len(files)):
+            for j in range(i + 1, len(files)):
+                click.echo(
+                    f"  {files[i]} / {files[j]}: "
+                    f"{kappa[i][j]:.3f}  [{lower[i][j]:.3f}, {upper[i][j]:.3f}]"
+                )
+
 
 @main.command()
 @click.argument("schema_file", type=click.Path(exists=True))
 @click.option("-t", "--tasks", "tasks_file", type=click.Path(exists=True), help="任务文件路径")
-def validate(schema_file: str, tasks_file: Optional[str]):
+@click.option(
+    "--max-errors",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="JSONL/CSV 任务文件：发现这么多错误后停止检查",
+)
+@click.option(
+    "--workers", type=int, default=1, help="JSONL/CSV 任务文件并行检查进程数 (默认 1，0 = CPU 核数)"
+)
+def validate(schema_file: str, tasks_file: Optional[str], max_errors: int, workers: int):
     """验证 Schema 和任务数据格式
 
     SCHEMA_FILE: 数据 Schema JSON 文件
+
+    .jsonl / .csv 任务文件逐条流式检查（内存占用与文件大小无关），并报告吞吐量；
+    --workers 将文件按字节区间分给多个进程检查，重复 ID 仍在整个文件范围内检查。
     """
     from datalabel.validator import SchemaValidator
 
-    with open(schema_file, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = jsonlib.load(schema_file)
 
     validator = SchemaValidator()
     result = validator.validate_schema(schema)
@@ -251,9 +422,35 @@ def validate(schema_file: str, tasks_file: Optional[str]):
     else:
         click.echo("✓ Schema 验证通过")
 
+    if tasks_file and Path(tasks_file).suffix.lower() in (".jsonl", ".csv"):
+        from datalabel.taskcheck import validate_task_file
+
+        report = validate_task_file(
+            tasks_file, schema, max_errors=max_errors, workers=workers or None
+        )
+        speed = (
+            f"{report.tasks_per_second:,.0f} 条/秒, "
+            f"{report.bytes_per_second / 1e6:.1f} MB/秒"
+        )
+        if report.errors:
+            click.echo(f"✗ 任务数据验证失败 (已检查 {report.total} 条):", err=True)
+            for err in report.errors:
+                click.echo(f"  - {err}", err=True)
+            if report.truncated:
+                click.echo(f"  … 已达到错误上限 ({max_errors})，停止检查", err=True)
+        elif report.warnings:
+            click.echo(f"⚠ 任务数据验证通过 ({report.total} 条, {speed}, 有警告):")
+            for warn in report.warnings:
+                click.echo(f"  - {warn}")
+        else:
+            click.echo(f"✓ 任务数据验证通过 ({report.total} 条, {speed})")
+
+        if report.errors or result.errors:
+            sys.exit(1)
+        return
+
     if tasks_file:
-        with open(tasks_file, "r", encoding="utf-8") as f:
-            tasks_data = json.load(f)
+        tasks_data = jsonlib.load(tasks_file)
 
         if isinstance(tasks_data, list):
             tasks = tasks_data
@@ -285,7 +482,18 @@ def validate(schema_file: str, tasks_file: Optional[str]):
     "-s", "--schema", "schema_file", type=click.Path(exists=True), help="Schema JSON 文件（可选）"
 )
 @click.option("-t", "--title", type=str, help="仪表盘标题")
-def dashboard(result_files: tuple, output: str, schema_file: Optional[str], title: Optional[str]):
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True),
+    help="分片清单 (create --shard-size 生成)：按标注员拼合各分片的结果",
+)
+def dashboard(
+    result_files: tuple,
+    output: str,
+    schema_file: Optional[str],
+    title: Optional[str],
+    manifest: Optional[str],
+):
     """生成标注进度仪表盘
 
     RESULT_FILES: 标注结果 JSON 文件列表
@@ -294,16 +502,21 @@ def dashboard(result_files: tuple, output: str, schema_file: Optional[str], titl
         click.echo("错误: 至少需要 1 个标注结果文件", err=True)
         sys.exit(1)
 
+    results = (
+        _load_results_with_manifest(manifest, result_files, skip_missing_ids=True)
+        if manifest
+        else None
+    )
+
     schema = None
     if schema_file:
-        with open(schema_file, "r", encoding="utf-8") as f:
-            schema = json.load(f)
+        schema = jsonlib.load(schema_file)
 
     click.echo(f"正在生成仪表盘 ({len(result_files)} 个结果文件)...")
 
     gen = DashboardGenerator()
     result = gen.generate(
-        result_files=list(result_files),
+        result_files=list(result_files) if results is None else results,
         output_path=output,
         schema=schema,
         title=title,
@@ -320,6 +533,29 @@ def dashboard(result_files: tuple, output: str, schema_file: Optional[str], titl
         sys.exit(1)
 
 
+def _load_results_with_manifest(
+    manifest_file: str, result_files: tuple, skip_missing_ids: bool = False
+) -> AnnotationTable:
+    """按分片清单拼合结果文件（每个标注员一个来源），并提示尚未收到结果的标注包."""
+    try:
+        manifest = load_manifest(manifest_file)
+        table = assemble_results(manifest, result_files, skip_missing_ids=skip_missing_ids)
+    except (OSError, ValueError, KeyError) as e:
+        click.echo(f"错误: 分片结果拼合失败: {e}", err=True)
+        sys.exit(1)
+
+    n_shards = len(manifest["shards"])
+    click.echo(f"分片清单: {manifest.get('total_tasks', 0)} 个任务, {n_shards} 个分片")
+    missing = missing_bundles(manifest, table)
+    if missing:
+        click.echo(f"  ⚠ {len(missing)} 个标注包尚无结果:")
+        for bundle in missing[:10]:
+            click.echo(f"    - 分片 {bundle['shard']}: {bundle['file']}")
+        if len(missing) > 10:
+            click.echo(f"    ... 另有 {len(missing) - 10} 个")
+    return table
+
+
 @main.command(name="export")
 @click.argument("result_file", type=click.Path(exists=True))
 @click.option("-o", "--output", type=click.Path(), required=True, help="输出文件路径")
@@ -331,20 +567,20 @@ def dashboard(result_files: tuple, output: str, schema_file: Optional[str], titl
     default="json",
     help="输出格式 (默认: json)",
 )
-def export_results(result_file: str, output: str, fmt: str):
+@click.option("--compact", is_flag=True, help="输出不缩进的紧凑 JSON（更小、写入更快）")
+def export_results(result_file: str, output: str, fmt: str, compact: bool):
     """转换标注结果文件格式
 
     RESULT_FILE: 标注结果 JSON 文件
     """
-    with open(result_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = jsonlib.load(result_file)
 
     responses = extract_responses(data)
     if responses is None:
         click.echo("错误: 无法识别的结果文件格式", err=True)
         sys.exit(1)
 
-    count = export_responses(responses, output, fmt)
+    count = export_responses(responses, output, fmt, compact=compact)
     click.echo(f"✓ 导出成功: {output} ({fmt}, {count} 条)")
 
 
@@ -359,19 +595,22 @@ def export_results(result_file: str, output: str, fmt: str):
     default=None,
     help="输入格式 (默认: 自动检测)",
 )
-def import_tasks(input_file: str, output: str, fmt: Optional[str]):
+@click.option("--compact", is_flag=True, help="输出不缩进的紧凑 JSON（更小、写入更快）")
+def import_tasks(input_file: str, output: str, fmt: Optional[str], compact: bool):
     """导入任务数据并转换为 DataLabel JSON 格式
 
     INPUT_FILE: 输入文件路径 (JSON/JSONL/CSV)
-    """
-    tasks = import_tasks_from_file(input_file, fmt)
 
+    逐条读取、逐条写出，内存占用与文件大小无关。
+    """
     output_path = Path(output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    try:
+        count = write_json_array(iter_tasks(input_file, fmt), output_path, compact=compact)
+    except ValueError as e:
+        click.echo(f"错误: {e}", err=True)
+        sys.exit(1)
 
-    click.echo(f"✓ 导入成功: {output_path} ({len(tasks)} 条)")
+    click.echo(f"✓ 导入成功: {output_path} ({count} 条)")
 
 
 # ============================================================
@@ -392,8 +631,7 @@ _MODEL_OPTION = click.option(
 
 def _load_tasks_file(tasks_file: str) -> list[dict]:
     """从文件加载任务列表。"""
-    with open(tasks_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = jsonlib.load(tasks_file)
     if isinstance(data, list):
         return data
     return data.get("samples", data.get("tasks", []))
@@ -421,8 +659,7 @@ def prelabel(
     """
     from datalabel.llm import LLMClient, LLMConfig, PreLabeler
 
-    with open(schema_file, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = jsonlib.load(schema_file)
     tasks = _load_tasks_file(tasks_file)
 
     click.echo(f"正在使用 {provider} 进行自动预标注...")
@@ -468,8 +705,7 @@ def quality(
     """
     from datalabel.llm import LLMClient, LLMConfig, QualityAnalyzer
 
-    with open(schema_file, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = jsonlib.load(schema_file)
 
     click.echo(f"正在使用 {provider} 分析标注质量...")
     click.echo(f"  结果文件数: {len(result_files)}")
@@ -535,8 +771,7 @@ def gen_guidelines(
     """
     from datalabel.llm import GuidelinesGenerator, LLMClient, LLMConfig
 
-    with open(schema_file, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = jsonlib.load(schema_file)
 
     tasks = None
     if tasks_file:
@@ -1,15 +1,16 @@
 """Generate standalone HTML annotation dashboard."""
 
-import json
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from jinja2 import Environment, PackageLoader, select_autoescape
+from typing import Any, Dict, List, Optional, Union
 
+from datalabel import jsonlib
+from datalabel.agreement import AgreementState
 from datalabel.merger import ResultMerger
+from datalabel.table import AnnotationTable, load_table
+from datalabel.templating import get_environment, kappa_color
 
 
 @dataclass
@@ -27,27 +28,41 @@ class DashboardResult:
 class DashboardGenerator:
     """Generate standalone HTML annotation progress dashboard."""
 
+    # Registered on the shared environment as the ``kappa_color`` filter
+    _kappa_color_filter = staticmethod(kappa_color)
+
     def __init__(self):
-        self.env = Environment(
-            loader=PackageLoader("datalabel", "templates"),
-            autoescape=select_autoescape(["html", "xml"]),
-        )
-        self.env.filters["kappa_color"] = self._kappa_color_filter
+        self.env = get_environment()
         self._merger = ResultMerger()
 
     def generate(
         self,
-        result_files: List[str],
+        result_files: Union[List[str], AnnotationTable],
         output_path: str,
         schema: Optional[Dict[str, Any]] = None,
         title: Optional[str] = None,
+        agreement_state: Optional[AgreementState] = None,
     ) -> DashboardResult:
-        """Generate an HTML dashboard from annotation result files."""
+        """Generate an HTML dashboard from annotation result files.
+
+        ``result_files`` may also be an already loaded ``AnnotationTable``,
+        e.g. shard results reassembled by ``manifest.assemble_results``.
+
+        If ``agreement_state`` is given (e.g. kept up to date with
+        ``ResultMerger.update_agreement_state``), IAA metrics are read from it
+        instead of being recomputed from ``result_files``; its annotators must
+        be in the same order as ``result_files``.
+        """
         result = DashboardResult()
 
         try:
-            # Load all results
-            all_results = self._load_results(result_files)
+            # Load all results once; every section reads the same table
+            table = (
+                result_files
+                if isinstance(result_files, AnnotationTable)
+                else load_table(result_files, skip_missing_ids=True)
+            )
+            all_results = self._load_results(table)
             if not all_results:
                 result.success = False
                 result.error = "没有可用的标注结果"
@@ -56,24 +71,24 @@ class DashboardGenerator:
             result.annotator_count = len(all_results)
 
             # Collect all task IDs
-            all_task_ids = set()
-            for r in all_results:
-                all_task_ids.update(r["responses"].keys())
+            all_task_ids = set(table.task_ids)
             result.total_tasks = len(all_task_ids)
 
             # Compute IAA (requires 2+ annotators)
             iaa_metrics = {}
-            if len(all_results) >= 2:
-                iaa_metrics = self._merger.calculate_iaa(result_files)
+            if agreement_state is not None:
+                iaa_metrics = agreement_state.metrics()
+            elif len(all_results) >= 2:
+                iaa_metrics = self._merger.calculate_iaa(table)
 
             # Compute all dashboard data
             overview = self._compute_overview(all_results, all_task_ids, iaa_metrics)
             result.overall_completion = overview["overall_completion"]
 
             per_annotator = self._compute_per_annotator(all_results, all_task_ids)
-            distribution = self._compute_distribution(all_results)
-            conflicts = self._compute_conflicts(all_results, all_task_ids)
-            time_analysis = self._compute_time_analysis(all_results)
+            distribution = self._compute_distribution(all_results, table)
+            conflicts = self._compute_conflicts(all_results, all_task_ids, table)
+            time_analysis = self._compute_time_analysis(all_results, table)
 
             # Heatmap data
             heatmap = self._compute_heatmap(all_results, iaa_metrics)
@@ -104,38 +119,31 @@ class DashboardGenerator:
             output_path.write_text(html_content, encoding="utf-8")
             result.output_path = str(output_path)
 
-        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+        except (OSError, ValueError, KeyError, jsonlib.JSONDecodeError) as e:
             result.success = False
             result.error = str(e)
 
         return result
 
-    def _load_results(self, result_files: List[str]) -> List[Dict[str, Any]]:
-        """Load annotation result files."""
+    def _load_results(self, table: AnnotationTable) -> List[Dict[str, Any]]:
+        """Per-annotator summary of the loaded result files."""
         all_results = []
-        for file_path in result_files:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            metadata = data.get("metadata", {})
+        counts = table.counts_per_source()
+        for src, file_path in enumerate(table.sources):
+            metadata = table.metadata[src]
             annotator = metadata.get("annotator", Path(file_path).stem)
             total_tasks = metadata.get("total_tasks", 0)
             completed_tasks = metadata.get("completed_tasks", 0)
 
-            responses = {}
-            for r in data.get("responses", []):
-                tid = r.get("task_id", "")
-                if tid:
-                    responses[tid] = r
-
             if not completed_tasks:
-                completed_tasks = len(responses)
+                completed_tasks = counts[src]
 
             all_results.append({
                 "file": file_path,
                 "annotator": annotator,
                 "metadata": metadata,
-                "responses": responses,
+                "source": src,
+                "response_count": counts[src],
                 "total_tasks": total_tasks,
                 "completed_tasks": completed_tasks,
             })
@@ -153,7 +161,7 @@ class DashboardGenerator:
 
         # Average completion
         if total > 0:
-            completions = [len(r["responses"]) / total for r in all_results]
+            completions = [r["response_count"] / total for r in all_results]
             overall_completion = sum(completions) / len(completions)
         else:
             overall_completion = 0.0
@@ -176,7 +184,7 @@ class DashboardGenerator:
         total = len(all_task_ids)
         annotators = []
         for r in all_results:
-            completed = len(r["responses"])
+            completed = r["response_count"]
             percentage = (completed / total * 100) if total > 0 else 0
             annotators.append({
                 "name": r["annotator"],
@@ -189,12 +197,14 @@ class DashboardGenerator:
     def _compute_distribution(
         self,
         all_results: List[Dict],
+        table: AnnotationTable,
     ) -> Dict[str, Any]:
         """Compute annotation value distribution."""
         # Detect annotation type from first response
         ann_type = "unknown"
         for r in all_results:
-            for resp in r["responses"].values():
+            for row in table.source_rows(r["source"])[:1]:
+                resp = table.response(row)
                 if "score" in resp:
                     ann_type = "scoring"
                 elif "choice" in resp:
@@ -215,7 +225,8 @@ class DashboardGenerator:
         for r in all_results:
             ann_name = r["annotator"]
             per_annotator[ann_name] = defaultdict(int)
-            for resp in r["responses"].values():
+            for row in table.source_rows(r["source"]):
+                resp = table.view(row)
                 if ann_type == "scoring":
                     val = str(resp.get("score", ""))
                     if val:
@@ -251,6 +262,7 @@ class DashboardGenerator:
         self,
         all_results: List[Dict],
         all_task_ids: set,
+        table: AnnotationTable,
     ) -> List[Dict[str, Any]]:
         """Find tasks where annotators disagree."""
         if len(all_results) < 2:
@@ -259,11 +271,9 @@ class DashboardGenerator:
         conflicts = []
         for tid in sorted(all_task_ids):
             values = {}
-            for r in all_results:
-                if tid in r["responses"]:
-                    resp = r["responses"][tid]
-                    val = self._extract_value(resp)
-                    values[r["annotator"]] = val
+            for row in table.task_rows(tid):
+                val = self._extract_value(table.view(row))
+                values[all_results[table.source_of(row)]["annotator"]] = val
 
             if len(values) >= 2:
                 unique_vals = set(str(v) for v in values.values())
@@ -275,6 +285,7 @@ class DashboardGenerator:
     def _compute_time_analysis(
         self,
         all_results: List[Dict],
+        table: AnnotationTable,
     ) -> Dict[str, Any]:
         """Compute time-based statistics if timestamps available."""
         per_day: Dict[str, int] = defaultdict(int)
@@ -284,8 +295,8 @@ class DashboardGenerator:
         for r in all_results:
             ann_name = r["annotator"]
             per_annotator_daily[ann_name] = defaultdict(int)
-            for resp in r["responses"].values():
-                ts = resp.get("annotated_at", "")
+            for row in table.source_rows(r["source"]):
+                ts = table.get(row, "annotated_at", "")
                 if ts:
                     has_timestamps = True
                     day = ts[:10]  # "2025-01-15"
@@ -400,15 +411,3 @@ class DashboardGenerator:
         if "ranking" in resp:
             return tuple(resp["ranking"])
         return None
-
-    @staticmethod
-    def _kappa_color_filter(value: Any) -> str:
-        """Map kappa value to HSL color for heatmap cells."""
-        try:
-            v = float(value)
-        except (TypeError, ValueError):
-            return "hsl(0, 0%, 70%)"
-        v = max(-1.0, min(1.0, v))
-        # Map [-1, 1] → hue [0, 120] (red → green)
-        hue = int(60 * (v + 1))
-        return f"hsl({hue}, 70%, 42%)"
@@ -1,14 +1,18 @@
 """Generate standalone HTML annotation interfaces."""
 
-import json
-from dataclasses import dataclass
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from jinja2 import Template
 
-from datalabel.validator import SchemaValidator
+from datalabel import jsonlib
+from datalabel.manifest import MANIFEST_NAME, plan_shards
+from datalabel.templating import get_environment
+from datalabel.validator import compile_schema
 
 try:
     import markdown
@@ -26,6 +30,31 @@ class GeneratorResult:
     error: str = ""
     output_path: str = ""
     task_count: int = 0
+    chunk_count: int = 0
+    shard_count: int = 0
+    bundle_paths: List[str] = field(default_factory=list)
+
+
+# (prepared tasks, bundle metadata, output path) for one bundle of generate_sharded
+_BundleJob = Tuple[List[Dict[str, Any]], Dict[str, Any], Path]
+
+# Rendered HTML is yielded by render_stream in pieces of at least this many characters
+STREAM_CHUNK_CHARS = 64 * 1024
+
+# Per worker process: the compiled template and the template data shared by all bundles
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_bundle_worker(base_data: Dict[str, Any], chunk_size: Optional[int]) -> None:
+    _worker_state["template"] = get_environment().get_template("annotator.html")
+    _worker_state["base_data"] = base_data
+    _worker_state["chunk_size"] = chunk_size
+
+
+def _render_bundle_in_worker(job: _BundleJob) -> int:
+    return AnnotatorGenerator._render_bundle(
+        _worker_state["template"], _worker_state["base_data"], job, _worker_state["chunk_size"]
+    )
 
 
 THEMES: Dict[str, Dict[str, str]] = {
@@ -52,14 +81,12 @@ class AnnotatorGenerator:
     """Generate standalone HTML annotation interfaces.
 
     Produces a single HTML file that can be opened directly in a browser,
-    with all data, styles, and logic embedded.
+    with all data, styles, and logic embedded. With ``chunk_size`` the task
+    bodies go to script files next to the HTML instead, loaded on demand.
     """
 
     def __init__(self):
-        self.env = Environment(
-            loader=PackageLoader("datalabel", "templates"),
-            autoescape=select_autoescape(["html", "xml"]),
-        )
+        self.env = get_environment()
 
     def generate(
         self,
@@ -70,15 +97,27 @@ class AnnotatorGenerator:
         title: Optional[str] = None,
         page_size: int = 50,
         theme: str = "default",
+        chunk_size: Optional[int] = None,
+        callback_url: Optional[str] = None,
     ) -> GeneratorResult:
         """Generate an HTML annotation interface.
 
+        The page is rendered straight to the file, piece by piece, without
+        building the whole HTML string first.
+
         Args:
             schema: Data schema defining fields and scoring rubric
             tasks: List of tasks to annotate
             output_path: Output path for the HTML file
             guidelines: Optional markdown guidelines for annotators
             title: Optional title for the interface
+            callback_url: If set, every saved response is also POSTed here
+                as JSON (in addition to localStorage)
+            chunk_size: If set, only task IDs are embedded in the HTML; task
+                bodies are written ``chunk_size`` per file to
+                ``<output stem>_tasks/chunk_NNNNN.js`` and loaded by the page
+                as they are needed (works from ``file://``). Keeps the HTML
+                small for large batches; ship the directory with the HTML.
 
         Returns:
             GeneratorResult with generation status
@@ -87,17 +126,9 @@ class AnnotatorGenerator:
 
         try:
             # Validate inputs
-            validator = SchemaValidator()
-            schema_validation = validator.validate_schema(schema)
-            if not schema_validation.valid:
+            result.error = self._validate(schema, tasks, chunk_size)
+            if result.error:
                 result.success = False
-                result.error = "Schema 验证失败:\n" + "\n".join(schema_validation.errors)
-                return result
-
-            task_validation = validator.validate_tasks(tasks, schema)
-            if not task_validation.valid:
-                result.success = False
-                result.error = "任务数据验证失败:\n" + "\n".join(task_validation.errors)
                 return result
 
             # Prepare template data
@@ -108,26 +139,230 @@ class AnnotatorGenerator:
                 title=title,
                 page_size=page_size,
                 theme=theme,
+                chunked=chunk_size is not None,
+                callback_url=callback_url,
             )
 
-            # Render template
+            # Render template and write output
             template = self.env.get_template("annotator.html")
-            html_content = template.render(**template_data)
-
-            # Write output
             output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(html_content, encoding="utf-8")
+            result.chunk_count = self._write_html(template, template_data, output_path, chunk_size)
 
             result.output_path = str(output_path)
             result.task_count = len(tasks)
 
-        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+        except (OSError, ValueError, KeyError, jsonlib.JSONDecodeError) as e:
             result.success = False
             result.error = str(e)
 
         return result
 
+    def render_to_string(
+        self,
+        schema: Dict[str, Any],
+        tasks: List[Dict[str, Any]],
+        guidelines: Optional[str] = None,
+        title: Optional[str] = None,
+        page_size: int = 50,
+        theme: str = "default",
+        callback_url: Optional[str] = None,
+    ) -> str:
+        """Render the annotation page to a string, without touching the filesystem.
+
+        Arguments are as for ``generate``.
+
+        Raises:
+            ValueError: Invalid schema or tasks
+        """
+        template, template_data = self._page(
+            schema, tasks, guidelines, title, page_size, theme, callback_url
+        )
+        return template.render(**template_data)
+
+    def render_stream(
+        self,
+        schema: Dict[str, Any],
+        tasks: List[Dict[str, Any]],
+        guidelines: Optional[str] = None,
+        title: Optional[str] = None,
+        page_size: int = 50,
+        theme: str = "default",
+        callback_url: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Render the annotation page as an iterator of HTML pieces.
+
+        For streaming responses: the page is never held in memory as one
+        string. Inputs are validated and the template data is prepared
+        before this returns, so errors are raised here rather than halfway
+        through the stream. Arguments are as for ``generate``.
+
+        Raises:
+            ValueError: Invalid schema or tasks
+        """
+        template, template_data = self._page(
+            schema, tasks, guidelines, title, page_size, theme, callback_url
+        )
+        return _join_pieces(template.generate(**template_data), STREAM_CHUNK_CHARS)
+
+    def _page(
+        self,
+        schema: Dict[str, Any],
+        tasks: List[Dict[str, Any]],
+        guidelines: Optional[str],
+        title: Optional[str],
+        page_size: int,
+        theme: str,
+        callback_url: Optional[str],
+    ) -> Tuple[Template, Dict[str, Any]]:
+        """Validated template and template data for an in-memory render."""
+        error = self._validate(schema, tasks, None)
+        if error:
+            raise ValueError(error)
+        template_data = self._prepare_template_data(
+            schema=schema,
+            tasks=tasks,
+            guidelines=guidelines,
+            title=title,
+            page_size=page_size,
+            theme=theme,
+            callback_url=callback_url,
+        )
+        return self.env.get_template("annotator.html"), template_data
+
+    def generate_sharded(
+        self,
+        schema: Dict[str, Any],
+        tasks: List[Dict[str, Any]],
+        output_dir: str,
+        shard_size: int,
+        guidelines: Optional[str] = None,
+        title: Optional[str] = None,
+        page_size: int = 50,
+        theme: str = "default",
+        annotators: Optional[List[str]] = None,
+        annotators_per_shard: int = 1,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = 1,
+        prefix: str = "annotator",
+    ) -> GeneratorResult:
+        """Split tasks into ``shard_size``-task bundles plus a manifest.
+
+        Writes one HTML bundle per shard (one per shard and annotator when
+        ``annotators`` are given, assigned round-robin) and
+        ``output_dir/manifest.json``; see ``datalabel.manifest``. Inputs are
+        validated and the template data shared by all bundles (schema,
+        guidelines, theme) is prepared once; tasks without an ``id`` are
+        numbered across the whole task list, so IDs stay unique.
+
+        Args:
+            output_dir: Directory for the bundles and the manifest
+            shard_size: Tasks per bundle
+            annotators: Annotator names to assign shards to
+            annotators_per_shard: Distinct annotators per shard
+            chunk_size: Passed on to each bundle, as in ``generate``
+            workers: Processes rendering bundles in parallel; ``None`` uses
+                the CPU count. Each compiles the template once.
+            prefix: Bundle file name prefix
+
+        Returns:
+            GeneratorResult whose ``output_path`` is the manifest
+        """
+        result = GeneratorResult()
+
+        try:
+            result.error = self._validate(schema, tasks, chunk_size)
+            if result.error:
+                result.success = False
+                return result
+
+            prepared_tasks = self._prepare_tasks(tasks)
+            manifest = plan_shards(
+                [t["id"] for t in prepared_tasks],
+                shard_size,
+                annotators=annotators,
+                annotators_per_shard=annotators_per_shard,
+                prefix=prefix,
+            )
+            manifest["title"] = title or schema.get("project_name", "")
+            manifest["created_at"] = datetime.now().isoformat()
+
+            base_data = self._prepare_template_data(
+                schema=schema,
+                tasks=[],
+                guidelines=guidelines,
+                title=title,
+                page_size=page_size,
+                theme=theme,
+            )
+            output_dir = Path(output_dir)
+            jobs: List[_BundleJob] = []
+            for shard in manifest["shards"]:
+                shard_tasks = prepared_tasks[shard["start"] : shard["start"] + shard["count"]]
+                for bundle in shard["bundles"]:
+                    bundle_meta = {
+                        "manifest_id": manifest["id"],
+                        "shard": shard["index"],
+                        "annotator": bundle["annotator"],
+                    }
+                    jobs.append((shard_tasks, bundle_meta, output_dir / bundle["file"]))
+
+            chunk_counts = self._render_bundles(base_data, jobs, chunk_size, workers)
+
+            output_dir.mkdir(parents=True, exist_ok=True)
+            manifest_path = output_dir / MANIFEST_NAME
+            jsonlib.dump(manifest, manifest_path)
+
+            result.output_path = str(manifest_path)
+            result.task_count = len(tasks)
+            result.shard_count = len(manifest["shards"])
+            result.chunk_count = sum(chunk_counts)
+            result.bundle_paths = [str(path) for _, _, path in jobs]
+
+        except (OSError, ValueError, KeyError, jsonlib.JSONDecodeError) as e:
+            result.success = False
+            result.error = str(e)
+
+        return result
+
+    def _render_bundles(
+        self,
+        base_data: Dict[str, Any],
+        jobs: List[_BundleJob],
+        chunk_size: Optional[int],
+        workers: Optional[int],
+    ) -> List[int]:
+        """Render bundles, over a process pool if ``workers`` > 1; returns chunk counts."""
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(jobs))
+        if workers <= 1:
+            template = self.env.get_template("annotator.html")
+            return [self._render_bundle(template, base_data, job, chunk_size) for job in jobs]
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_bundle_worker,
+            initargs=(base_data, chunk_size),
+        ) as pool:
+            return list(pool.map(_render_bundle_in_worker, jobs))
+
+    @classmethod
+    def _render_bundle(
+        cls,
+        template: Template,
+        base_data: Dict[str, Any],
+        job: _BundleJob,
+        chunk_size: Optional[int],
+    ) -> int:
+        """Write one bundle of ``generate_sharded``; returns its chunk count."""
+        prepared_tasks, bundle_meta, output_path = job
+        template_data = {
+            **base_data,
+            **cls._task_template_data(prepared_tasks, chunked=chunk_size is not None),
+            "bundle_json": jsonlib.dumps(bundle_meta),
+        }
+        return cls._write_html(template, template_data, output_path, chunk_size)
+
     def generate_from_datarecipe(
         self,
         analysis_dir: str,
@@ -154,9 +389,8 @@ class AnnotatorGenerator:
             return GeneratorResult(success=False, error=f"Schema not found: {schema_path}")
 
         try:
-            with open(schema_path, "r", encoding="utf-8") as f:
-                schema = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
+            schema = jsonlib.load(schema_path)
+        except (jsonlib.JSONDecodeError, OSError) as e:
             return GeneratorResult(success=False, error=f"Schema 读取失败: {e}")
 
         # Load samples/tasks
@@ -167,10 +401,9 @@ class AnnotatorGenerator:
         tasks = []
         if samples_path.exists():
             try:
-                with open(samples_path, "r", encoding="utf-8") as f:
-                    samples_data = json.load(f)
-                    tasks = samples_data.get("samples", [])
-            except (json.JSONDecodeError, OSError) as e:
+                samples_data = jsonlib.load(samples_path)
+                tasks = samples_data.get("samples", [])
+            except (jsonlib.JSONDecodeError, OSError) as e:
                 return GeneratorResult(success=False, error=f"任务数据读取失败: {e}")
 
         # Load guidelines
@@ -197,6 +430,104 @@ class AnnotatorGenerator:
             theme=theme,
         )
 
+    @staticmethod
+    def _validate(
+        schema: Dict[str, Any], tasks: List[Dict[str, Any]], chunk_size: Optional[int]
+    ) -> str:
+        """Check the inputs of ``generate``; returns an error message or ``""``.
+
+        Raises:
+            ValueError: ``chunk_size`` < 1
+        """
+        if not isinstance(schema, dict):
+            return "Schema 验证失败:\nSchema 必须是一个字典/对象"
+        compiled = compile_schema(schema)
+        if not compiled.valid:
+            return "Schema 验证失败:\n" + "\n".join(compiled.errors)
+
+        task_validation = compiled.validate_tasks(tasks)
+        if not task_validation.valid:
+            return "任务数据验证失败:\n" + "\n".join(task_validation.errors)
+
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"chunk_size 必须为正整数: {chunk_size}")
+        return ""
+
+    @classmethod
+    def _write_html(
+        cls,
+        template: Template,
+        template_data: Dict[str, Any],
+        output_path: Path,
+        chunk_size: Optional[int],
+    ) -> int:
+        """Render ``template_data`` to ``output_path``; returns the number of task chunks.
+
+        With ``chunk_size`` the task chunks are written first, to
+        ``<output stem>_tasks/``.
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        chunk_count = 0
+        if chunk_size is not None:
+            chunk_dir = output_path.with_name(f"{output_path.stem}_tasks")
+            chunk_count = cls._write_task_chunks(template_data["tasks"], chunk_dir, chunk_size)
+            template_data = {
+                **template_data,
+                "task_chunks_json": jsonlib.dumps({"dir": chunk_dir.name, "size": chunk_size}),
+            }
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(template.generate(**template_data))
+        return chunk_count
+
+    @staticmethod
+    def _write_task_chunks(
+        prepared_tasks: List[Dict[str, Any]], chunk_dir: Path, chunk_size: int
+    ) -> int:
+        """Write prepared tasks as ``DataLabelChunk(k, [...])`` scripts; returns the file count.
+
+        Chunks left over from an earlier, larger generation are removed.
+        """
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        for stale in chunk_dir.glob("chunk_*.js"):
+            stale.unlink()
+        starts = range(0, len(prepared_tasks), chunk_size)
+        for index, start in enumerate(starts):
+            chunk = prepared_tasks[start : start + chunk_size]
+            with open(chunk_dir / f"chunk_{index:05d}.js", "wb") as f:
+                f.write(f"window.DataLabelChunk({index},".encode())
+                f.write(jsonlib.dumpb(chunk))
+                f.write(b");\n")
+        return len(starts)
+
+    @staticmethod
+    def _prepare_tasks(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalize tasks for the template (use the 'data' field if present)."""
+        return [
+            {
+                "id": task.get("id") or f"TASK_{i + 1:03d}",
+                "data": task.get("data", task),
+                "task_type": task.get("task_type", "default"),
+            }
+            for i, task in enumerate(tasks)
+        ]
+
+    @staticmethod
+    def _task_template_data(
+        prepared_tasks: List[Dict[str, Any]], chunked: bool = False
+    ) -> Dict[str, Any]:
+        """Template variables that depend on the tasks of one HTML file.
+
+        ``chunked`` embeds only the task IDs (``task_ids_json``) instead of
+        every task (``tasks_json``); the caller writes the chunk files.
+        """
+        return {
+            "tasks": prepared_tasks,
+            "tasks_json": "" if chunked else jsonlib.dumps(prepared_tasks),
+            "task_ids_json": jsonlib.dumps([t["id"] for t in prepared_tasks]) if chunked else "",
+            "task_chunks_json": "",
+            "total_tasks": len(prepared_tasks),
+        }
+
     def _prepare_template_data(
         self,
         schema: Dict[str, Any],
@@ -205,8 +536,10 @@ class AnnotatorGenerator:
         title: Optional[str],
         page_size: int = 50,
         theme: str = "default",
+        chunked: bool = False,
+        callback_url: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Prepare data for template rendering."""
+        """Prepare data for template rendering (see ``_task_template_data`` for ``chunked``)."""
 
         # Convert guidelines markdown to HTML
         guidelines_html = ""
@@ -239,18 +572,6 @@ class AnnotatorGenerator:
         if annotation_type == "multi_field":
             multi_field_fields = annotation_config.get("fields", [])
 
-        # Prepare task data (use the 'data' field if present)
-        prepared_tasks = []
-        for i, task in enumerate(tasks):
-            task_data = task.get("data", task)
-            prepared_tasks.append(
-                {
-                    "id": task.get("id", f"TASK_{i + 1:03d}"),
-                    "data": task_data,
-                    "task_type": task.get("task_type", "default"),
-                }
-            )
-
         theme_vars = THEMES.get(theme, {})
 
         return {
@@ -260,16 +581,31 @@ class AnnotatorGenerator:
             "scoring_rubric": scoring_rubric,
             "annotation_type": annotation_type,
             "annotation_config": annotation_config,
-            "annotation_config_json": json.dumps(annotation_config, ensure_ascii=False),
+            "annotation_config_json": jsonlib.dumps(annotation_config),
             "multi_field_fields": multi_field_fields,
-            "multi_field_fields_json": json.dumps(multi_field_fields, ensure_ascii=False),
-            "tasks": prepared_tasks,
-            "tasks_json": json.dumps(prepared_tasks, ensure_ascii=False),
-            "schema_json": json.dumps(schema, ensure_ascii=False),
+            "multi_field_fields_json": jsonlib.dumps(multi_field_fields),
+            **self._task_template_data(self._prepare_tasks(tasks), chunked),
+            "bundle_json": "null",
+            "callback_url": callback_url,
+            "schema_json": jsonlib.dumps(schema),
             "guidelines_html": guidelines_html,
             "generated_at": datetime.now().isoformat(),
-            "total_tasks": len(tasks),
             "page_size": page_size,
             "theme": theme,
             "theme_vars": theme_vars,
         }
+
+
+def _join_pieces(pieces: Iterable[str], min_chars: int) -> Iterator[str]:
+    """Regroup many small strings into pieces of at least ``min_chars`` characters."""
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= min_chars:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
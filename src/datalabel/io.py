@@ -3,12 +3,25 @@
 import csv
 import io
 import json
+import os
+from collections.abc import Iterable, Iterator
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
+
+from datalabel import jsonlib
+
+# 增量解析时每次读取的字符数
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\r\n"
+# JSON 值之后可以出现的结构字符
+_DELIMITERS = ",:]}"
 
 
 def export_responses(
-    responses: list[dict[str, Any]], output_path: str | Path, fmt: str = "json"
+    responses: list[dict[str, Any]],
+    output_path: str | Path,
+    fmt: str = "json",
+    compact: bool = False,
 ) -> int:
     """将标注结果导出为指定格式.
 
@@ -16,6 +29,7 @@ def export_responses(
         responses: 标注结果列表
         output_path: 输出文件路径
         fmt: 输出格式 (json/jsonl/csv)
+        compact: json 格式不缩进输出
 
     Returns:
         导出的记录数
@@ -24,12 +38,11 @@ def export_responses(
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     if fmt == "json":
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(responses, f, ensure_ascii=False, indent=2)
+        jsonlib.dump(responses, output_path, compact=compact)
     elif fmt == "jsonl":
-        with open(output_path, "w", encoding="utf-8") as f:
+        with open(output_path, "wb") as f:
             for r in responses:
-                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                f.write(jsonlib.dumpb(r) + b"\n")
     elif fmt == "csv":
         if not responses:
             output_path.write_text("", encoding="utf-8")
@@ -43,7 +56,7 @@ def export_responses(
                 for k in keys:
                     v = r.get(k)
                     row[k] = (
-                        json.dumps(v, ensure_ascii=False)
+                        jsonlib.dumps(v)
                         if isinstance(v, (list, dict))
                         else v
                     )
@@ -55,6 +68,29 @@ def export_responses(
     return len(responses)
 
 
+def csv_value(value: Any) -> Any:
+    """CSV 单元格的值：以 { 或 [ 开头且是合法 JSON 的解析为对象，其余保持原样."""
+    if value and isinstance(value, str) and value.startswith(("{", "[")):
+        try:
+            return jsonlib.loads(value)
+        except jsonlib.JSONDecodeError:
+            return value
+    return value
+
+
+def _task_format(input_path: Path, fmt: str | None) -> str:
+    if fmt is None:
+        suffix = input_path.suffix.lower()
+        if suffix == ".jsonl":
+            return "jsonl"
+        if suffix == ".csv":
+            return "csv"
+        return "json"
+    if fmt not in ("json", "jsonl", "csv"):
+        raise ValueError(f"不支持的格式: {fmt}")
+    return fmt
+
+
 def import_tasks_from_file(
     input_path: str | Path, fmt: str | None = None
 ) -> list[dict[str, Any]]:
@@ -68,49 +104,86 @@ def import_tasks_from_file(
         任务列表
     """
     input_path = Path(input_path)
-
-    if fmt is None:
-        suffix = input_path.suffix.lower()
-        if suffix == ".jsonl":
-            fmt = "jsonl"
-        elif suffix == ".csv":
-            fmt = "csv"
-        else:
-            fmt = "json"
-
-    tasks: list[dict[str, Any]] = []
+    fmt = _task_format(input_path, fmt)
 
     if fmt == "json":
-        with open(input_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # 反正要整体载入：一次解析整个文件比增量解析快
+        data = jsonlib.load(input_path)
         if isinstance(data, list):
-            tasks = data
-        elif isinstance(data, dict):
-            tasks = data.get("samples", data.get("tasks", []))
-    elif fmt == "jsonl":
-        with open(input_path, "r", encoding="utf-8") as f:
+            return data
+        if isinstance(data, dict):
+            return data.get("samples", data.get("tasks", []))
+        return []
+    return list(iter_tasks(input_path, fmt))
+
+
+def iter_tasks(input_path: str | Path, fmt: str | None = None) -> Iterator[dict[str, Any]]:
+    """逐条读取任务文件，不把整个文件载入内存.
+
+    Args:
+        input_path: 输入文件路径
+        fmt: 输入格式，None 则按扩展名检测。``jsonl`` 每行一条任务；``csv``
+            首行为表头，单元格按 ``csv_value`` 解析；``json`` 为顶层数组，或
+            顶层对象中第一个出现的 ``samples`` / ``tasks`` 数组（增量解析）
+
+    Yields:
+        单条任务
+    """
+    input_path = Path(input_path)
+    fmt = _task_format(input_path, fmt)
+
+    if fmt == "jsonl":
+        with open(input_path, "rb") as f:
             for line in f:
                 line = line.strip()
                 if line:
-                    tasks.append(json.loads(line))
+                    yield jsonlib.loads(line)
     elif fmt == "csv":
-        with open(input_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                task: dict[str, Any] = {}
-                for k, v in row.items():
-                    if v and v.startswith(("{", "[")):
-                        try:
-                            task[k] = json.loads(v)
-                        except json.JSONDecodeError:
-                            task[k] = v
-                    else:
-                        task[k] = v
-                tasks.append(task)
+        with open(input_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {k: csv_value(v) for k, v in row.items()}
     else:
-        raise ValueError(f"不支持的格式: {fmt}")
+        with open(input_path, "r", encoding="utf-8") as f:
+            yield from iter_json_array(f, ("samples", "tasks"))
 
-    return tasks
+
+def write_json_array(
+    items: Iterable[Any], output_path: str | Path, compact: bool = False
+) -> int:
+    """把 items 逐条写成 JSON 数组，输出与 ``jsonlib.dump(list(items))`` 相同.
+
+    先写入同目录下的临时文件，全部写完后再替换 output_path，中途出错不会
+    留下半个文件。
+
+    Args:
+        items: 数组元素（可以是生成器）
+        output_path: 输出文件路径
+        compact: 不缩进输出
+
+    Returns:
+        写入的元素数
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    sep = b"," if compact else b",\n  "
+    count = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for item in items:
+                f.write(sep if count else (b"[" if compact else b"[\n  "))
+                data = jsonlib.dumpb(item, not compact)
+                f.write(data if compact else data.replace(b"\n", b"\n  "))
+                count += 1
+            if not count:
+                f.write(b"[]")
+            else:
+                f.write(b"]" if compact else b"\n]")
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return count
 
 
 def extract_responses(data: Any) -> list[dict[str, Any]] | None:
@@ -127,3 +200,152 @@ def extract_responses(data: Any) -> list[dict[str, Any]] | None:
     if isinstance(data, dict) and "responses" in data:
         return data["responses"]
     return None
+
+
+class _JsonStream:
+    """按块读取文本流，逐个解码 JSON 值，内存占用只与单个值的大小有关.
+
+    依赖 ``JSONDecoder.raw_decode`` 的偏移解码，因此固定使用标准库 json。
+    """
+
+    def __init__(self, f: IO[str], chunk_size: int = _CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = jsonlib.std_decoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int | None = None) -> bool:
+        """读取下一块数据，返回是否读到了新内容."""
+        if self._eof:
+            return False
+        chunk = self._f.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（到达末尾返回空串）."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def take(self) -> str:
+        """消费并返回下一个非空白字符."""
+        ch = self.peek()
+        self._pos += 1
+        return ch
+
+    def expect(self, ch: str) -> None:
+        """消费一个指定的结构字符."""
+        got = self.take()
+        if got != ch:
+            raise ValueError(f"JSON 格式错误: 期望 '{ch}'，实际为 '{got or 'EOF'}'")
+
+    def value(self) -> Any:
+        """解码下一个完整的 JSON 值."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # 值被块边界截断：按已缓冲长度加倍读取后重试
+                if self._fill(max(self._chunk_size, len(self._buf) - self._pos)):
+                    continue
+                raise
+            # 数字可能在块边界处被截断（"12" | ".5"、"3" | "e5"）：值之后的下一个
+            # 非空白字符是分隔符（或已到文件末尾）才算解析完整
+            buf = self._buf
+            nxt = end
+            while nxt < len(buf) and buf[nxt] in _WHITESPACE:
+                nxt += 1
+            if (nxt == len(buf) or buf[nxt] not in _DELIMITERS) and self._fill(
+                max(self._chunk_size, len(buf) - self._pos)
+            ):
+                continue
+            self._pos = end
+            return obj
+
+    def items(self) -> Iterator[Any]:
+        """逐个产出当前位置 JSON 数组的元素."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.take()
+            return
+        while True:
+            yield self.value()
+            ch = self.take()
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"JSON 格式错误: 数组元素之间期望 ','，实际为 '{ch or 'EOF'}'")
+
+
+def iter_json_array(f: IO[str], keys: tuple[str, ...] = ()) -> Iterator[Any]:
+    """增量解析 JSON 数组，逐个产出元素.
+
+    支持顶层数组，或顶层对象中第一个出现的、键名属于 keys 的数组字段
+    （如 ``{"metadata": {...}, "responses": [...]}``）。其余字段会被跳过。
+
+    Args:
+        f: 以文本模式打开的文件对象
+        keys: 顶层为对象时要读取的数组字段名
+
+    Yields:
+        数组中的每个元素
+    """
+    stream = _JsonStream(f)
+    if stream.peek() == "[":
+        yield from stream.items()
+        return
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key in keys and stream.peek() == "[":
+            yield from stream.items()
+            return
+        stream.value()
+        ch = stream.take()
+        if ch == "}":
+            return
+        if ch != ",":
+            raise ValueError(f"JSON 格式错误: 字段之间期望 ','，实际为 '{ch or 'EOF'}'")
+
+
+def iter_responses(input_path: str | Path) -> Iterator[dict[str, Any]]:
+    """逐条读取标注结果文件中的 responses，不把整个文件载入内存.
+
+    Args:
+        input_path: 结果文件路径。``.jsonl`` 每行一条 response；
+            其余按 JSON 处理（``{"responses": [...]}`` 或顶层数组）
+
+    Yields:
+        单条 response
+    """
+    input_path = Path(input_path)
+    if input_path.suffix.lower() == ".jsonl":
+        with open(input_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield jsonlib.loads(line)
+        return
+    with open(input_path, "r", encoding="utf-8") as f:
+        yield from iter_json_array(f, ("responses",))
@@ -0,0 +1,174 @@
+"""可插拔的 JSON 编解码后端.
+
+优先使用 orjson，其次 msgspec，都未安装时回退到标准库 ``json``；
+可用环境变量 ``DATALABEL_JSON_BACKEND``（``orjson`` / ``msgspec`` / ``json``）
+或 ``set_backend()`` 指定。各后端均输出 UTF-8（等同 ``ensure_ascii=False``），
+缩进输出与 ``json.dumps(indent=2)`` 版式一致，紧凑输出不带空格
+（``separators=(",", ":")``）；解析错误统一为 ``json.JSONDecodeError``
+（``ValueError`` 的子类）。
+
+NaN / Infinity 不是合法 JSON：各后端都写成 ``null``；读取时（例如旧版
+标准库后端写出的文件中的）``NaN`` / ``Infinity`` 也一律读作 ``None``。
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+from typing import IO, Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+JSONDecodeError = json.JSONDecodeError
+
+# 当前后端名，由 set_backend() 设置
+backend = "json"
+
+_dumpb: Callable[[Any, bool], bytes]
+_loads: Callable[[Union[str, bytes]], Any]
+
+
+def _finite(obj: Any) -> Any:
+    """obj 的副本，其中的 NaN / Infinity 换成 None（与 orjson、msgspec 的输出一致）"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _std_dumps(obj: Any, indent: bool) -> str:
+    options = {"indent": 2} if indent else {"separators": (",", ":")}
+    try:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, **options)
+    except ValueError as e:
+        if not str(e).startswith("Out of range float"):
+            raise
+    return json.dumps(_finite(obj), ensure_ascii=False, allow_nan=False, **options)
+
+
+def _std_dumpb(obj: Any, indent: bool) -> bytes:
+    return _std_dumps(obj, indent).encode("utf-8")
+
+
+def _orjson_dumpb(obj: Any, indent: bool) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, option=option)
+    except TypeError:
+        # 超出 64 位的整数、自定义类型等交给标准库处理（或报错）
+        return _std_dumpb(obj, indent)
+
+
+def _msgspec_dumpb(obj: Any, indent: bool) -> bytes:
+    try:
+        data = msgspec.json.encode(obj)
+    except (TypeError, msgspec.EncodeError):
+        return _std_dumpb(obj, indent)
+    return msgspec.json.format(data, indent=2) if indent else data
+
+
+def _null_constant(token: str) -> None:
+    return None
+
+
+def std_decoder() -> json.JSONDecoder:
+    """标准库解码器，NaN / Infinity 读作 None（与 ``loads`` 一致）."""
+    return json.JSONDecoder(parse_constant=_null_constant)
+
+
+def _std_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data, parse_constant=_null_constant)
+
+
+def _orjson_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson 不接受 NaN / Infinity：交给标准库，读作 None（真正的格式错误照样报错）
+        return _std_loads(data)
+
+
+def _msgspec_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError:
+        # 同 orjson；标准库同时把解析错误统一为 JSONDecodeError
+        return _std_loads(data)
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """切换 JSON 后端并返回其名称.
+
+    Args:
+        name: ``orjson`` / ``msgspec`` / ``json``；None 则选用已安装的最快后端
+
+    Raises:
+        ValueError: 后端名未知或未安装
+    """
+    global backend, _dumpb, _loads
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    if name is None:
+        name = next(b for b in BACKENDS if available[b])
+    if name not in available:
+        raise ValueError(f"未知的 JSON 后端: {name}（可选: {', '.join(BACKENDS)}）")
+    if not available[name]:
+        raise ValueError(f"JSON 后端 {name} 未安装")
+
+    if name == "orjson":
+        _dumpb, _loads = _orjson_dumpb, _orjson_loads
+    elif name == "msgspec":
+        _dumpb, _loads = _msgspec_dumpb, _msgspec_loads
+    else:
+        _dumpb, _loads = _std_dumpb, _std_loads
+    backend = name
+    return name
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 字节串；indent=True 时按 2 空格缩进."""
+    return _dumpb(obj, indent)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """序列化为字符串；indent=True 时按 2 空格缩进."""
+    if _dumpb is _std_dumpb:
+        return _std_dumps(obj, indent)
+    return _dumpb(obj, indent).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """解析 JSON 文本（str 或 UTF-8 bytes）."""
+    return _loads(data)
+
+
+def load(source: Union[str, Path, IO[Any]]) -> Any:
+    """从文件路径或已打开的文件对象读取并解析 JSON."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            return _loads(f.read())
+    return _loads(source.read())
+
+
+def dump(obj: Any, path: Union[str, Path], compact: bool = False) -> None:
+    """把 obj 写入 path；默认 2 空格缩进，compact=True 时不缩进（体积更小、写入更快）."""
+    data = _dumpb(obj, not compact)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+set_backend(os.environ.get("DATALABEL_JSON_BACKEND") or None)
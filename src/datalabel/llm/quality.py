@@ -13,6 +13,9 @@ from datalabel.llm.prompts import (
     QUALITY_SYSTEM,
     QUALITY_USER,
 )
+from datalabel.table import AnnotationTable, load_table
+
+_DISAGREEMENT_KEYS = ("score", "choice", "choices", "text", "ranking", "comment")
 
 
 @dataclass
@@ -65,45 +68,66 @@ def _build_annotation_spec(schema: dict, annotation_type: str) -> str:
     return "\n".join(lines) if lines else "（无额外规范）"
 
 
+def _task_id(i: int, response: dict) -> str:
+    return response.get("task_id", "")
+
+
+def _load_table(result_files: list[str]) -> AnnotationTable:
+    """加载多个标注结果文件为列式表（经进程级缓存，不可修改）。
+
+    与合并、IAA 一致：同一标注员对同一任务的多条响应只保留最后一条；
+    缺少 task_id 的响应归入任务 ""，同样只保留最后一条。
+    """
+    return load_table(result_files, key=_task_id)
+
+
+def _annotators(table: AnnotationTable) -> list[str]:
+    """各来源的标注员 ID，取自 metadata，缺省为来源名（文件路径）。"""
+    return [meta.get("annotator", name) for name, meta in zip(table.sources, table.metadata)]
+
+
+def _as_table(results: AnnotationTable | list[dict]) -> AnnotationTable:
+    if isinstance(results, AnnotationTable):
+        return results
+    table = AnnotationTable()
+    for result in results:
+        table.add_source(result["annotator"], result["responses"], key=_task_id)
+    return table
+
+
 def _load_results(result_files: list[str]) -> list[dict]:
     """加载多个标注结果文件。"""
-    all_results = []
-    for path in result_files:
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
-        responses = data.get("responses", [])
-        # 尝试从 metadata 获取标注员 ID
-        annotator = data.get("metadata", {}).get("annotator", path)
-        for r in responses:
-            r["_annotator"] = annotator
-        all_results.append({"annotator": annotator, "responses": responses})
-    return all_results
-
-
-def _find_disagreements(results_list: list[dict]) -> list[dict]:
-    """找出标注员之间有分歧的任务。"""
-    # 按 task_id 分组
-    task_annotations: dict[str, list[dict]] = {}
-    for result in results_list:
-        annotator = result["annotator"]
-        for resp in result["responses"]:
-            tid = resp.get("task_id", "")
-            if tid not in task_annotations:
-                task_annotations[tid] = []
-            entry = {"annotator": annotator}
-            for key in ("score", "choice", "choices", "text", "ranking", "comment"):
-                if key in resp:
-                    entry[key] = resp[key]
-            task_annotations[tid].append(entry)
-
+    table = _load_table(result_files)
+    return [
+        {
+            "annotator": annotator,
+            "responses": [
+                {**r, "_annotator": annotator} for r in table.responses(src)
+            ],
+        }
+        for src, annotator in enumerate(_annotators(table))
+    ]
+
+
+def _find_disagreements(results: AnnotationTable | list[dict]) -> list[dict]:
+    """找出标注员之间有分歧的任务（每位标注员取其对该任务的最后一条响应）。"""
+    table = _as_table(results)
+    annotators = _annotators(table)
     disagreements = []
-    for tid, ann_list in task_annotations.items():
-        if len(ann_list) < 2:
+    for tid in table.task_ids:
+        rows = table.task_rows(tid)
+        if len(rows) < 2:
             continue
-        # 比较标注值
+        ann_list = []
         values = set()
-        for ann in ann_list:
-            val = ann.get("score", ann.get("choice", ann.get("text", "")))
+        for row in rows:
+            entry = {"annotator": annotators[table.source_of(row)]}
+            for key in _DISAGREEMENT_KEYS:
+                if table.has(row, key):
+                    entry[key] = table.get(row, key)
+            ann_list.append(entry)
+            # 比较标注值
+            val = entry.get("score", entry.get("choice", entry.get("text", "")))
             if isinstance(val, list):
                 val = tuple(sorted(val))
             values.add(val)
@@ -113,14 +137,15 @@ def _find_disagreements(results_list: list[dict]) -> list[dict]:
     return disagreements
 
 
-def _sample_results(results_list: list[dict], sample_size: int) -> list[dict]:
-    """对标注结果进行抽样。"""
+def _sample_results(table: AnnotationTable, sample_size: int) -> list[dict]:
+    """对标注结果进行抽样，只还原被抽中的响应。"""
     sampled = []
-    for result in results_list:
-        responses = result["responses"]
-        if len(responses) > sample_size:
-            responses = random.sample(responses, sample_size)
-        sampled.append({"annotator": result["annotator"], "responses": responses})
+    for src, annotator in enumerate(_annotators(table)):
+        rows = table.source_rows(src)
+        if len(rows) > sample_size:
+            rows = random.sample(rows, sample_size)
+        responses = [{**table.response(r), "_annotator": annotator} for r in rows]
+        sampled.append({"annotator": annotator, "responses": responses})
     return sampled
 
 
@@ -154,13 +179,13 @@ class QualityAnalyzer:
         project_name = schema.get("project_name", "未命名项目")
         annotation_spec = _build_annotation_spec(schema, annotation_type)
 
-        results_list = _load_results(result_files)
+        table = _load_table(result_files)
         total_usage = LLMUsage()
         all_issues: list[QualityIssue] = []
         disagreement_analysis = None
 
         # 1) 单标注员质量检查
-        sampled = _sample_results(results_list, sample_size)
+        sampled = _sample_results(table, sample_size)
         results_json = json.dumps(sampled, ensure_ascii=False, indent=2)
 
         user_content = QUALITY_USER.format(
@@ -196,8 +221,8 @@ class QualityAnalyzer:
             summary = ""
 
         # 2) 多标注员分歧分析
-        if len(results_list) >= 2:
-            disagreements = _find_disagreements(results_list)
+        if table.n_sources >= 2:
+            disagreements = _find_disagreements(table)
             if disagreements:
                 disagreements_json = json.dumps(disagreements, ensure_ascii=False, indent=2)
                 user_content_d = DISAGREEMENT_USER.format(
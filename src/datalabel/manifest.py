@@ -0,0 +1,219 @@
+"""Shard manifests for task sets split across several annotator bundles.
+
+``AnnotatorGenerator.generate_sharded`` cuts a task list into shards of
+``shard_size`` tasks and renders one HTML bundle per shard, or one per
+(shard, annotator) when annotators are assigned. ``manifest.json`` next to
+the bundles records, per shard, the task range and who annotates it::
+
+    {
+      "version": 1,
+      "id": "3f2a…",
+      "total_tasks": 1200,
+      "shard_size": 500,
+      "annotators": ["alice", "bob"],
+      "shards": [
+        {"index": 0, "start": 0, "count": 500,
+         "first_task": "T0001", "last_task": "T0500",
+         "bundles": [{"annotator": "alice", "file": "annotator_0000_alice.html"}]},
+        …
+      ]
+    }
+
+Each bundle stamps ``manifest_id``, ``shard`` and ``annotator`` into the
+``metadata`` of its JSON export, which ``assemble_results`` uses to put the
+per-shard result files back together as one source per annotator.
+"""
+
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from datalabel import jsonlib
+from datalabel.io import iter_responses
+from datalabel.table import AnnotationTable
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def _file_safe(annotator: str) -> str:
+    """``annotator`` with characters unsafe in file names replaced by ``_``."""
+    return re.sub(r"[^\w.-]+", "_", annotator)
+
+
+def bundle_filename(prefix: str, shard: int, annotator: Optional[str]) -> str:
+    """HTML file name of one bundle, e.g. ``annotator_0003_alice.html``."""
+    name = f"{prefix}_{shard:04d}"
+    if annotator:
+        name += "_" + _file_safe(annotator)
+    return name + ".html"
+
+
+def plan_shards(
+    task_ids: List[Any],
+    shard_size: int,
+    annotators: Optional[List[str]] = None,
+    annotators_per_shard: int = 1,
+    prefix: str = "annotator",
+) -> Dict[str, Any]:
+    """Build the manifest for ``task_ids`` cut into ``shard_size``-task shards.
+
+    Annotators are assigned round-robin, ``annotators_per_shard`` distinct
+    ones per shard; without annotators each shard has one unassigned bundle.
+
+    Raises:
+        ValueError: ``shard_size`` < 1, duplicate annotators, two annotators
+            whose names map to the same bundle file name, or more
+            annotators per shard than there are annotators
+    """
+    if shard_size < 1:
+        raise ValueError(f"shard_size 必须为正整数: {shard_size}")
+    annotators = list(annotators or [])
+    if len(set(annotators)) != len(annotators):
+        raise ValueError("标注员名称重复")
+    safe_names: Dict[str, str] = {}
+    for annotator in annotators:
+        other = safe_names.setdefault(_file_safe(annotator), annotator)
+        if other != annotator:
+            raise ValueError(f"标注员 {other!r} 与 {annotator!r} 的分片文件名相同")
+    if annotators and not 1 <= annotators_per_shard <= len(annotators):
+        raise ValueError(
+            f"annotators_per_shard 必须在 1 到 {len(annotators)} 之间: {annotators_per_shard}"
+        )
+
+    shards = []
+    for index, start in enumerate(range(0, len(task_ids), shard_size)):
+        count = min(shard_size, len(task_ids) - start)
+        if annotators:
+            first = index * annotators_per_shard
+            assigned: List[Optional[str]] = [
+                annotators[(first + j) % len(annotators)] for j in range(annotators_per_shard)
+            ]
+        else:
+            assigned = [None]
+        shards.append({
+            "index": index,
+            "start": start,
+            "count": count,
+            "first_task": task_ids[start],
+            "last_task": task_ids[start + count - 1],
+            "bundles": [
+                {"annotator": a, "file": bundle_filename(prefix, index, a)} for a in assigned
+            ],
+        })
+
+    return {
+        "version": MANIFEST_VERSION,
+        "id": uuid.uuid4().hex,
+        "total_tasks": len(task_ids),
+        "shard_size": shard_size,
+        "annotators": annotators,
+        "shards": shards,
+    }
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Read and check a manifest written by ``generate_sharded``.
+
+    Raises:
+        ValueError: Not a manifest, or an unsupported version
+    """
+    manifest = jsonlib.load(path)
+    if not isinstance(manifest, dict) or "shards" not in manifest:
+        raise ValueError(f"不是有效的分片清单: {path}")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"不支持的分片清单版本: {manifest.get('version')}")
+    return manifest
+
+
+def _read_result_file(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """(metadata, responses) of one result file; JSONL files have no metadata."""
+    if Path(path).suffix == ".jsonl":
+        return {}, list(iter_responses(path))
+    data = jsonlib.load(path)
+    if isinstance(data, dict):
+        return data.get("metadata", {}), data.get("responses", [])
+    return {}, data
+
+
+def assemble_results(
+    manifest: Dict[str, Any],
+    result_files: Iterable[str],
+    skip_missing_ids: bool = False,
+) -> AnnotationTable:
+    """Load per-bundle result files as one table source per annotator.
+
+    Files exported from a bundle of this manifest are grouped by the
+    annotator stamped in their metadata (or, for unassigned bundles, the
+    ``annotator`` the export carries, else the file itself); each source's
+    metadata lists the ``shards`` it covers and its assigned ``total_tasks``.
+    Files without bundle metadata (JSONL/CSV exports, older results) are
+    loaded as sources of their own.
+
+    Raises:
+        ValueError: A result file comes from a different manifest or
+            names a shard the manifest does not have
+        KeyError: A response has no ``task_id`` and ``skip_missing_ids`` is off
+    """
+    shards = {s["index"]: s for s in manifest["shards"]}
+    assigned: Dict[str, int] = {}
+    for shard in manifest["shards"]:
+        for bundle in shard["bundles"]:
+            name = bundle["annotator"]
+            if name:
+                assigned[name] = assigned.get(name, 0) + shard["count"]
+
+    # name -> [metadata, responses]; dicts keep first-seen order
+    groups: Dict[str, List[Any]] = {}
+    for path in result_files:
+        metadata, responses = _read_result_file(path)
+        if not isinstance(metadata, dict) or "manifest_id" not in metadata:
+            groups[path] = [metadata, responses]
+            continue
+        if metadata["manifest_id"] != manifest["id"]:
+            raise ValueError(f"结果文件不属于此分片清单: {path}")
+        shard = metadata.get("shard")
+        if shard not in shards:
+            raise ValueError(f"结果文件的分片编号不在清单中: {path} (shard={shard})")
+
+        name = metadata.get("annotator") or path
+        group = groups.get(name)
+        if group is None:
+            group_metadata = {
+                "annotator": metadata.get("annotator") or Path(path).stem,
+                "manifest_id": manifest["id"],
+                "shards": [],
+                "total_tasks": assigned.get(name, 0),
+            }
+            group = groups[name] = [group_metadata, []]
+        if shard not in group[0]["shards"]:
+            group[0]["shards"].append(shard)
+            if name not in assigned:
+                group[0]["total_tasks"] += shards[shard]["count"]
+        group[1].extend(responses)
+
+    table = AnnotationTable()
+    for name, (metadata, responses) in groups.items():
+        if skip_missing_ids:
+            responses = [r for r in responses if r.get("task_id")]
+        table.add_source(name, responses, metadata)
+    return table
+
+
+def missing_bundles(manifest: Dict[str, Any], table: AnnotationTable) -> List[Dict[str, Any]]:
+    """Bundles of ``manifest`` with no results in a table from ``assemble_results``.
+
+    Each entry is the bundle dict plus its ``shard`` index.
+    """
+    received = set()  # (shard, annotator), plus (shard, None) for any result of the shard
+    for metadata in table.metadata:
+        for shard in metadata.get("shards", ()):
+            received.add((shard, metadata.get("annotator")))
+            received.add((shard, None))
+    return [
+        {"shard": shard["index"], **bundle}
+        for shard in manifest["shards"]
+        for bundle in shard["bundles"]
+        if (shard["index"], bundle["annotator"]) not in received
+    ]
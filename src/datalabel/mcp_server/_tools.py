@@ -5,6 +5,7 @@ from typing import Any
 
 from mcp.types import TextContent, Tool
 
+from datalabel import jsonlib
 from datalabel.dashboard import DashboardGenerator
 from datalabel.generator import AnnotatorGenerator
 from datalabel.io import export_responses, extract_responses, import_tasks_from_file
@@ -105,6 +106,26 @@ TOOLS = [
                     "items": {"type": "string"},
                     "description": "标注结果 JSON 文件路径列表",
                 },
+                "alpha_metric": {
+                    "type": "string",
+                    "enum": ["nominal", "ordinal", "interval", "ratio"],
+                    "description": "Krippendorff's Alpha 距离度量（默认 nominal）",
+                    "default": "nominal",
+                },
+                "bootstrap": {
+                    "type": "integer",
+                    "description": "Bootstrap 重采样次数，>0 时返回置信区间（默认 0）",
+                    "default": 0,
+                },
+                "seed": {
+                    "type": "integer",
+                    "description": "Bootstrap 随机种子（可选）",
+                },
+                "confidence": {
+                    "type": "number",
+                    "description": "置信水平（默认 0.95）",
+                    "default": 0.95,
+                },
             },
             "required": ["result_files"],
         },
@@ -398,7 +419,7 @@ def handle_merge_annotations(arguments: dict[str, Any]) -> list[TextContent]:
                     f"- 任务总数: {result.total_tasks}\n"
                     f"- 标注员数: {result.annotator_count}\n"
                     f"- 一致率: {result.agreement_rate:.1%}\n"
-                    f"- 冲突数: {len(result.conflicts)}"
+                    f"- 冲突数: {result.conflict_count}"
                 ),
             )
         ]
@@ -407,7 +428,13 @@ def handle_merge_annotations(arguments: dict[str, Any]) -> list[TextContent]:
 
 def handle_calculate_iaa(arguments: dict[str, Any]) -> list[TextContent]:
     """处理 calculate_iaa 工具调用."""
-    metrics = _merger.calculate_iaa(arguments["result_files"])
+    metrics = _merger.calculate_iaa(
+        arguments["result_files"],
+        alpha_metric=arguments.get("alpha_metric", "nominal"),
+        bootstrap=arguments.get("bootstrap", 0),
+        seed=arguments.get("seed"),
+        confidence=arguments.get("confidence", 0.95),
+    )
     if "error" in metrics:
         return [TextContent(type="text", text=f"计算失败: {metrics['error']}")]
     return [
@@ -461,8 +488,7 @@ def handle_export_results(arguments: dict[str, Any]) -> list[TextContent]:
     output_path = arguments["output_path"]
     fmt = arguments.get("format", "json")
 
-    with open(result_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = jsonlib.load(result_file)
 
     responses = extract_responses(data)
     if responses is None:
@@ -489,8 +515,7 @@ def handle_import_tasks(arguments: dict[str, Any]) -> list[TextContent]:
 
     out = Path(output_path)
     out.parent.mkdir(parents=True, exist_ok=True)
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    jsonlib.dump(tasks, out)
 
     return [
         TextContent(
@@ -615,39 +640,33 @@ def handle_llm_gen_guidelines(arguments: dict[str, Any]) -> list[TextContent]:
     return [TextContent(type="text", text=f"指南生成失败: {result.error}")]
 
 
+def _task_id_or_index(i: int, response: dict[str, Any]) -> Any:
+    return response.get("task_id", i)
+
+
 def handle_adjudicate(arguments: dict[str, Any]) -> list[TextContent]:
     """处理 adjudicate 工具调用 — 裁决标注冲突."""
     from collections import Counter
     from pathlib import Path
 
+    from datalabel.table import load_table
+
     result_files = arguments["result_files"]
     output_path = arguments["output_path"]
     strategy = arguments.get("strategy", "majority")
     conflict_only = arguments.get("conflict_only", False)
 
-    # Load all annotation files
-    all_results: list[dict] = []
-    for fp in result_files:
-        with open(fp, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        responses = data.get("responses", data) if isinstance(data, dict) else data
-        if isinstance(responses, list):
-            all_results.append({r.get("task_id", i): r for i, r in enumerate(responses)})
-        elif isinstance(responses, dict):
-            all_results.append(responses)
-
-    if len(all_results) < 2:
-        return [TextContent(type="text", text="错误: 至少需要 2 个标注结果文件")]
+    # Load all annotation files into one columnar table (cached across calls)
+    table = load_table(result_files, key=_task_id_or_index, bare_mapping=True)
 
-    # Gather all task IDs
-    all_task_ids = set()
-    for ar in all_results:
-        all_task_ids.update(ar.keys())
+    if table.n_sources < 2:
+        return [TextContent(type="text", text="错误: 至少需要 2 个标注结果文件")]
 
     adjudicated = []
     conflict_count = 0
-    for tid in sorted(all_task_ids):
-        annotations = [ar[tid] for ar in all_results if tid in ar]
+    for tid in sorted(table.task_ids):
+        # Only the responses of the current task are rebuilt as dicts
+        annotations = [table.response(r) for r in table.task_rows(tid)]
         if len(annotations) < 2:
             if not conflict_only:
                 adjudicated.append(annotations[0])
@@ -687,8 +706,7 @@ def handle_adjudicate(arguments: dict[str, Any]) -> list[TextContent]:
     # Save
     out = Path(output_path)
     out.parent.mkdir(parents=True, exist_ok=True)
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(adjudicated, f, ensure_ascii=False, indent=2)
+    jsonlib.dump(adjudicated, out)
 
     return [
         TextContent(
@@ -696,7 +714,7 @@ def handle_adjudicate(arguments: dict[str, Any]) -> list[TextContent]:
             text=(
                 f"裁决完成:\n"
                 f"- 输出: {output_path}\n"
-                f"- 总任务: {len(all_task_ids)}\n"
+                f"- 总任务: {table.n_tasks}\n"
                 f"- 冲突数: {conflict_count}\n"
                 f"- 裁决策略: {strategy}\n"
                 f"- 输出条数: {len(adjudicated)}"
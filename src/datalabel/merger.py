@@ -1,11 +1,32 @@
 """Merge annotation results from multiple annotators."""
 
-import json
+import heapq
+import os
+import shutil
+import tempfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List
-from collections import defaultdict
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from datalabel import agreement, jsonlib
+from datalabel.io import iter_responses
+from datalabel.table import AnnotationTable, load_table
+
+# Responses sorted in memory per spill run in streaming merge
+DEFAULT_BUFFER_SIZE = 100_000
+# Max run files open at once during the k-way merge
+_MAX_MERGE_FANIN = 256
+# Tasks per work unit sent to a merge worker process
+_PARALLEL_CHUNK_TASKS = 500
+
+# (task_id, responses, source files) for one task
+_TaskGroup = Tuple[Any, List[Dict[str, Any]], List[str]]
 
 
 @dataclass
@@ -19,6 +40,58 @@ class MergeResult:
     annotator_count: int = 0
     agreement_rate: float = 0.0
     conflicts: List[Dict[str, Any]] = field(default_factory=list)
+    conflict_count: int = 0
+
+
+def _run_sort_key(record: list) -> Tuple[Any, int]:
+    """Sort spilled records by task_id, then by source file order."""
+    return record[0], record[1]
+
+
+def _dumps_nested(obj: Any, level: int, compact: bool = False) -> str:
+    """Serialize like ``json.dump(indent=2)`` would at the given nesting level."""
+    if compact:
+        return jsonlib.dumps(obj)
+    return jsonlib.dumps(obj, indent=True).replace("\n", "\n" + "  " * level)
+
+
+class _ArraySpool:
+    """Append-only JSON array spilled to a temp file, copied into the output at the end."""
+
+    def __init__(self, path: Path, compact: bool = False):
+        self._f: IO[str] = open(path, "w+", encoding="utf-8")
+        self._compact = compact
+        self.count = 0
+
+    def __enter__(self) -> "_ArraySpool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._f.close()
+
+    def append(self, item: Any) -> None:
+        if self._compact:
+            self._f.write("," if self.count else "")
+        else:
+            self._f.write(",\n    " if self.count else "\n    ")
+        self._f.write(_dumps_nested(item, 2, self._compact))
+        self.count += 1
+
+    def copy_to(self, out: IO[str]) -> None:
+        if not self.count:
+            out.write("[]")
+            return
+        out.write("[")
+        self._f.seek(0)
+        shutil.copyfileobj(self._f, out)
+        out.write("]" if self._compact else "\n  ]")
+
+
+def _merge_task_chunk(
+    merger: "ResultMerger", strategy: str, chunk: List[_TaskGroup]
+) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """Process-pool entry point: merge a chunk of tasks in order."""
+    return [merger._merge_task(*group, strategy) for group in chunk]
 
 
 class ResultMerger:
@@ -32,44 +105,50 @@ class ResultMerger:
 
     def merge(
         self,
-        result_files: List[str],
+        result_files: Union[List[str], AnnotationTable],
         output_path: str,
         strategy: str = "majority",
+        streaming: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        workers: Optional[int] = 1,
+        compact: bool = False,
     ) -> MergeResult:
         """Merge multiple annotation result files.
 
         Args:
-            result_files: List of paths to annotation result JSON files
+            result_files: List of paths to annotation result JSON files,
+                or an already loaded ``AnnotationTable`` (not with ``streaming``)
             output_path: Output path for merged results
             strategy: Merge strategy ('majority', 'average', 'strict')
+            streaming: Read inputs incrementally and sort by task_id on disk,
+                so memory is bounded by ``buffer_size`` instead of dataset size.
+                Also accepts ``.jsonl`` result files (one response per line).
+                Conflicts are written to the output file only;
+                ``MergeResult.conflicts`` stays empty.
+            buffer_size: Number of responses sorted in memory per spill run
+                (streaming mode only)
+            workers: Processes merging tasks in parallel; ``None`` uses
+                ``os.cpu_count()``. Output is identical to the serial merge.
+            compact: Write the output JSON without indentation
 
         Returns:
             MergeResult with merge status and statistics
         """
+        if streaming:
+            return self._merge_streaming(
+                result_files, output_path, strategy, buffer_size, workers, compact
+            )
+
         result = MergeResult()
 
         try:
-            # Load all results
-            all_results = []
-            for file_path in result_files:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    all_results.append(
-                        {
-                            "file": file_path,
-                            "metadata": data.get("metadata", {}),
-                            "responses": {r["task_id"]: r for r in data.get("responses", [])},
-                        }
-                    )
-
-            result.annotator_count = len(all_results)
-
-            # Collect all task IDs
-            all_task_ids = set()
-            for ar in all_results:
-                all_task_ids.update(ar["responses"].keys())
-
-            result.total_tasks = len(all_task_ids)
+            table = (
+                result_files
+                if isinstance(result_files, AnnotationTable)
+                else load_table(result_files)
+            )
+            result.annotator_count = table.n_sources
+            result.total_tasks = table.n_tasks
 
             # Merge by task
             merged_responses = []
@@ -77,36 +156,22 @@ class ResultMerger:
             agreements = 0
             total_compared = 0
 
-            for task_id in sorted(all_task_ids):
-                task_responses = []
-                for ar in all_results:
-                    if task_id in ar["responses"]:
-                        task_responses.append(ar["responses"][task_id])
-
-                if len(task_responses) == 0:
-                    continue
+            def task_groups() -> Iterator[_TaskGroup]:
+                for task_id in sorted(table.task_ids):
+                    rows = table.task_rows(task_id)
+                    yield (
+                        task_id,
+                        [table.response(r) for r in rows],
+                        [table.sources[table.source_of(r)] for r in rows],
+                    )
 
-                # Calculate agreement
-                if len(task_responses) > 1:
-                    values = self._extract_annotation_values(task_responses)
+            for merged, conflict in self._merge_tasks(task_groups(), strategy, workers):
+                if merged["annotation_count"] > 1:
                     total_compared += 1
-                    if self._values_agree(values):
+                    if conflict is None:
                         agreements += 1
                     else:
-                        conflicts.append(
-                            {
-                                "task_id": task_id,
-                                "values": values,
-                                "annotators": [
-                                    ar["file"] for ar in all_results if task_id in ar["responses"]
-                                ],
-                            }
-                        )
-
-                # Merge based on strategy
-                merged = self._merge_responses(task_responses, strategy)
-                merged["task_id"] = task_id
-                merged["annotation_count"] = len(task_responses)
+                        conflicts.append(conflict)
                 merged_responses.append(merged)
 
             # Calculate agreement rate
@@ -114,20 +179,11 @@ class ResultMerger:
                 result.agreement_rate = agreements / total_compared
 
             result.conflicts = conflicts
+            result.conflict_count = len(conflicts)
 
             # Build output
             output_data = {
-                "metadata": {
-                    "merged_at": datetime.now().isoformat(),
-                    "strategy": strategy,
-                    "annotator_count": result.annotator_count,
-                    "total_tasks": result.total_tasks,
-                    "agreement_rate": result.agreement_rate,
-                    "conflict_count": len(conflicts),
-                    "source_files": result_files,
-                    "tool": "DataLabel",
-                    "version": "0.2.0",
-                },
+                "metadata": self._build_metadata(result, strategy, list(table.sources)),
                 "responses": merged_responses,
                 "conflicts": conflicts,
             }
@@ -135,17 +191,231 @@ class ResultMerger:
             # Write output
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            jsonlib.dump(output_data, output_path, compact=compact)
 
             result.output_path = str(output_path)
 
-        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+        except (OSError, ValueError, KeyError, jsonlib.JSONDecodeError) as e:
             result.success = False
             result.error = str(e)
 
         return result
 
+    def _merge_streaming(
+        self,
+        result_files: List[str],
+        output_path: str,
+        strategy: str,
+        buffer_size: int,
+        workers: Optional[int] = 1,
+        compact: bool = False,
+    ) -> MergeResult:
+        """Constant-memory merge: external sort by task_id, then merge task by task.
+
+        Each input is read incrementally and cut into sorted runs of at most
+        ``buffer_size`` responses spilled to a temp directory. The runs are
+        k-way merged, so only one task's responses are held at a time; merged
+        records and conflicts are spooled to disk and assembled into the same
+        JSON layout as the in-memory path.
+        """
+        result = MergeResult(annotator_count=len(result_files))
+        buffer_size = max(1, buffer_size)
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="datalabel-merge-") as tmpdir:
+                tmp = Path(tmpdir)
+                runs: List[Path] = []
+                for idx, file_path in enumerate(result_files):
+                    runs.extend(self._spill_sorted_runs(file_path, idx, tmp, buffer_size))
+
+                # Keep the number of simultaneously open runs bounded
+                while len(runs) > _MAX_MERGE_FANIN:
+                    runs = [
+                        self._merge_runs(runs[i : i + _MAX_MERGE_FANIN], tmp)
+                        for i in range(0, len(runs), _MAX_MERGE_FANIN)
+                    ]
+
+                agreements = 0
+                total_compared = 0
+                responses_spool = _ArraySpool(tmp / "responses.part", compact)
+                conflicts_spool = _ArraySpool(tmp / "conflicts.part", compact)
+
+                with ExitStack() as stack:
+                    stack.enter_context(responses_spool)
+                    stack.enter_context(conflicts_spool)
+                    run_files = [stack.enter_context(open(p, "rb")) for p in runs]
+                    records = heapq.merge(
+                        *(map(jsonlib.loads, rf) for rf in run_files), key=_run_sort_key
+                    )
+
+                    def task_groups() -> Iterator[_TaskGroup]:
+                        for task_id, group in groupby(records, key=itemgetter(0)):
+                            # Later responses for the same task in one file win,
+                            # matching the dict-based loader
+                            by_file: Dict[int, Dict[str, Any]] = {}
+                            for _, idx, response in group:
+                                by_file[idx] = response
+                            yield (
+                                task_id,
+                                [by_file[i] for i in sorted(by_file)],
+                                [result_files[i] for i in sorted(by_file)],
+                            )
+
+                    for merged, conflict in self._merge_tasks(task_groups(), strategy, workers):
+                        if merged["annotation_count"] > 1:
+                            total_compared += 1
+                            if conflict is None:
+                                agreements += 1
+                            else:
+                                conflicts_spool.append(conflict)
+                        responses_spool.append(merged)
+
+                    result.total_tasks = responses_spool.count
+                    result.conflict_count = conflicts_spool.count
+                    if total_compared > 0:
+                        result.agreement_rate = agreements / total_compared
+
+                    output_path = Path(output_path)
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    metadata = self._build_metadata(result, strategy, result_files)
+                    # Same separators as jsonlib.dump, so both modes write identical bytes
+                    sep, colon = ("", ":") if compact else ("\n  ", ": ")
+                    with open(output_path, "w", encoding="utf-8") as f:
+                        f.write("{" + sep + '"metadata"' + colon)
+                        f.write(_dumps_nested(metadata, 1, compact))
+                        f.write("," + sep + '"responses"' + colon)
+                        responses_spool.copy_to(f)
+                        f.write("," + sep + '"conflicts"' + colon)
+                        conflicts_spool.copy_to(f)
+                        f.write("}" if compact else "\n}")
+
+            result.output_path = str(output_path)
+
+        except (OSError, ValueError, KeyError, jsonlib.JSONDecodeError) as e:
+            result.success = False
+            result.error = str(e)
+
+        return result
+
+    @staticmethod
+    def _spill_sorted_runs(
+        file_path: str, idx: int, tmpdir: Path, buffer_size: int
+    ) -> List[Path]:
+        """Stream one result file into task_id-sorted JSONL runs on disk."""
+        runs = []
+        buffer: List[list] = []
+
+        def flush() -> None:
+            buffer.sort(key=itemgetter(0))
+            path = tmpdir / f"run_{idx}_{len(runs)}.jsonl"
+            with open(path, "wb") as f:
+                for record in buffer:
+                    f.write(jsonlib.dumpb(record))
+                    f.write(b"\n")
+            runs.append(path)
+            buffer.clear()
+
+        for response in iter_responses(file_path):
+            buffer.append([response["task_id"], idx, response])
+            if len(buffer) >= buffer_size:
+                flush()
+        if buffer:
+            flush()
+        return runs
+
+    @staticmethod
+    def _merge_runs(runs: List[Path], tmpdir: Path) -> Path:
+        """k-way merge several sorted runs into a single run file."""
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(p, "rb")) for p in runs]
+            out_path = tmpdir / f"{runs[0].stem}_m{len(runs)}.jsonl"
+            with open(out_path, "wb") as out:
+                for line in heapq.merge(
+                    *files, key=lambda line: _run_sort_key(jsonlib.loads(line))
+                ):
+                    out.write(line)
+        for p in runs:
+            p.unlink()
+        return out_path
+
+    def _merge_tasks(
+        self,
+        groups: Iterable[_TaskGroup],
+        strategy: str,
+        workers: Optional[int],
+    ) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Merge tasks in input order, optionally fanned out over a process pool.
+
+        Tasks are cut into chunks of ``_PARALLEL_CHUNK_TASKS``; at most two
+        chunks per worker are in flight, and results are yielded in
+        submission order, so the output matches the serial path exactly and
+        a streaming caller's memory stays bounded.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            for group in groups:
+                yield self._merge_task(*group, strategy)
+            return
+
+        groups = iter(groups)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: deque = deque()
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(islice(groups, _PARALLEL_CHUNK_TASKS))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_merge_task_chunk, self, strategy, chunk))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+
+    def _merge_task(
+        self,
+        task_id: Any,
+        task_responses: List[Dict[str, Any]],
+        sources: List[str],
+        strategy: str,
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Merge all responses for one task.
+
+        Returns:
+            (merged record, conflict record or None if annotators agree
+            or only one response exists)
+        """
+        conflict = None
+        if len(task_responses) > 1:
+            values = self._extract_annotation_values(task_responses)
+            if not self._values_agree(values):
+                conflict = {
+                    "task_id": task_id,
+                    "values": values,
+                    "annotators": sources,
+                }
+
+        merged = self._merge_responses(task_responses, strategy)
+        merged["task_id"] = task_id
+        merged["annotation_count"] = len(task_responses)
+        return merged, conflict
+
+    @staticmethod
+    def _build_metadata(
+        result: MergeResult, strategy: str, result_files: List[str]
+    ) -> Dict[str, Any]:
+        """Build the metadata block of a merged output file."""
+        return {
+            "merged_at": datetime.now().isoformat(),
+            "strategy": strategy,
+            "annotator_count": result.annotator_count,
+            "total_tasks": result.total_tasks,
+            "agreement_rate": result.agreement_rate,
+            "conflict_count": result.conflict_count,
+            "source_files": result_files,
+            "tool": "DataLabel",
+            "version": "0.2.0",
+        }
+
     def _merge_responses(
         self,
         responses: List[Dict[str, Any]],
@@ -342,111 +612,127 @@ class ResultMerger:
 
     def calculate_iaa(
         self,
-        result_files: List[str],
+        result_files: Union[List[str], AnnotationTable],
+        alpha_metric: str = "nominal",
+        bootstrap: int = 0,
+        seed: Optional[int] = None,
+        confidence: float = 0.95,
+        workers: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Calculate Inter-Annotator Agreement (IAA) metrics.
 
+        Kappa and exact agreement use the tasks every annotator labelled;
+        Krippendorff's alpha uses every task labelled by at least two.
+
         Args:
-            result_files: List of paths to annotation result JSON files
+            result_files: List of paths to annotation result JSON files,
+                or an already loaded ``AnnotationTable``
+            alpha_metric: Distance metric for Krippendorff's alpha
+                ('nominal', 'ordinal', 'interval' or 'ratio')
+            bootstrap: Number of bootstrap replicates for confidence
+                intervals; 0 disables them
+            seed: Seed for the bootstrap resampling
+            confidence: Coverage of the bootstrap intervals
+            workers: Processes for the bootstrap replicates (None = CPU count)
 
         Returns:
             Dictionary with IAA metrics
         """
-        # Load all results
-        all_results = []
-        for file_path in result_files:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                all_results.append(
-                    {
-                        "file": file_path,
-                        "responses": {r["task_id"]: r for r in data.get("responses", [])},
-                    }
-                )
+        if alpha_metric not in agreement.ALPHA_METRICS:
+            return {
+                "error": f"Unknown alpha metric '{alpha_metric}', "
+                f"supported: {', '.join(agreement.ALPHA_METRICS)}"
+            }
 
-        if len(all_results) < 2:
+        table = (
+            result_files
+            if isinstance(result_files, AnnotationTable)
+            else load_table(result_files)
+        )
+        if table.n_sources < 2:
             return {"error": "Need at least 2 annotators to calculate IAA"}
 
         # Find common tasks
-        common_tasks = set(all_results[0]["responses"].keys())
-        for ar in all_results[1:]:
-            common_tasks &= set(ar["responses"].keys())
-
-        if not common_tasks:
+        task_ids = sorted(
+            t for t in table.task_ids if len(table.task_rows(t)) == table.n_sources
+        )
+        if not task_ids:
             return {"error": "No common tasks found between annotators"}
 
-        # Calculate agreement metrics
-        exact_agreements = 0
-        total = len(common_tasks)
-
-        for task_id in common_tasks:
-            responses = [ar["responses"][task_id] for ar in all_results]
-            values = self._extract_annotation_values(responses)
-            if self._values_agree(values):
-                exact_agreements += 1
-
-        # Simple agreement rate
-        agreement_rate = exact_agreements / total if total > 0 else 0
-
-        # Pairwise agreement matrix
-        n_annotators = len(all_results)
-        pairwise_agreement = []
-        for i in range(n_annotators):
-            row = []
-            for j in range(n_annotators):
-                if i == j:
-                    row.append(1.0)
-                else:
-                    pair_agreements = 0
-                    for task_id in common_tasks:
-                        ri = all_results[i]["responses"][task_id]
-                        rj = all_results[j]["responses"][task_id]
-                        vi = self._extract_annotation_values([ri])
-                        vj = self._extract_annotation_values([rj])
-                        if vi == vj:
-                            pair_agreements += 1
-                    row.append(pair_agreements / total if total > 0 else 0)
-            pairwise_agreement.append(row)
-
-        # Collect per-annotator values for advanced metrics
-        all_values = []  # [task_values_list] where each is [val_ann1, val_ann2, ...]
-        for task_id in sorted(common_tasks):
-            task_vals = []
-            for ar in all_results:
-                vals = self._extract_annotation_values([ar["responses"][task_id]])
-                task_vals.append(vals[0])
-            all_values.append(task_vals)
-
-        # Compute advanced metrics
+        # Encode every annotation once into an integer label matrix
+        matrix = table.label_matrix(task_ids)
+        # Agreement and kappa matrices come from the same single-pass statistics
+        pairwise = agreement.pairwise_stats(matrix)
+
+        # Alpha handles missing labels, so it sees every task, not just the common ones
+        units = table.unit_counts()
+        try:
+            alpha = agreement.krippendorff_alpha(units, metric=alpha_metric)
+        except ValueError as e:
+            return {"error": str(e)}
+
         metrics = {
-            "annotator_count": n_annotators,
-            "common_tasks": len(common_tasks),
-            "exact_agreement_rate": agreement_rate,
-            "pairwise_agreement": pairwise_agreement,
-            "files": [ar["file"] for ar in all_results],
+            "annotator_count": table.n_sources,
+            "common_tasks": len(task_ids),
+            "exact_agreement_rate": agreement.exact_agreement_rate(matrix),
+            "pairwise_agreement": pairwise.agreement_matrix(),
+            "files": list(table.sources),
+            "cohens_kappa": pairwise.kappa_matrix(),
+            "fleiss_kappa": agreement.fleiss_kappa(matrix),
+            "krippendorff_alpha": alpha,
+            "alpha_metric": alpha_metric,
         }
+        if bootstrap > 0:
+            try:
+                metrics["bootstrap"] = agreement.bootstrap_intervals(
+                    matrix,
+                    units,
+                    replicates=bootstrap,
+                    seed=seed,
+                    confidence=confidence,
+                    alpha_metric=alpha_metric,
+                    workers=workers,
+                )
+            except ValueError as e:
+                return {"error": str(e)}
+        return metrics
 
-        # Pairwise Cohen's Kappa
-        pairwise_kappa = []
-        for i in range(n_annotators):
-            row = []
-            for j in range(n_annotators):
-                if i == j:
-                    row.append(1.0)
-                else:
-                    r1 = [v[i] for v in all_values]
-                    r2 = [v[j] for v in all_values]
-                    row.append(self._cohens_kappa(r1, r2))
-            pairwise_kappa.append(row)
-        metrics["cohens_kappa"] = pairwise_kappa
+    def build_agreement_state(
+        self, result_files: Union[List[str], AnnotationTable]
+    ) -> agreement.AgreementState:
+        """Build an incremental ``AgreementState`` from result files.
 
-        # Fleiss' Kappa
-        metrics["fleiss_kappa"] = self._fleiss_kappa(all_values)
+        Annotators are keyed by file path, so ``state.metrics()`` matches
+        ``calculate_iaa(result_files)``.
+        """
+        table = (
+            result_files
+            if isinstance(result_files, AnnotationTable)
+            else load_table(result_files)
+        )
+        state = agreement.AgreementState()
+        for src, name in enumerate(table.sources):
+            state.update(name, table.annotations(src))
+        return state
+
+    def update_agreement_state(
+        self,
+        state: agreement.AgreementState,
+        annotator: str,
+        responses: List[Dict[str, Any]],
+    ) -> None:
+        """Apply new or changed responses from one annotator to ``state``."""
+        state.update(annotator, self.agreement_labels(responses))
 
-        # Krippendorff's Alpha
-        metrics["krippendorff_alpha"] = self._krippendorff_alpha(all_values)
+    def agreement_labels(self, responses: List[Dict[str, Any]]) -> Dict[Any, str]:
+        """task_id -> label, as ``update_agreement_state`` records ``responses``.
 
-        return metrics
+        Labels are ``str`` of the annotation value, so they can be stored and
+        replayed into an ``AgreementState`` later.
+        """
+        responses = [r for r in responses if "task_id" in r]
+        values = self._extract_annotation_values(responses)
+        return {r["task_id"]: str(v) for r, v in zip(responses, values)}
 
     @staticmethod
     def _cohens_kappa(ratings1: list, ratings2: list) -> float:
@@ -454,27 +740,10 @@ class ResultMerger:
 
         kappa = (p_o - p_e) / (1 - p_e)
         """
-        n = len(ratings1)
-        if n == 0:
+        if not ratings1:
             return 0.0
-
-        categories = sorted(set(str(v) for v in ratings1) | set(str(v) for v in ratings2))
-        r1_str = [str(v) for v in ratings1]
-        r2_str = [str(v) for v in ratings2]
-
-        # Observed agreement
-        p_o = sum(1 for a, b in zip(r1_str, r2_str) if a == b) / n
-
-        # Expected agreement by chance
-        p_e = 0.0
-        for cat in categories:
-            p1 = sum(1 for v in r1_str if v == cat) / n
-            p2 = sum(1 for v in r2_str if v == cat) / n
-            p_e += p1 * p2
-
-        if p_e >= 1.0:
-            return 1.0
-        return (p_o - p_e) / (1 - p_e)
+        matrix = agreement.encode_rows(list(zip(ratings1, ratings2)))
+        return agreement.cohens_kappa(matrix, 0, 1)
 
     @staticmethod
     def _fleiss_kappa(all_values: list) -> float:
@@ -482,47 +751,7 @@ class ResultMerger:
 
         all_values: list of [val_ann1, val_ann2, ...] per subject
         """
-        if not all_values:
-            return 0.0
-
-        n_raters = len(all_values[0])
-        n_subjects = len(all_values)
-
-        if n_raters < 2 or n_subjects == 0:
-            return 0.0
-
-        # Collect all categories
-        categories = sorted(set(str(v) for row in all_values for v in row))
-        k = len(categories)
-        cat_index = {c: i for i, c in enumerate(categories)}
-
-        # Build ratings matrix: n_subjects x k (count of raters per category)
-        matrix = []
-        for row in all_values:
-            counts = [0] * k
-            for v in row:
-                counts[cat_index[str(v)]] += 1
-            matrix.append(counts)
-
-        # P_i for each subject
-        p_values = []
-        for counts in matrix:
-            p_i = (sum(c * c for c in counts) - n_raters) / (n_raters * (n_raters - 1))
-            p_values.append(p_i)
-
-        p_bar = sum(p_values) / n_subjects
-
-        # p_j for each category
-        p_j = []
-        for j in range(k):
-            total_j = sum(matrix[i][j] for i in range(n_subjects))
-            p_j.append(total_j / (n_subjects * n_raters))
-
-        p_e_bar = sum(pj * pj for pj in p_j)
-
-        if p_e_bar >= 1.0:
-            return 1.0
-        return (p_bar - p_e_bar) / (1 - p_e_bar)
+        return agreement.fleiss_kappa(agreement.encode_rows(all_values))
 
     @staticmethod
     def _krippendorff_alpha(all_values: list) -> float:
@@ -530,54 +759,7 @@ class ResultMerger:
 
         all_values: list of [val_ann1, val_ann2, ...] per subject
         """
-        if not all_values:
-            return 0.0
-
-        n_raters = len(all_values[0])
-        n_subjects = len(all_values)
-
-        if n_raters < 2 or n_subjects == 0:
-            return 0.0
-
-        # Convert to string for consistent comparison
-        str_values = [[str(v) for v in row] for row in all_values]
-
-        # Calculate observed disagreement (D_o)
-        d_o = 0.0
-        total_pairs = 0
-        for row in str_values:
-            n_u = len(row)
-            for i in range(n_u):
-                for j in range(i + 1, n_u):
-                    total_pairs += 1
-                    if row[i] != row[j]:
-                        d_o += 1
-
-        if total_pairs == 0:
-            return 1.0
-        d_o /= total_pairs
-
-        # Calculate expected disagreement (D_e)
-        # Count overall category frequencies
-        all_flat = [v for row in str_values for v in row]
-        n_total = len(all_flat)
-        cat_counts = defaultdict(int)
-        for v in all_flat:
-            cat_counts[v] += 1
-
-        d_e = 0.0
-        categories = list(cat_counts.keys())
-        for i in range(len(categories)):
-            for j in range(i + 1, len(categories)):
-                n_c = cat_counts[categories[i]]
-                n_k = cat_counts[categories[j]]
-                d_e += n_c * n_k
-
-        d_e = d_e * 2 / (n_total * (n_total - 1)) if n_total > 1 else 0.0
-
-        if d_e == 0.0:
-            return 1.0
-        return 1.0 - d_o / d_e
+        return agreement.krippendorff_alpha(agreement.encode_rows(all_values))
 
     @staticmethod
     def _extract_annotation_values(responses: List[Dict[str, Any]]) -> list:
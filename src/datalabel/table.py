@@ -0,0 +1,621 @@
+"""Columnar in-memory store for loaded annotation results.
+
+Result files are loaded once into an ``AnnotationTable``: one row per
+response, with task IDs and field values interned and stored as integer
+codes in ``array`` columns instead of one dict per response. ISO-8601
+timestamps are packed into 64-bit integers. Rows are indexed by
+``(task, source)`` so a lookup only scans the few responses of one task.
+
+A response with keys ``task_id, data, score, comment, annotated_at``
+costs about 40 bytes here, against several hundred as a dict of Python
+objects, and task ``data`` shared by all annotators is stored once.
+"""
+
+import os
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from datalabel import agreement, jsonlib
+from datalabel.io import iter_responses
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Annotation value keys, in the order ResultMerger detects the annotation type
+VALUE_KEYS = ("score", "choice", "choices", "text", "ranking", "fields")
+
+# Keys whose ISO-8601 string values are packed into integer columns
+_TIMESTAMP_KEYS = frozenset({"annotated_at", "submitted_at", "merged_at"})
+
+# Column codes below zero
+_ABSENT = -1
+_PACKED_TIMESTAMP = -2
+_TASK_ID = -3  # the row's own task ID, already held in ``task_ids``
+
+# Packed timestamp formats: Python ``isoformat()`` and JavaScript ``toISOString()``
+_TS_ISO = 1
+_TS_JS = 2
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _format_timestamp(micros: int, fmt: int) -> str:
+    dt = _EPOCH + timedelta(microseconds=micros)
+    if fmt == _TS_JS:
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+    return dt.isoformat()
+
+
+def _pack_timestamp(value: str) -> Optional[Tuple[int, int]]:
+    """``(microseconds since epoch, format)``, or ``None`` if ``value`` would not round-trip."""
+    try:
+        if value.endswith("Z"):
+            dt, fmt = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ"), _TS_JS
+        else:
+            dt, fmt = datetime.fromisoformat(value), _TS_ISO
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        return None
+    micros = (dt - _EPOCH) // _MICROSECOND
+    if _format_timestamp(micros, fmt) != value:
+        return None
+    return micros, fmt
+
+
+def _intern_key(value: Any) -> Tuple[Any, Any]:
+    """Hashable identity of a JSON value; type is part of it so 1, 1.0 and True differ."""
+    kind = type(value)
+    if kind in (list, dict):
+        return kind, jsonlib.dumps(value)
+    return kind, value
+
+
+def normalize_value(key: Optional[str], value: Any) -> Any:
+    """Hashable annotation value, as ``ResultMerger._extract_annotation_values`` compares it."""
+    if key == "choices":
+        return tuple(sorted(value))
+    if key == "ranking":
+        return tuple(value)
+    if key == "fields":
+        return tuple(sorted((k, str(v)) for k, v in value.items()))
+    return value
+
+
+class _Column:
+    """Codes into the table's value pool for one response key."""
+
+    __slots__ = ("codes", "micros", "formats")
+
+    def __init__(self, n_rows: int, timestamps: bool):
+        self.codes = array("i", [_ABSENT]) * n_rows
+        self.micros = array("q", [0]) * n_rows if timestamps else None
+        self.formats = array("b", [0]) * n_rows if timestamps else None
+
+    def append(self, code: int, micros: int = 0, fmt: int = 0) -> None:
+        self.codes.append(code)
+        if self.micros is not None:
+            self.micros.append(micros)
+            self.formats.append(fmt)
+
+
+class RowView(Mapping):
+    """Mapping view of one ``AnnotationTable`` row; fields are decoded on access."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "AnnotationTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        if not self._table.has(self._row, key):
+            raise KeyError(key)
+        return self._table.get(self._row, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._table.has(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._layouts[self._table._layout[self._row]])
+
+    def __len__(self) -> int:
+        return len(self._table._layouts[self._table._layout[self._row]])
+
+
+def _mapping_key(ids: List[Any]) -> Callable[[int, Mapping[str, Any]], Any]:
+    """Task ID getter for responses loaded from a ``{task_id: response}`` mapping."""
+    return lambda i, response: ids[i]
+
+
+class AnnotationTable:
+    """Annotation results from several sources (files), stored column-wise.
+
+    Attributes:
+        sources: Source name per annotator index, usually the file path
+        metadata: ``metadata`` block of each source file
+        task_ids: Interned task IDs in first-seen order
+
+    A later response for the same task in the same source replaces the
+    earlier one, as with the ``{task_id: response}`` dicts this replaces.
+    Rebuilt responses share nested lists/dicts with the table; treat them
+    as read-only.
+    """
+
+    def __init__(self) -> None:
+        self.sources: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.task_ids: List[Any] = []
+        self._task_index: Dict[Any, int] = {}
+        self._pool: List[Any] = []
+        self._pool_index: Dict[Tuple[Any, Any], int] = {}
+        self._layouts: List[Tuple[str, ...]] = []
+        self._layout_index: Dict[Tuple[str, ...], int] = {}
+        self._columns: Dict[str, _Column] = {}
+        self._task = array("i")
+        self._source = array("i")
+        self._layout = array("i")
+        self._n_rows = 0
+        # (task, source) index, rebuilt lazily after loading
+        self._live: Optional[array] = None
+        self._task_start: Optional[array] = None
+        self._label_cache: Optional[Tuple[array, List[str]]] = None
+
+    # ---- loading ----
+
+    @classmethod
+    def from_files(
+        cls,
+        result_files: Iterable[str],
+        skip_missing_ids: bool = False,
+        key: Optional[Callable[[int, Mapping[str, Any]], Any]] = None,
+        bare_mapping: bool = False,
+    ) -> "AnnotationTable":
+        """Load result files (``{"metadata", "responses"}``, a bare list, or JSONL).
+
+        Args:
+            result_files: Paths, one source each
+            skip_missing_ids: Drop responses without a truthy ``task_id``
+                instead of raising ``KeyError``
+            key: Task ID getter passed on to ``add_source``
+            bare_mapping: Read a top-level object without ``responses``
+                as a ``{task_id: response}`` mapping
+
+        Use ``load_table`` instead to reuse tables of unchanged files.
+        """
+        table = cls()
+        for path in result_files:
+            table.load_file(
+                path, skip_missing_ids=skip_missing_ids, key=key, bare_mapping=bare_mapping
+            )
+        return table
+
+    def load_file(
+        self,
+        path: str,
+        skip_missing_ids: bool = False,
+        key: Optional[Callable[[int, Mapping[str, Any]], Any]] = None,
+        bare_mapping: bool = False,
+    ) -> int:
+        """Load one result file as a new source and return its index.
+
+        ``responses`` may also be a ``{task_id: response}`` mapping, in
+        which case its keys are the task IDs.
+        """
+        metadata: Dict[str, Any] = {}
+        if Path(path).suffix == ".jsonl":
+            responses: Iterable[Dict[str, Any]] = iter_responses(path)
+        else:
+            data = jsonlib.load(path)
+            if isinstance(data, dict):
+                metadata = data.get("metadata", {})
+                responses = data.get("responses", [])
+            else:
+                responses = data
+            if bare_mapping and isinstance(data, dict) and "responses" not in data:
+                metadata, responses = {}, data
+            if isinstance(responses, dict):
+                ids = list(responses)
+                responses = list(responses.values())
+                key = _mapping_key(ids)
+                skip_missing_ids = False
+        if skip_missing_ids:
+            responses = (r for r in responses if r.get("task_id"))
+        return self.add_source(path, responses, metadata, key=key)
+
+    def add_source(
+        self,
+        name: str,
+        responses: Iterable[Mapping[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        key: Optional[Callable[[int, Mapping[str, Any]], Any]] = None,
+    ) -> int:
+        """Append one annotator's responses and return the source index.
+
+        ``key(i, response)`` gives the task ID of the ``i``-th response;
+        by default ``response["task_id"]``.
+        """
+        src = len(self.sources)
+        self.sources.append(name)
+        self.metadata.append(metadata or {})
+        self._live = self._task_start = self._label_cache = None
+
+        for i, response in enumerate(responses):
+            task_id = key(i, response) if key else response["task_id"]
+            t = self._task_index.get(task_id)
+            if t is None:
+                t = self._task_index[task_id] = len(self.task_ids)
+                self.task_ids.append(task_id)
+            self._append(t, src, response)
+        return src
+
+    def _append(self, t: int, src: int, response: Mapping[str, Any]) -> None:
+        fields = tuple(response)
+        layout = self._layout_index.get(fields)
+        if layout is None:
+            layout = self._layout_index[fields] = len(self._layouts)
+            self._layouts.append(fields)
+            for name in fields:
+                if name not in self._columns:
+                    self._columns[name] = _Column(self._n_rows, name in _TIMESTAMP_KEYS)
+
+        for name, column in self._columns.items():
+            if name not in response:
+                column.append(_ABSENT)
+                continue
+            value = response[name]
+            if name == "task_id" and value == self.task_ids[t] and type(value) is type(
+                self.task_ids[t]
+            ):
+                column.append(_TASK_ID)
+                continue
+            if column.micros is not None and isinstance(value, str):
+                packed = _pack_timestamp(value)
+                if packed is not None:
+                    column.append(_PACKED_TIMESTAMP, *packed)
+                    continue
+            column.append(self._intern(value))
+
+        self._task.append(t)
+        self._source.append(src)
+        self._layout.append(layout)
+        self._n_rows += 1
+
+    def _intern(self, value: Any) -> int:
+        ident = _intern_key(value)
+        code = self._pool_index.get(ident)
+        if code is None:
+            code = self._pool_index[ident] = len(self._pool)
+            self._pool.append(value)
+        return code
+
+    # ---- index ----
+
+    @property
+    def n_sources(self) -> int:
+        return len(self.sources)
+
+    @property
+    def n_tasks(self) -> int:
+        return len(self.task_ids)
+
+    def __len__(self) -> int:
+        """Number of responses, after later duplicates replaced earlier ones."""
+        self._ensure_index()
+        return len(self._live)
+
+    def _ensure_index(self) -> None:
+        # _task_start is published before _live, so a table shared between
+        # threads (see TableCache) never exposes a half-built index
+        if self._live is not None:
+            return
+        n_src = max(len(self.sources), 1)
+        if HAS_NUMPY:
+            keys = np.frombuffer(self._task, dtype=np.int32).astype(np.int64) * n_src
+            keys += np.frombuffer(self._source, dtype=np.int32)
+            order = np.argsort(keys, kind="stable")
+            ordered = keys[order]
+            last = np.ones(len(order), dtype=bool)
+            last[:-1] = ordered[1:] != ordered[:-1]
+            live = order[last].astype(np.int32)
+            tasks = np.frombuffer(self._task, dtype=np.int32)[live]
+            start = np.zeros(self.n_tasks + 1, dtype=np.int32)
+            np.cumsum(np.bincount(tasks, minlength=self.n_tasks), out=start[1:])
+            self._task_start = array("i", start.tobytes())
+            self._live = array("i", live.tobytes())
+            return
+
+        task, source = self._task, self._source
+        order = sorted(range(self._n_rows), key=lambda r: task[r] * n_src + source[r])
+        live = array("i")
+        for x, r in enumerate(order):
+            nxt = order[x + 1] if x + 1 < len(order) else None
+            if nxt is None or task[nxt] != task[r] or source[nxt] != source[r]:
+                live.append(r)
+        start = array("i", [0]) * (self.n_tasks + 1)
+        for r in live:
+            start[task[r] + 1] += 1
+        for t in range(self.n_tasks):
+            start[t + 1] += start[t]
+        self._task_start = start
+        self._live = live
+
+    def task_rows(self, task_id: Any) -> List[int]:
+        """Rows of one task, ordered by source index."""
+        t = self._task_index.get(task_id)
+        if t is None:
+            return []
+        self._ensure_index()
+        return list(self._live[self._task_start[t] : self._task_start[t + 1]])
+
+    def row(self, task_id: Any, source: int) -> Optional[int]:
+        """Row of ``source``'s response to ``task_id``, if any."""
+        for r in self.task_rows(task_id):
+            if self._source[r] == source:
+                return r
+        return None
+
+    def source_rows(self, source: int) -> List[int]:
+        """Rows of one source, in load order."""
+        self._ensure_index()
+        return sorted(r for r in self._live if self._source[r] == source)
+
+    def source_of(self, row: int) -> int:
+        return self._source[row]
+
+    def task_of(self, row: int) -> Any:
+        return self.task_ids[self._task[row]]
+
+    def counts_per_source(self) -> List[int]:
+        self._ensure_index()
+        counts = [0] * len(self.sources)
+        for r in self._live:
+            counts[self._source[r]] += 1
+        return counts
+
+    # ---- row access ----
+
+    def has(self, row: int, name: str) -> bool:
+        column = self._columns.get(name)
+        return column is not None and column.codes[row] != _ABSENT
+
+    def get(self, row: int, name: str, default: Any = None) -> Any:
+        """Value of field ``name`` in ``row``, without rebuilding the response."""
+        column = self._columns.get(name)
+        if column is None:
+            return default
+        code = column.codes[row]
+        if code == _ABSENT:
+            return default
+        if code == _PACKED_TIMESTAMP:
+            return _format_timestamp(column.micros[row], column.formats[row])
+        if code == _TASK_ID:
+            return self.task_ids[self._task[row]]
+        return self._pool[code]
+
+    def view(self, row: int) -> "RowView":
+        """Read-only mapping over ``row`` that decodes fields on access."""
+        return RowView(self, row)
+
+    def response(self, row: int) -> Dict[str, Any]:
+        """Rebuild the response dict of ``row``, with its original key order."""
+        return {name: self.get(row, name) for name in self._layouts[self._layout[row]]}
+
+    def responses(self, source: int) -> Iterator[Dict[str, Any]]:
+        for row in self.source_rows(source):
+            yield self.response(row)
+
+    def annotation(self, row: int, keys: Tuple[str, ...] = VALUE_KEYS) -> Tuple[Optional[str], Any]:
+        """``(key, raw value)`` of the first of ``keys`` present in ``row``."""
+        for name in keys:
+            if self.has(row, name):
+                return name, self.get(row, name)
+        return None, None
+
+    def annotations(self, source: int) -> Dict[Any, Any]:
+        """``task_id -> normalized annotation value`` for one source."""
+        result = {}
+        for row in self.source_rows(source):
+            result[self.task_of(row)] = normalize_value(*self.annotation(row))
+        return result
+
+    # ---- agreement inputs ----
+
+    def _labels(self) -> Tuple[array, List[str]]:
+        """Category code per row (``str`` of the normalized value) and the category list."""
+        if self._label_cache is not None:
+            return self._label_cache
+        categories: List[str] = []
+        category_index: Dict[str, int] = {}
+        by_value: Dict[Tuple[Optional[str], int], int] = {}
+        value_columns = [
+            (name, self._columns[name].codes) for name in VALUE_KEYS if name in self._columns
+        ]
+        labels = array("i", [0]) * self._n_rows
+        for row in range(self._n_rows):
+            ident: Tuple[Optional[str], int] = (None, _ABSENT)
+            for name, codes in value_columns:
+                if codes[row] != _ABSENT:
+                    ident = (name, codes[row])
+                    break
+            cat = by_value.get(ident)
+            if cat is None:
+                name, code = ident
+                value = None if name is None else normalize_value(name, self._pool[code])
+                label = str(value)
+                cat = category_index.get(label)
+                if cat is None:
+                    cat = category_index[label] = len(categories)
+                    categories.append(label)
+                by_value[ident] = cat
+            labels[row] = cat
+        self._label_cache = (labels, categories)
+        return self._label_cache
+
+    def label_matrix(
+        self, task_ids: Iterable[Any], use_numpy: Optional[bool] = None
+    ) -> agreement.LabelMatrix:
+        """Encode the given tasks x all sources as an ``agreement.LabelMatrix``."""
+        if use_numpy is None:
+            use_numpy = agreement.HAS_NUMPY
+        task_ids = list(task_ids)
+        labels, categories = self._labels()
+        self._ensure_index()
+        n_src = len(self.sources)
+
+        if use_numpy:
+            position = np.full(self.n_tasks, -1, dtype=np.int64)
+            for x, tid in enumerate(task_ids):
+                position[self._task_index[tid]] = x
+            live = np.frombuffer(self._live, dtype=np.int32)
+            pos = position[np.frombuffer(self._task, dtype=np.int32)[live]]
+            keep = pos >= 0
+            codes = np.full((len(task_ids), n_src), agreement.MISSING, dtype=np.int32)
+            codes[pos[keep], np.frombuffer(self._source, dtype=np.int32)[live][keep]] = (
+                np.frombuffer(labels, dtype=np.int32)[live][keep]
+            )
+            return agreement.LabelMatrix(codes, categories, task_ids, n_src)
+
+        rows = []
+        for tid in task_ids:
+            row = [agreement.MISSING] * n_src
+            for r in self.task_rows(tid):
+                row[self._source[r]] = labels[r]
+            rows.append(row)
+        return agreement.LabelMatrix(rows, categories, task_ids, n_src)
+
+    def unit_counts(self, use_numpy: Optional[bool] = None) -> agreement.UnitCounts:
+        """Per-task label counts over every task, for Krippendorff's alpha."""
+        if use_numpy is None:
+            use_numpy = agreement.HAS_NUMPY
+        labels, categories = self._labels()
+        self._ensure_index()
+
+        if use_numpy:
+            live = np.frombuffer(self._live, dtype=np.int32)
+            k = max(len(categories), 1)
+            keys = np.frombuffer(self._task, dtype=np.int32)[live].astype(np.int64) * k
+            keys += np.frombuffer(labels, dtype=np.int32)[live]
+            uniq, counts = np.unique(keys, return_counts=True)
+            return agreement.UnitCounts(
+                uniq // k, uniq % k, counts.astype(np.float64), categories
+            )
+
+        items = sorted(Counter((self._task[r], labels[r]) for r in self._live).items())
+        return agreement.UnitCounts(
+            units=[u for (u, _), _ in items],
+            cats=[c for (_, c), _ in items],
+            counts=[count for _, count in items],
+            categories=categories,
+        )
+
+
+# ---- process-wide loader cache ----
+
+# Default budget, counted in bytes of the cached tables' source files
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+_FileKey = Tuple[str, str, int, int]
+
+
+def _file_key(path: str) -> _FileKey:
+    st = os.stat(path)
+    return path, os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+class TableCache:
+    """LRU cache of loaded ``AnnotationTable``s.
+
+    Entries are keyed by each file's ``(path, mtime, size)`` plus the load
+    options, so a repeated merge, IAA or dashboard run over unchanged files
+    skips JSON parsing entirely, and rewriting any file invalidates it.
+    Entries are weighed by the size of their files; the least recently
+    used ones are evicted once ``max_bytes`` is exceeded. Cached tables
+    are shared between callers and threads and must not be modified.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[AnnotationTable, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def load(
+        self,
+        result_files: Iterable[str],
+        skip_missing_ids: bool = False,
+        key: Optional[Callable[[int, Mapping[str, Any]], Any]] = None,
+        bare_mapping: bool = False,
+    ) -> AnnotationTable:
+        """``AnnotationTable.from_files`` with the same arguments, cached."""
+        result_files = [str(p) for p in result_files]
+        files = tuple(_file_key(p) for p in result_files)
+        cache_key = (files, skip_missing_ids, key, bare_mapping)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        table = AnnotationTable.from_files(
+            result_files, skip_missing_ids=skip_missing_ids, key=key, bare_mapping=bare_mapping
+        )
+        # A file rewritten while it was being read is not cached under its old key
+        if tuple(_file_key(p) for p in result_files) != files:
+            return table
+        cost = sum(size for _, _, _, size in files)
+        if cost > self.max_bytes:
+            return table
+        with self._lock:
+            if cache_key not in self._entries:
+                self._entries[cache_key] = (table, cost)
+                self._bytes += cost
+            self._evict()
+        return table
+
+    def clear(self) -> None:
+        """Drop every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, cost) = self._entries.popitem(last=False)
+            self._bytes -= cost
+
+
+table_cache = TableCache()
+
+
+def load_table(
+    result_files: Iterable[str],
+    skip_missing_ids: bool = False,
+    key: Optional[Callable[[int, Mapping[str, Any]], Any]] = None,
+    bare_mapping: bool = False,
+) -> AnnotationTable:
+    """Load result files through the process-wide ``table_cache``."""
+    return table_cache.load(
+        result_files, skip_missing_ids=skip_missing_ids, key=key, bare_mapping=bare_mapping
+    )
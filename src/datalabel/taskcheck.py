@@ -0,0 +1,445 @@
+"""Streaming validation of large JSONL / CSV task files.
+
+``validate_task_file`` reads a task file record by record and checks every
+task the way ``SchemaValidator.validate_tasks`` does (a dict, no repeated
+``id``), and that its ``data`` carries the schema's ``fields``. Memory stays
+bounded however long the file is: task ids are reduced to 64-bit hashes,
+written out in sorted runs of ``run_size`` and merged at the end to find
+repeats, and checking stops once ``max_errors`` errors have been found.
+
+The file is checked as a list of byte ranges that end on record boundaries
+(for CSV, also outside quoted fields). With ``workers`` > 1 the ranges are
+checked in a process pool; every range spills its id runs into the same
+directory, so the duplicate check still covers the whole file and the
+report is the same as with one worker.
+"""
+
+import csv
+import hashlib
+import heapq
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
+
+from datalabel import jsonlib
+from datalabel.io import csv_value
+from datalabel.validator import ValidationResult, compile_schema, missing_field_warnings
+
+DEFAULT_MAX_ERRORS = 100
+# Task id hashes sorted in memory per spill run (~30 MB)
+DEFAULT_RUN_SIZE = 500_000
+# Max run files open at once when merging
+_MAX_MERGE_FANIN = 256
+# Byte ranges per worker, so a slow range does not hold up the pool, and
+# the smallest range worth a task of its own
+_RANGES_PER_WORKER = 4
+_MIN_RANGE_BYTES = 1 << 20
+_READ_BYTES = 1 << 20
+
+# A run record is the id hash followed by the byte offset of its record, big
+# endian, so records sort by hash and compare as plain bytes
+_HASH_SIZE = 8
+_OFFSET_SIZE = 5
+_RECORD_SIZE = _HASH_SIZE + _OFFSET_SIZE
+_READ_RECORDS = 4096
+
+
+@dataclass
+class TaskFileReport(ValidationResult):
+    """Result of validating a task file, with throughput figures."""
+
+    total: int = 0
+    bytes_read: int = 0
+    elapsed: float = 0.0
+    truncated: bool = False
+    missing_fields: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tasks_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _id_hash(task_id: Any) -> int:
+    # repr keeps 1 and "1" apart, as the set in validate_tasks does
+    digest = hashlib.blake2b(repr(task_id).encode("utf-8"), digest_size=_HASH_SIZE).digest()
+    return int.from_bytes(digest, "big")
+
+
+class _IdRuns:
+    """Task id hashes with their record offsets, spilled to sorted run files."""
+
+    def __init__(self, tmpdir: Path, run_size: int, prefix: str = "ids"):
+        self.runs: List[Path] = []
+        self._tmpdir = tmpdir
+        self._run_size = max(1, run_size)
+        self._prefix = prefix
+        self._buffer: List[int] = []
+
+    def add(self, task_id: Any, offset: int) -> None:
+        self._buffer.append((_id_hash(task_id) << (8 * _OFFSET_SIZE)) | offset)
+        if len(self._buffer) >= self._run_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        path = self._tmpdir / f"{self._prefix}_{len(self.runs)}.bin"
+        buffer = self._buffer
+        with open(path, "wb") as f:
+            for i in range(0, len(buffer), _READ_RECORDS):
+                f.write(b"".join(
+                    v.to_bytes(_RECORD_SIZE, "big") for v in buffer[i : i + _READ_RECORDS]
+                ))
+        self.runs.append(path)
+        self._buffer.clear()
+
+
+def _iter_run(f: Any) -> Iterator[bytes]:
+    while True:
+        block = f.read(_RECORD_SIZE * _READ_RECORDS)
+        if not block:
+            return
+        for i in range(0, len(block), _RECORD_SIZE):
+            yield block[i : i + _RECORD_SIZE]
+
+
+def _merge_runs(runs: List[Path]) -> Path:
+    """k-way merge several sorted runs into one run file next to them."""
+    out_path = runs[0].with_name(f"{runs[0].stem}_m{len(runs)}.bin")
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(p, "rb")) for p in runs]
+        with open(out_path, "wb") as out:
+            for record in heapq.merge(*(_iter_run(f) for f in files)):
+                out.write(record)
+    for p in runs:
+        p.unlink()
+    return out_path
+
+
+def _duplicate_offsets(runs: List[Path]) -> Iterator[int]:
+    """Record offsets of ids already seen at an earlier offset, in hash order."""
+    # Keep the number of simultaneously open runs bounded
+    while len(runs) > _MAX_MERGE_FANIN:
+        runs = [
+            _merge_runs(runs[i : i + _MAX_MERGE_FANIN])
+            for i in range(0, len(runs), _MAX_MERGE_FANIN)
+        ]
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(p, "rb")) for p in runs]
+        previous = b""
+        for record in heapq.merge(*(_iter_run(f) for f in files)):
+            key = record[:_HASH_SIZE]
+            if key == previous:
+                yield int.from_bytes(record[_HASH_SIZE:], "big")
+            previous = key
+
+
+def _count_bytes(f: IO[bytes], start: int, end: int, byte: bytes = b"\n") -> int:
+    """Occurrences of ``byte`` in ``[start, end)`` of ``f``; leaves ``f`` at ``end``."""
+    f.seek(start)
+    count = 0
+    remaining = end - start
+    while remaining > 0:
+        block = f.read(min(_READ_BYTES, remaining))
+        if not block:
+            break
+        count += block.count(byte)
+        remaining -= len(block)
+    return count
+
+
+class _Checker:
+    """Errors, missing fields and task ids found in one byte range."""
+
+    def __init__(self, fields: FrozenSet[str], ids: _IdRuns, max_errors: int):
+        self.fields = fields
+        self.ids = ids
+        self.max_errors = max_errors
+        self.total = 0
+        # (line number within the range, message)
+        self.errors: List[Tuple[int, str]] = []
+        self.missing: Dict[str, int] = {}
+        self.truncated = False
+
+    @property
+    def full(self) -> bool:
+        return len(self.errors) >= self.max_errors
+
+    def error(self, line_no: int, message: str) -> None:
+        self.errors.append((line_no, message))
+
+    def check(self, task: Any, line_no: int, offset: int) -> None:
+        if not isinstance(task, dict):
+            self.error(line_no, "任务必须是字典")
+            return
+        task_id = task.get("id")
+        if task_id:
+            self.ids.add(task_id, offset)
+        data = task.get("data", task)
+        if not isinstance(data, dict):
+            self.error(line_no, "data 必须是字典")
+        elif self.fields and not self.fields <= data.keys():
+            for name in self.fields - data.keys():
+                self.missing[name] = self.missing.get(name, 0) + 1
+
+
+class _Lines:
+    """Decoded lines of a binary file from ``start`` to ``end``, tracking position.
+
+    ``csv.reader`` pulls physical lines from here, so ``pos`` is the offset
+    of the next record and ``count`` the lines consumed so far.
+    """
+
+    def __init__(
+        self, f: IO[bytes], start: int, end: Optional[int], checker: Optional[_Checker] = None
+    ):
+        self.pos = start
+        self.count = 0
+        self._f = f
+        self._end = end
+        self._checker = checker
+        f.seek(start)
+
+    def __iter__(self) -> Iterator[str]:
+        while self._end is None or self.pos < self._end:
+            raw = self._f.readline()
+            if not raw:
+                return
+            self.pos += len(raw)
+            self.count += 1
+            try:
+                yield raw.decode("utf-8")
+            except UnicodeDecodeError:
+                if self._checker is not None:
+                    self._checker.error(self.count, "不是有效的 UTF-8")
+                yield raw.decode("utf-8", "replace")
+
+
+def _check_jsonl(f: IO[bytes], start: int, end: int, checker: _Checker) -> Tuple[int, int]:
+    """Check the JSONL lines in ``[start, end)``; returns (lines, bytes) read."""
+    f.seek(start)
+    offset = start
+    line_no = 0
+    for line in f:
+        line_no += 1
+        line_start = offset
+        offset += len(line)
+        if line.strip():
+            checker.total += 1
+            try:
+                task = jsonlib.loads(line)
+            except ValueError as e:
+                checker.error(line_no, f"JSON 解析失败 ({e})")
+            else:
+                checker.check(task, line_no, line_start)
+            if checker.full:
+                checker.truncated = True
+                break
+        if offset >= end:
+            break
+    return line_no, offset - start
+
+
+def _check_csv(
+    f: IO[bytes], start: int, end: int, header: List[str], checker: _Checker
+) -> Tuple[int, int]:
+    """Check the CSV records in ``[start, end)``; returns (lines, bytes) read."""
+    lines = _Lines(f, start, end, checker)
+    reader = csv.reader(lines)
+    while not checker.full:
+        record_start, line_no = lines.pos, lines.count + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            checker.total += 1
+            checker.error(line_no, f"CSV 格式错误 ({e})")
+            continue
+        if not row:
+            continue
+        checker.total += 1
+        if len(row) != len(header):
+            checker.error(line_no, f"列数 {len(row)} 与表头 {len(header)} 不一致")
+        else:
+            task = {name: csv_value(value) for name, value in zip(header, row)}
+            checker.check(task, line_no, record_start)
+    checker.truncated = checker.full
+    return lines.count, lines.pos - start
+
+
+def _csv_header(f: IO[bytes]) -> Tuple[List[str], int, int]:
+    """(column names, offset of the first record, lines taken by the header)."""
+    lines = _Lines(f, 0, None)
+    header = next(csv.reader(lines), [])
+    return header, lines.pos, lines.count
+
+
+def _plan_ranges(path: Path, fmt: str, start: int, n_ranges: int) -> List[Tuple[int, int]]:
+    """Cut ``[start, file size)`` into up to ``n_ranges`` ranges ending on record boundaries.
+
+    A range ends after a newline; for CSV only where an even number of quote
+    characters has been seen since ``start``, i.e. outside a quoted field.
+    """
+    size = path.stat().st_size
+    step = max(_MIN_RANGE_BYTES, -(-(size - start) // max(1, n_ranges)))
+    bounds = [start]
+    with open(path, "rb") as f:
+        counted, in_quotes = start, False
+        target = start + step
+        while target < size:
+            f.seek(target - 1)
+            boundary = target - 1 + len(f.readline())
+            if fmt == "csv":
+                in_quotes ^= bool(_count_bytes(f, counted, boundary, b'"') & 1)
+                while in_quotes and boundary < size:
+                    line = f.readline()
+                    in_quotes ^= bool(line.count(b'"') & 1)
+                    boundary += len(line)
+                counted = boundary
+            if boundary >= size:
+                break
+            bounds.append(boundary)
+            target = boundary + step
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _check_range(job: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Check one byte range of a task file (run in a worker process)."""
+    path, fmt, header, index, start, end, fields, max_errors, run_size, tmpdir = job
+    ids = _IdRuns(Path(tmpdir), run_size, prefix=f"ids_{index}")
+    checker = _Checker(fields, ids, max_errors)
+    with open(path, "rb") as f:
+        if fmt == "csv":
+            lines, nbytes = _check_csv(f, start, end, header, checker)
+        else:
+            lines, nbytes = _check_jsonl(f, start, end, checker)
+    ids.flush()
+    return {
+        "total": checker.total,
+        "lines": lines,
+        "bytes": nbytes,
+        "errors": checker.errors,
+        "missing": checker.missing,
+        "truncated": checker.truncated,
+        "runs": ids.runs,
+    }
+
+
+def _describe_offsets(
+    path: Union[str, Path], fmt: str, header: List[str], offsets: List[int]
+) -> List[Tuple[int, Any]]:
+    """(line number, task id) of the records starting at ``offsets``, in file order."""
+    described = []
+    line_no, position = 1, 0
+    with open(path, "rb") as f:
+        for offset in sorted(set(offsets)):
+            line_no += _count_bytes(f, position, offset)
+            position = offset
+            if fmt == "csv":
+                row = next(csv.reader(_Lines(f, offset, None)), [])
+                task_id = csv_value(dict(zip(header, row)).get("id"))
+            else:
+                task_id = jsonlib.loads(f.readline()).get("id")
+            described.append((line_no, task_id))
+    return described
+
+
+def validate_task_file(
+    path: Union[str, Path],
+    schema: Optional[Dict[str, Any]] = None,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    run_size: int = DEFAULT_RUN_SIZE,
+    tmp_dir: Optional[str] = None,
+    workers: Optional[int] = 1,
+    fmt: Optional[str] = None,
+) -> TaskFileReport:
+    """Validate a JSONL or CSV task file in bounded memory.
+
+    Args:
+        path: JSONL file (one task per line) or CSV file (header row, one task per record)
+        schema: Schema whose ``fields`` every task's ``data`` should have
+        max_errors: Stop after this many errors (at least 1)
+        run_size: Task ids held in memory per range before spilling a sorted run
+        tmp_dir: Where to put the run files (default: system temp dir)
+        workers: Processes checking byte ranges in parallel (None = CPU count)
+        fmt: ``jsonl`` or ``csv`` (default: ``csv`` for ``.csv`` files, else ``jsonl``)
+
+    Raises:
+        ValueError: Unsupported format
+    """
+    started = time.perf_counter()
+    path = Path(path)
+    if fmt is None:
+        fmt = "csv" if path.suffix.lower() == ".csv" else "jsonl"
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"不支持的格式: {fmt}")
+    workers = workers or os.cpu_count() or 1
+    max_errors = max(1, max_errors)
+    fields = compile_schema(schema).field_names if isinstance(schema, dict) else frozenset()
+
+    header: List[str] = []
+    data_start = header_lines = 0
+    if fmt == "csv":
+        with open(path, "rb") as f:
+            header, data_start, header_lines = _csv_header(f)
+
+    report = TaskFileReport(bytes_read=data_start)
+    with tempfile.TemporaryDirectory(prefix="datalabel-validate-", dir=tmp_dir) as tmpdir:
+        ranges = _plan_ranges(path, fmt, data_start, workers * _RANGES_PER_WORKER)
+        jobs = [
+            (str(path), fmt, header, i, start, end, fields, max_errors, run_size, tmpdir)
+            for i, (start, end) in enumerate(ranges)
+        ]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                results = list(pool.map(_check_range, jobs))
+        else:
+            results = map(_check_range, jobs)
+
+        # Ranges past the one that hit the error budget are dropped, as if
+        # the file had been read in one pass
+        runs: List[Path] = []
+        line_base = header_lines
+        for result in results:
+            for line_no, message in result["errors"]:
+                if len(report.errors) < max_errors:
+                    report.errors.append(f"第 {line_base + line_no} 行: {message}")
+            line_base += result["lines"]
+            report.total += result["total"]
+            report.bytes_read += result["bytes"]
+            runs.extend(result["runs"])
+            for name, count in result["missing"].items():
+                report.missing_fields[name] = report.missing_fields.get(name, 0) + count
+            if len(report.errors) >= max_errors:
+                report.truncated = True
+                break
+
+        budget = max_errors - len(report.errors)
+        if budget > 0:
+            # Duplicates arrive in hash order; keep the first ones in file order,
+            # holding at most budget + 1 offsets
+            offsets = heapq.nsmallest(budget + 1, _duplicate_offsets(runs))
+            if len(offsets) > budget:
+                report.truncated = True
+                offsets = offsets[:budget]
+            for line_no, task_id in _describe_offsets(path, fmt, header, offsets):
+                report.errors.append(f"第 {line_no} 行: 重复的任务 ID: {task_id}")
+
+    report.warnings.extend(missing_field_warnings(report.missing_fields))
+    if report.total == 0 and not report.errors:
+        report.warnings.append("任务列表为空")
+    report.valid = not report.errors
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,106 @@
+"""Shared Jinja environment for the HTML generators.
+
+All generators render from one ``Environment``, so each template is
+compiled at most once per process. Compiled templates are also kept in an
+on-disk bytecode cache: a fresh process (a CLI call, a new container)
+loads ``annotator.html`` from there in well under a millisecond instead of
+compiling it from source, which takes about 0.2 s. The static CSS/JS of a
+template is compiled into constant strings, so that is cached as well.
+
+The cache lives in ``$XDG_CACHE_HOME/datalabel/jinja`` (``~/.cache/...``).
+Set ``DATALABEL_TEMPLATE_CACHE`` to another directory, or to ``off`` to
+disable it. An unwritable cache directory only means no caching.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader, select_autoescape
+from jinja2.bccache import Bucket
+
+TEMPLATE_CACHE_ENV = "DATALABEL_TEMPLATE_CACHE"
+
+_environment: Optional[Environment] = None
+_lock = threading.Lock()
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """``FileSystemBytecodeCache`` that skips writes it cannot make."""
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def kappa_color(value: Any) -> str:
+    """Map kappa value to HSL color for heatmap cells."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return "hsl(0, 0%, 70%)"
+    v = max(-1.0, min(1.0, v))
+    # Map [-1, 1] → hue [0, 120] (red → green)
+    hue = int(60 * (v + 1))
+    return f"hsl({hue}, 70%, 42%)"
+
+
+def default_cache_dir() -> Optional[Path]:
+    """Bytecode cache directory from the environment; None if disabled."""
+    value = os.environ.get(TEMPLATE_CACHE_ENV)
+    if value is not None:
+        if value.strip().lower() in ("", "0", "off", "false", "no"):
+            return None
+        return Path(value).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        try:
+            base = Path.home() / ".cache"
+        except RuntimeError:  # no home directory
+            return None
+    return Path(base) / "datalabel" / "jinja"
+
+
+def create_environment(cache_dir: Union[str, Path, None] = None) -> Environment:
+    """Build a template environment, with a bytecode cache in ``cache_dir`` if given."""
+    bytecode_cache = None
+    if cache_dir is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            bytecode_cache = _BytecodeCache(str(cache_dir))
+        except OSError:
+            pass
+    env = Environment(
+        loader=PackageLoader("datalabel", "templates"),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=bytecode_cache,
+        # Packaged templates do not change while the process runs
+        auto_reload=False,
+    )
+    env.filters["kappa_color"] = kappa_color
+    return env
+
+
+def get_environment() -> Environment:
+    """The process-wide environment, created on first use."""
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                _environment = create_environment(default_cache_dir())
+    return _environment
+
+
+def warm_cache() -> List[str]:
+    """Compile every packaged template into the bytecode cache; returns their names.
+
+    Run once at image build time so containers start with a warm cache.
+    """
+    env = get_environment()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return names
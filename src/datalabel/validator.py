@@ -1,7 +1,12 @@
 """Schema and data validation for DataLabel."""
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from itertools import repeat
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 
 @dataclass
@@ -13,7 +18,9 @@ class ValidationResult:
     warnings: List[str] = field(default_factory=list)
 
 
-VALID_ANNOTATION_TYPES = {"scoring", "single_choice", "multi_choice", "text", "ranking", "multi_field"}
+VALID_ANNOTATION_TYPES = {
+    "scoring", "single_choice", "multi_choice", "text", "ranking", "multi_field",
+}
 
 # multi_field 子字段允许的类型
 VALID_FIELD_TYPES = {"number", "text", "single_choice", "multi_choice", "image_upload"}
@@ -24,6 +31,10 @@ FIELD_TYPES_REQUIRING_OPTIONS = {"single_choice", "multi_choice"}
 class SchemaValidator:
     """Validate schema and task data."""
 
+    def compile(self, schema: Dict[str, Any]) -> "CompiledSchema":
+        """Validate ``schema`` once and return its cached ``CompiledSchema``."""
+        return compile_schema(schema)
+
     def validate_schema(self, schema: Dict[str, Any]) -> ValidationResult:
         """Validate a schema definition."""
         result = ValidationResult()
@@ -74,32 +85,7 @@ class SchemaValidator:
         self, tasks: List[Dict[str, Any]], schema: Optional[Dict[str, Any]] = None
     ) -> ValidationResult:
         """Validate task data."""
-        result = ValidationResult()
-
-        if not isinstance(tasks, list):
-            result.valid = False
-            result.errors.append("任务数据必须是列表")
-            return result
-
-        if not tasks:
-            result.warnings.append("任务列表为空")
-            return result
-
-        seen_ids = set()
-        for i, task in enumerate(tasks):
-            if not isinstance(task, dict):
-                result.valid = False
-                result.errors.append(f"tasks[{i}] 必须是字典")
-                continue
-
-            task_id = task.get("id")
-            if task_id:
-                if task_id in seen_ids:
-                    result.valid = False
-                    result.errors.append(f"重复的任务 ID: {task_id}")
-                seen_ids.add(task_id)
-
-        return result
+        return check_tasks(tasks)
 
     def _validate_annotation_config(
         self, config: Any, result: ValidationResult
@@ -215,3 +201,340 @@ class SchemaValidator:
             if "score" not in item:
                 result.valid = False
                 result.errors.append(f"scoring_rubric[{i}] 缺少 score 字段")
+
+
+def _option_key(value: Any) -> Any:
+    """``value`` as the annotator page submits it.
+
+    The page reads option values back from ``data-value`` attributes, so
+    ``{"value": 1}`` comes back as ``"1"``; numbers and booleans are compared
+    by their JavaScript ``String()`` form so both spellings are accepted.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _option_values(options: Any) -> FrozenSet[Any]:
+    """Values an option list submits (``value``, else ``label``, as in the page)."""
+    values = set()
+    for opt in options or []:
+        if isinstance(opt, dict):
+            value = opt.get("value") or opt.get("label")
+            if value is not None:
+                values.add(_option_key(value))
+        else:
+            values.add(_option_key(opt))
+    return frozenset(values)
+
+
+def _rubric_scores(rubric: Any) -> FrozenSet[Any]:
+    """Scores defined by a scoring rubric."""
+    return frozenset(
+        item["score"] for item in rubric or [] if isinstance(item, dict) and "score" in item
+    )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_score(value: Any, scores: FrozenSet[Any]) -> Optional[str]:
+    if not _is_number(value):
+        return f"score 必须是数字: {value!r}"
+    if scores and value not in scores:
+        return f"score {value!r} 不在评分标准中"
+    return None
+
+
+def _check_choice(value: Any, options: FrozenSet[Any]) -> Optional[str]:
+    if isinstance(value, (list, dict)) or _option_key(value) not in options:
+        return f"无效的选项: {value!r}"
+    return None
+
+
+def _check_choices(value: Any, options: FrozenSet[Any]) -> Optional[str]:
+    if not isinstance(value, list):
+        return "choices 必须是列表"
+    for item in value:
+        if isinstance(item, (list, dict)) or _option_key(item) not in options:
+            return f"无效的选项: {item!r}"
+    return None
+
+
+def _check_ranking(value: Any, options: FrozenSet[Any]) -> Optional[str]:
+    if not isinstance(value, list):
+        return "ranking 必须是列表"
+    seen = set()
+    for item in value:
+        key = None if isinstance(item, (list, dict)) else _option_key(item)
+        if key is None or key not in options:
+            return f"ranking 中无效的选项: {item!r}"
+        if key in seen:
+            return f"ranking 中重复的选项: {item!r}"
+        seen.add(key)
+    return None
+
+
+def _check_text(value: Any, _: Any = None) -> Optional[str]:
+    if not isinstance(value, str):
+        return "text 必须是字符串"
+    return None
+
+
+def _check_number(value: Any, _: Any = None) -> Optional[str]:
+    if not _is_number(value):
+        return f"必须是数字: {value!r}"
+    return None
+
+
+def _check_upload(value: Any, _: Any = None) -> Optional[str]:
+    if isinstance(value, str) or (
+        isinstance(value, list) and all(isinstance(v, str) for v in value)
+    ):
+        return None
+    return "必须是字符串或字符串列表"
+
+
+def check_tasks(tasks: Any) -> ValidationResult:
+    """Check that ``tasks`` is a list of dicts with unique (non-empty) ids."""
+    result = ValidationResult()
+
+    if not isinstance(tasks, list):
+        result.valid = False
+        result.errors.append("任务数据必须是列表")
+        return result
+
+    if not tasks:
+        result.warnings.append("任务列表为空")
+        return result
+
+    # Fast path: every task a dict and no id repeated, so there is nothing to report
+    try:
+        ids = [task_id for task_id in map(dict.get, tasks, repeat("id")) if task_id]
+        if len(set(ids)) == len(ids):
+            return result
+    except TypeError:  # a task that is not a dict, or an unhashable id
+        pass
+
+    seen_ids = set()
+    for i, task in enumerate(tasks):
+        if not isinstance(task, dict):
+            result.valid = False
+            result.errors.append(f"tasks[{i}] 必须是字典")
+            continue
+
+        task_id = task.get("id")
+        if task_id:
+            if task_id in seen_ids:
+                result.valid = False
+                result.errors.append(f"重复的任务 ID: {task_id}")
+            seen_ids.add(task_id)
+
+    return result
+
+
+# multi_field sub-field type -> value check
+_FIELD_CHECKS: Dict[str, Callable[[Any, Any], Optional[str]]] = {
+    "number": _check_number,
+    "text": _check_text,
+    "single_choice": _check_choice,
+    "multi_choice": _check_choices,
+    "image_upload": _check_upload,
+}
+
+
+class ResponseValidator:
+    """Check submitted responses against one schema.
+
+    Built once per schema: the rubric scores, option values and multi_field
+    sub-fields become frozensets and dicts, so checking a response costs a
+    few hash lookups however large the schema is. Expects a schema that
+    passed ``SchemaValidator.validate_schema``.
+    """
+
+    __slots__ = ("annotation_type", "key", "scores", "options", "fields")
+
+    # annotation type -> response key holding the annotation
+    RESPONSE_KEYS = {
+        "scoring": "score",
+        "single_choice": "choice",
+        "multi_choice": "choices",
+        "ranking": "ranking",
+        "text": "text",
+        "multi_field": "fields",
+    }
+
+    def __init__(self, schema: Dict[str, Any]):
+        config = schema.get("annotation_config") or {}
+        self.annotation_type: str = config.get("type") or "scoring"
+        self.key = self.RESPONSE_KEYS[self.annotation_type]
+        self.scores = _rubric_scores(schema.get("scoring_rubric"))
+        self.options = _option_values(config.get("options"))
+        # multi_field: sub-field name -> (type, option values)
+        self.fields: Dict[str, Any] = {}
+        if self.annotation_type == "multi_field":
+            for f in config.get("fields") or []:
+                if isinstance(f, dict) and "name" in f:
+                    self.fields[f["name"]] = (f.get("type"), _option_values(f.get("options")))
+
+    def validate(self, response: Dict[str, Any]) -> Optional[str]:
+        """Error message for a malformed response, or None if it is valid."""
+        if self.key not in response:
+            return f"缺少 {self.key} 字段（标注类型 {self.annotation_type}）"
+        value = response[self.key]
+        annotation_type = self.annotation_type
+        if annotation_type == "scoring":
+            return _check_score(value, self.scores)
+        if annotation_type == "single_choice":
+            return _check_choice(value, self.options)
+        if annotation_type == "multi_choice":
+            return _check_choices(value, self.options)
+        if annotation_type == "ranking":
+            return _check_ranking(value, self.options)
+        if annotation_type == "text":
+            return _check_text(value)
+        return self._validate_fields(value)
+
+    def _validate_fields(self, values: Any) -> Optional[str]:
+        if not isinstance(values, dict):
+            return "fields 必须是字典"
+        for name, value in values.items():
+            spec = self.fields.get(name)
+            if spec is None:
+                return f"未知的字段: {name}"
+            if value is None:
+                continue
+            field_type, options = spec
+            check = _FIELD_CHECKS.get(field_type)
+            error = check(value, options) if check else None
+            if error:
+                return f"fields.{name} {error}"
+        return None
+
+
+# Compiled schemas, keyed by content hash, most recently used last
+_COMPILE_CACHE_SIZE = 256
+_compiled: "OrderedDict[str, CompiledSchema]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """sha256 of the schema's canonical JSON encoding.
+
+    Keys are sorted and separators fixed, so the hash depends neither on key
+    order nor on the JSON backend in use.
+    """
+    canonical = json.dumps(
+        schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def missing_field_warnings(missing: Dict[str, int]) -> List[str]:
+    """Warnings for tasks whose ``data`` lacks schema fields, from name -> task count."""
+    return [f"{count} 条任务的 data 缺少字段 {name}" for name, count in sorted(missing.items())]
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+class CompiledSchema:
+    """A schema validated once and reduced to lookup tables.
+
+    Immutable by convention: built by ``compile_schema`` and shared between
+    callers through its cache, so ``validation_result`` hands out copies.
+    Compiling walks the schema and builds the response validator; a cache
+    hit costs one JSON encoding of the schema, so callers that validate the
+    same schema repeatedly (per request, per schema id) should keep the
+    compiled object itself.
+    """
+
+    __slots__ = (
+        "key", "valid", "errors", "warnings", "annotation_type",
+        "field_names", "option_values", "rubric_scores", "_responses",
+    )
+
+    def __init__(self, schema: Dict[str, Any], key: str = ""):
+        result = SchemaValidator().validate_schema(schema)
+        self.key = key
+        self.valid = result.valid
+        self.errors: Tuple[str, ...] = tuple(result.errors)
+        self.warnings: Tuple[str, ...] = tuple(result.warnings)
+
+        config = schema.get("annotation_config")
+        config = config if isinstance(config, dict) else {}
+        fields = schema.get("fields")
+        self.annotation_type: str = config.get("type") or "scoring"
+        self.field_names: FrozenSet[str] = frozenset(
+            f["name"] for f in _as_list(fields) if isinstance(f, dict) and "name" in f
+        )
+        self._responses = ResponseValidator(schema) if self.valid else None
+        if self._responses is not None:
+            # Share the response validator's lookup sets rather than build them twice
+            self.option_values = self._responses.options
+            self.rubric_scores = self._responses.scores
+        else:
+            self.option_values = _option_values(_as_list(config.get("options")))
+            self.rubric_scores = _rubric_scores(_as_list(schema.get("scoring_rubric")))
+
+    @property
+    def responses(self) -> ResponseValidator:
+        """Validator for submitted responses.
+
+        Raises:
+            ValueError: The schema is invalid
+        """
+        if self._responses is None:
+            raise ValueError("Schema 验证失败:\n" + "\n".join(self.errors))
+        return self._responses
+
+    def validation_result(self) -> ValidationResult:
+        """A fresh ``ValidationResult`` for the schema."""
+        return ValidationResult(self.valid, list(self.errors), list(self.warnings))
+
+    def validate_tasks(self, tasks: List[Dict[str, Any]]) -> ValidationResult:
+        """Validate task data for this schema.
+
+        On top of ``check_tasks``, warns about tasks whose ``data`` (the task
+        itself when it has none) lacks one of ``field_names``, with the same
+        warnings ``validate_task_file`` gives.
+        """
+        result = check_tasks(tasks)
+        if not self.field_names or not isinstance(tasks, list):
+            return result
+        missing: Dict[str, int] = {}
+        for task in tasks:
+            data = task.get("data", task) if isinstance(task, dict) else None
+            if isinstance(data, dict) and not self.field_names <= data.keys():
+                for name in self.field_names - data.keys():
+                    missing[name] = missing.get(name, 0) + 1
+        result.warnings.extend(missing_field_warnings(missing))
+        return result
+
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """Compile ``schema``, or return the cached result for identical content.
+
+    Schemas that cannot be JSON-encoded are compiled without caching.
+    """
+    try:
+        key = schema_hash(schema)
+    except (TypeError, ValueError):
+        return CompiledSchema(schema)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+    compiled = CompiledSchema(schema, key)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > _COMPILE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
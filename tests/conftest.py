@@ -5,6 +5,16 @@ from pathlib import Path
 
 import pytest
 
+from datalabel.table import table_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_table_cache():
+    """Tests rewrite result files faster than mtime granularity; start each uncached."""
+    table_cache.clear()
+    yield
+    table_cache.clear()
+
 
 @pytest.fixture
 def sample_schema():
@@ -96,3 +106,17 @@ def annotator_results_factory():
         return files
 
     return _create
+
+
+@pytest.fixture
+def server_client(monkeypatch):
+    """TestClient for the FastAPI server, backed by a fresh in-memory submission store."""
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from server import submission_store
+    from server.main import app
+
+    monkeypatch.setattr(submission_store, "_store", submission_store.MemoryStore())
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,408 @@
+"""Tests for the integer-coded IAA kernels."""
+
+import json
+import random
+
+import pytest
+
+from datalabel import agreement
+from datalabel.agreement import MISSING, encode, encode_rows
+from datalabel.merger import ResultMerger
+
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not agreement.HAS_NUMPY, reason="numpy not installed"
+))]
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda v: "numpy" if v else "python")
+def use_numpy(request):
+    return request.param
+
+
+class TestEncode:
+    """Tests for label encoding."""
+
+    def test_codes_and_missing(self, use_numpy):
+        matrix = encode([{"T1": 3, "T2": 2}, {"T1": 3}], ["T1", "T2"], use_numpy=use_numpy)
+        assert matrix.n_tasks == 2
+        assert matrix.n_annotators == 2
+        assert matrix.categories == ["3", "2"]
+        codes = [list(map(int, row)) for row in matrix.codes]
+        assert codes == [[0, 0], [1, MISSING]]
+
+    def test_values_compared_as_strings(self, use_numpy):
+        matrix = encode_rows([[1, "1"], [("a",), ("a",)]], use_numpy=use_numpy)
+        assert matrix.n_categories == 2
+        assert agreement.exact_agreement_rate(matrix) == 1.0
+
+    def test_empty(self, use_numpy):
+        matrix = encode_rows([], use_numpy=use_numpy)
+        assert matrix.n_tasks == 0
+        assert agreement.fleiss_kappa(matrix) == 0.0
+        assert agreement.krippendorff_alpha(matrix) == 0.0
+
+
+class TestMetrics:
+    """Tests for agreement metrics on both backends."""
+
+    def test_known_values(self, use_numpy):
+        # Scores from the conftest annotators 1 and 2
+        matrix = encode_rows([[3, 3], [2, 1], [3, 3]], use_numpy=use_numpy)
+        assert agreement.exact_agreement_rate(matrix) == pytest.approx(2 / 3)
+        assert agreement.pairwise_agreement(matrix) == [[1.0, 2 / 3], [2 / 3, 1.0]]
+        assert agreement.cohens_kappa(matrix, 0, 1) == pytest.approx(0.4)
+        assert agreement.fleiss_kappa(matrix) == pytest.approx(1 / 3)
+        assert agreement.krippendorff_alpha(matrix) == pytest.approx(4 / 9)
+
+    def test_matches_reference_implementation(self, use_numpy):
+        """Randomised comparison with the straightforward per-pair formulas."""
+        rng = random.Random(7)
+        for _ in range(50):
+            n = rng.randint(1, 20)
+            m = rng.randint(2, 4)
+            rows = [[rng.choice("abc") for _ in range(m)] for _ in range(n)]
+            matrix = encode_rows(rows, use_numpy=use_numpy)
+            reference = encode_rows(rows, use_numpy=False)
+            assert agreement.fleiss_kappa(matrix) == pytest.approx(
+                agreement.fleiss_kappa(reference)
+            )
+            assert agreement.krippendorff_alpha(matrix) == pytest.approx(
+                agreement.krippendorff_alpha(reference)
+            )
+            for row, ref_row in zip(
+                agreement.pairwise_kappa(matrix), agreement.pairwise_kappa(reference)
+            ):
+                assert row == pytest.approx(ref_row)
+
+    def test_pairwise_ignores_missing(self, use_numpy):
+        matrix = encode(
+            [{"T1": "a", "T2": "b"}, {"T1": "a", "T2": "a"}, {"T1": "a"}],
+            ["T1", "T2"],
+            use_numpy=use_numpy,
+        )
+        agreement_matrix = agreement.pairwise_agreement(matrix)
+        assert agreement_matrix[0][1] == 0.5
+        assert agreement_matrix[0][2] == 1.0
+        # Only T1 is labelled by all three
+        assert agreement.exact_agreement_rate(matrix) == 1.0
+
+    def test_alpha_uses_partially_labelled_tasks(self, use_numpy):
+        complete = encode_rows([["a", "a"], ["b", "b"]], use_numpy=use_numpy)
+        partial = encode(
+            [{"T1": "a", "T2": "b", "T3": "a"}, {"T1": "a", "T2": "b"}],
+            ["T1", "T2", "T3"],
+            use_numpy=use_numpy,
+        )
+        # T3 has a single label and is not pairable
+        assert agreement.krippendorff_alpha(partial) == agreement.krippendorff_alpha(complete)
+
+    def test_merger_static_wrappers(self):
+        assert ResultMerger._cohens_kappa([3, 2, 3], [3, 1, 3]) == pytest.approx(0.4)
+        assert ResultMerger._fleiss_kappa([[3, 3], [2, 1], [3, 3]]) == pytest.approx(1 / 3)
+
+
+class TestPairwiseStats:
+    """Tests for the single-pass pairwise accumulator."""
+
+    @staticmethod
+    def _sparse_annotations(seed, n=30, m=4):
+        rng = random.Random(seed)
+        return [
+            {t: rng.choice("abc") for t in range(n) if rng.random() < 0.75} for _ in range(m)
+        ]
+
+    def test_matches_per_pair_kappa(self, use_numpy):
+        matrix = encode(self._sparse_annotations(1), range(30), use_numpy=use_numpy)
+        stats = agreement.pairwise_stats(matrix)
+        kappa = stats.kappa_matrix()
+        for i in range(4):
+            assert kappa[i][i] == 1.0
+            for j in range(4):
+                if i != j:
+                    assert kappa[i][j] == pytest.approx(agreement.cohens_kappa(matrix, i, j))
+
+    @pytest.mark.skipif(not agreement.HAS_NUMPY, reason="numpy not installed")
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_per_pair_fallback_matches_one_hot(self, monkeypatch, workers):
+        matrix = encode(self._sparse_annotations(2), range(30), use_numpy=True)
+        one_hot = agreement.pairwise_stats(matrix)
+        monkeypatch.setattr(agreement, "_ONE_HOT_MAX_CATEGORIES", 0)
+        per_pair = agreement.pairwise_stats(matrix, workers=workers)
+        assert per_pair.shared == one_hot.shared
+        assert per_pair.agree == one_hot.agree
+        assert per_pair.chance == one_hot.chance
+
+    def test_backends_agree(self):
+        annotations = self._sparse_annotations(3)
+        python = agreement.pairwise_stats(encode(annotations, range(30), use_numpy=False))
+        if agreement.HAS_NUMPY:
+            numpy_stats = agreement.pairwise_stats(encode(annotations, range(30), use_numpy=True))
+            assert numpy_stats.shared == python.shared
+            assert numpy_stats.agree == python.agree
+            assert numpy_stats.chance == python.chance
+
+    def test_no_shared_tasks(self, use_numpy):
+        matrix = encode([{"T1": "a"}, {"T2": "a"}], ["T1", "T2"], use_numpy=use_numpy)
+        stats = agreement.pairwise_stats(matrix)
+        assert stats.agreement_matrix() == [[1.0, 0.0], [0.0, 1.0]]
+        assert stats.kappa_matrix() == [[1.0, 0.0], [0.0, 1.0]]
+
+
+# Krippendorff (2011), "Computing Krippendorff's Alpha-Reliability": 4 coders, 12 units
+_KRIPPENDORFF_EXAMPLE = [
+    [1, 2, 3, 3, 2, 1, 4, 1, 2, None, None, None],
+    [1, 2, 3, 3, 2, 2, 4, 1, 2, 5, None, 3],
+    [None, 3, 3, 3, 2, 3, 4, 2, 2, 5, 1, None],
+    [1, 2, 3, 3, 2, 4, 4, 1, 2, 5, 1, None],
+]
+
+
+def _coder_annotations(coders):
+    return [{t: v for t, v in enumerate(row) if v is not None} for row in coders]
+
+
+class TestKrippendorffAlpha:
+    """Krippendorff's alpha metrics on sparse unit counts."""
+
+    @pytest.mark.parametrize(
+        "metric, expected",
+        [("nominal", 0.743), ("ordinal", 0.815), ("interval", 0.849), ("ratio", 0.797)],
+    )
+    def test_published_example(self, use_numpy, metric, expected):
+        units = agreement.encode_units(
+            _coder_annotations(_KRIPPENDORFF_EXAMPLE), use_numpy=use_numpy
+        )
+        assert agreement.krippendorff_alpha(units, metric) == pytest.approx(expected, abs=5e-4)
+
+    @pytest.mark.parametrize("metric", agreement.ALPHA_METRICS)
+    def test_dense_and_sparse_agree(self, use_numpy, metric):
+        rng = random.Random(11)
+        rows = [[rng.choice(["0", "1", "2", "4"]) for _ in range(5)] for _ in range(60)]
+        dense = encode_rows(rows, use_numpy=use_numpy)
+        sparse = agreement.encode_units(
+            [{t: row[a] for t, row in enumerate(rows)} for a in range(5)], use_numpy=use_numpy
+        )
+        assert agreement.krippendorff_alpha(dense, metric) == pytest.approx(
+            agreement.krippendorff_alpha(sparse, metric)
+        )
+
+    def test_backends_agree(self):
+        if not agreement.HAS_NUMPY:
+            pytest.skip("numpy not installed")
+        rng = random.Random(5)
+        anns = [
+            {t: rng.randint(0, 9) for t in range(200) if rng.random() < 0.3} for _ in range(8)
+        ]
+        for metric in agreement.ALPHA_METRICS:
+            assert agreement.krippendorff_alpha(
+                agreement.encode_units(anns, use_numpy=True), metric
+            ) == pytest.approx(
+                agreement.krippendorff_alpha(agreement.encode_units(anns, use_numpy=False), metric)
+            )
+
+    def test_non_numeric_labels_rejected(self, use_numpy):
+        units = agreement.encode_units([{"T1": "a"}, {"T1": "b"}], use_numpy=use_numpy)
+        assert agreement.krippendorff_alpha(units, "nominal") == pytest.approx(-0.0)
+        with pytest.raises(ValueError, match="numeric"):
+            agreement.krippendorff_alpha(units, "interval")
+
+    def test_unknown_metric(self, use_numpy):
+        units = agreement.encode_units([{"T1": 1}, {"T1": 1}], use_numpy=use_numpy)
+        with pytest.raises(ValueError, match="Unknown"):
+            agreement.krippendorff_alpha(units, "cosine")
+
+    def test_no_pairable_units(self, use_numpy):
+        units = agreement.encode_units([{"T1": 1}, {"T2": 2}], use_numpy=use_numpy)
+        assert agreement.krippendorff_alpha(units, "interval") == 0.0
+
+    def test_calculate_iaa_alpha_metric(self, tmp_path):
+        paths = []
+        for i, coder in enumerate(_KRIPPENDORFF_EXAMPLE):
+            responses = [
+                {"task_id": f"T{t}", "score": v} for t, v in enumerate(coder) if v is not None
+            ]
+            path = tmp_path / f"ann_{i}.json"
+            path.write_text(json.dumps({"responses": responses}), encoding="utf-8")
+            paths.append(str(path))
+
+        merger = ResultMerger()
+        metrics = merger.calculate_iaa(paths, alpha_metric="interval")
+        assert metrics["alpha_metric"] == "interval"
+        # Alpha sees all 12 units even though only 8 are labelled by every coder
+        assert metrics["common_tasks"] == 8
+        assert metrics["krippendorff_alpha"] == pytest.approx(0.849, abs=5e-4)
+
+        assert "error" in merger.calculate_iaa(paths, alpha_metric="cosine")
+
+
+class TestBootstrap:
+    """Bootstrap confidence intervals."""
+
+    def _data(self, use_numpy):
+        anns = _coder_annotations(_KRIPPENDORFF_EXAMPLE)
+        common = sorted(set.intersection(*(set(a) for a in anns)))
+        return (
+            encode(anns, common, use_numpy=use_numpy),
+            agreement.encode_units(anns, use_numpy=use_numpy),
+        )
+
+    def test_intervals_bracket_estimates(self, use_numpy):
+        matrix, units = self._data(use_numpy)
+        result = agreement.bootstrap_intervals(
+            matrix, units, replicates=200, seed=3, workers=1, alpha_metric="interval"
+        )
+        assert result["replicates"] == 200
+        assert result["seed"] == 3
+        intervals = result["intervals"]
+        alpha = agreement.krippendorff_alpha(units, "interval")
+        assert intervals["krippendorff_alpha"]["lower"] <= alpha
+        assert alpha <= intervals["krippendorff_alpha"]["upper"]
+        fleiss = agreement.fleiss_kappa(matrix)
+        assert intervals["fleiss_kappa"]["lower"] <= fleiss <= intervals["fleiss_kappa"]["upper"]
+        kappa = intervals["cohens_kappa"]
+        assert len(kappa["lower"]) == 4
+        assert kappa["lower"][0][0] == kappa["upper"][0][0] == 1.0
+        assert kappa["lower"][0][1] <= kappa["upper"][0][1]
+
+    def test_deterministic_across_workers(self, use_numpy):
+        matrix, units = self._data(use_numpy)
+        serial = agreement.bootstrap_intervals(matrix, units, replicates=30, seed=9, workers=1)
+        parallel = agreement.bootstrap_intervals(matrix, units, replicates=30, seed=9, workers=2)
+        assert serial == parallel
+
+    def test_random_seed_is_reported(self, use_numpy):
+        matrix, units = self._data(use_numpy)
+        result = agreement.bootstrap_intervals(matrix, units, replicates=5, workers=1)
+        again = agreement.bootstrap_intervals(
+            matrix, units, replicates=5, seed=result["seed"], workers=1
+        )
+        assert again == result
+
+    def test_invalid_arguments(self, use_numpy):
+        matrix, units = self._data(use_numpy)
+        with pytest.raises(ValueError):
+            agreement.bootstrap_intervals(matrix, units, replicates=0)
+        with pytest.raises(ValueError):
+            agreement.bootstrap_intervals(matrix, units, confidence=1.5)
+
+    def test_calculate_iaa_bootstrap(self, tmp_path):
+        paths = []
+        for i, coder in enumerate(_KRIPPENDORFF_EXAMPLE):
+            responses = [
+                {"task_id": f"T{t}", "score": v} for t, v in enumerate(coder) if v is not None
+            ]
+            path = tmp_path / f"ann_{i}.json"
+            path.write_text(json.dumps({"responses": responses}), encoding="utf-8")
+            paths.append(str(path))
+
+        merger = ResultMerger()
+        assert "bootstrap" not in merger.calculate_iaa(paths)
+        metrics = merger.calculate_iaa(paths, bootstrap=20, seed=1, workers=1)
+        assert set(metrics["bootstrap"]["intervals"]) == {
+            "exact_agreement_rate",
+            "fleiss_kappa",
+            "krippendorff_alpha",
+            "cohens_kappa",
+        }
+        assert "error" in merger.calculate_iaa(paths, bootstrap=20, confidence=2.0)
+
+
+class TestAgreementState:
+    """Incremental agreement statistics."""
+
+    def _write(self, tmp_path, per_annotator):
+        paths = []
+        for i, labels in enumerate(per_annotator):
+            path = tmp_path / f"ann_{i}.json"
+            responses = [{"task_id": tid, "score": v} for tid, v in labels.items()]
+            path.write_text(json.dumps({"responses": responses}), encoding="utf-8")
+            paths.append(str(path))
+        return paths
+
+    def _random_labels(self, seed, annotators=4, tasks=60):
+        rng = random.Random(seed)
+        return [
+            {f"T{t}": rng.choice([1, 2, 3, 5]) for t in range(tasks) if rng.random() < 0.8}
+            for _ in range(annotators)
+        ]
+
+    def _assert_same_metrics(self, expected, actual):
+        assert expected.keys() == actual.keys()
+        for key, value in expected.items():
+            if key in ("pairwise_agreement", "cohens_kappa"):
+                for row, other in zip(value, actual[key]):
+                    assert row == pytest.approx(other)
+            elif isinstance(value, float):
+                assert actual[key] == pytest.approx(value)
+            else:
+                assert actual[key] == value
+
+    @pytest.mark.parametrize("metric", agreement.ALPHA_METRICS)
+    def test_matches_calculate_iaa(self, tmp_path, metric):
+        paths = self._write(tmp_path, self._random_labels(1))
+        merger = ResultMerger()
+        state = merger.build_agreement_state(paths)
+        self._assert_same_metrics(
+            merger.calculate_iaa(paths, alpha_metric=metric), state.metrics(metric)
+        )
+
+    def test_deltas_match_rebuild(self):
+        labels = self._random_labels(2)
+        state = agreement.AgreementState()
+        for name, ann in zip("abcd", labels):
+            state.update(name, ann)
+
+        rng = random.Random(3)
+        for _ in range(200):
+            name = rng.choice("abcd")
+            idx = "abcd".index(name)
+            tid = f"T{rng.randrange(70)}"
+            if rng.random() < 0.2:
+                labels[idx].pop(tid, None)
+                state.remove(name, [tid])
+            else:
+                labels[idx][tid] = rng.choice([1, 2, 3, 5, 8])
+                state.update(name, {tid: labels[idx][tid]})
+
+        rebuilt = agreement.AgreementState()
+        for name, ann in zip("abcd", labels):
+            rebuilt.update(name, ann)
+        for metric in agreement.ALPHA_METRICS:
+            self._assert_same_metrics(rebuilt.metrics(metric), state.metrics(metric))
+        # Same counts; only the task order of the label list may differ
+        snapshot, expected = state.to_dict(), rebuilt.to_dict()
+        assert dict(map(tuple, snapshot.pop("labels"))) == dict(map(tuple, expected.pop("labels")))
+        assert snapshot == expected
+
+    def test_new_annotator_has_no_common_tasks(self):
+        state = agreement.AgreementState()
+        state.update("a", {"T1": 1, "T2": 2})
+        state.update("b", {"T1": 1, "T2": 2})
+        assert state.common_tasks == 2
+        state.update("c", {"T1": 1})
+        assert state.common_tasks == 1
+        assert state.metrics()["exact_agreement_rate"] == 1.0
+
+    def test_errors(self):
+        state = agreement.AgreementState()
+        state.update("a", {"T1": 1})
+        assert "error" in state.metrics()
+        state.update("b", {"T2": 1})
+        assert "error" in state.metrics()
+        state.update("b", {"T1": "x"})
+        assert "numeric" in state.metrics("interval")["error"]
+
+    def test_serialization_round_trip(self, tmp_path):
+        state = agreement.AgreementState()
+        for name, ann in zip("abc", self._random_labels(4, annotators=3)):
+            state.update(name, ann)
+        path = tmp_path / "state.json"
+        state.save(str(path))
+        restored = agreement.AgreementState.load(str(path))
+        assert restored.metrics("ordinal") == state.metrics("ordinal")
+        restored.update("a", {"T0": 8})
+        state.update("a", {"T0": 8})
+        assert restored.to_dict() == state.to_dict()
+
+        with pytest.raises(ValueError, match="version"):
+            agreement.AgreementState.from_dict({"version": 99})
@@ -5,6 +5,7 @@ import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
 from click.testing import CliRunner
 
 from datalabel.cli import main
@@ -89,6 +90,56 @@ class TestCLI:
             assert "合并成功" in result.output
             assert output_path.exists()
 
+    @pytest.mark.parametrize(
+        "extra_args",
+        [
+            ["--stream", "--buffer-size", "2"],
+            ["--workers", "2"],
+            ["--stream", "--workers", "2"],
+            ["--compact"],
+            ["--stream", "--compact"],
+        ],
+    )
+    def test_merge_command_options(
+        self, annotator1_results, annotator2_results, annotator_results_factory, extra_args
+    ):
+        """Test merge command in streaming and parallel modes."""
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [annotator1_results, annotator2_results])
+            output_path = Path(tmpdir) / "merged.json"
+
+            result = runner.invoke(main, ["merge", *files, "-o", str(output_path), *extra_args])
+
+            assert result.exit_code == 0
+            assert "冲突数: 1" in result.output
+            merged = json.loads(output_path.read_text())
+            assert len(merged["responses"]) == 3
+
+    def test_json_backend_option(
+        self, annotator1_results, annotator2_results, annotator_results_factory
+    ):
+        """--json-backend selects the JSON codec; unknown names are rejected."""
+        from datalabel import jsonlib
+
+        runner = CliRunner()
+        previous = jsonlib.backend
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                files = annotator_results_factory(tmpdir, [annotator1_results, annotator2_results])
+                output_path = Path(tmpdir) / "merged.json"
+                result = runner.invoke(
+                    main, ["--json-backend", "json", "merge", *files, "-o", str(output_path)]
+                )
+                assert result.exit_code == 0
+                assert jsonlib.backend == "json"
+
+            result = runner.invoke(main, ["--json-backend", "ujson", "merge", "--help"])
+            assert result.exit_code != 0
+        finally:
+            jsonlib.set_backend(previous)
+
     def test_merge_requires_two_files(self, annotator1_results, annotator_results_factory):
         """Test merge command fails with less than 2 files."""
         runner = CliRunner()
@@ -119,6 +170,37 @@ class TestCLI:
             assert "一致性" in result.output
             assert "一致率" in result.output
 
+    def test_iaa_alpha_metric(
+        self, annotator1_results, annotator2_results, annotator_results_factory
+    ):
+        """Test iaa command with an interval alpha metric."""
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [annotator1_results, annotator2_results])
+
+            result = runner.invoke(main, ["iaa", *files, "--alpha-metric", "interval"])
+
+            assert result.exit_code == 0
+            assert "Krippendorff's Alpha (interval)" in result.output
+
+    def test_iaa_bootstrap(
+        self, annotator1_results, annotator2_results, annotator_results_factory
+    ):
+        """Test iaa command with bootstrap confidence intervals."""
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [annotator1_results, annotator2_results])
+
+            result = runner.invoke(
+                main, ["iaa", *files, "--bootstrap", "50", "--seed", "7", "--workers", "1"]
+            )
+
+            assert result.exit_code == 0
+            assert "50 次 bootstrap, seed=7" in result.output
+            assert "Cohen's Kappa 置信区间" in result.output
+
     def test_iaa_requires_two_files(self, annotator1_results, annotator_results_factory):
         """Test iaa command fails with less than 2 files."""
         runner = CliRunner()
@@ -241,6 +323,18 @@ class TestCLI:
             assert data[0]["id"] == "T1"
             assert data[0]["text"] == "hello"
 
+    def test_import_tasks_bad_jsonl(self, tmp_path):
+        input_path = tmp_path / "tasks.jsonl"
+        input_path.write_text('{"id": "T1"}\nnot json\n')
+        output_path = tmp_path / "imported.json"
+
+        result = CliRunner().invoke(
+            main, ["import-tasks", str(input_path), "-o", str(output_path), "--compact"]
+        )
+        assert result.exit_code == 1
+        assert "错误" in result.output
+        assert not output_path.exists()
+
 
 class TestValidateCommand:
     """Tests for validate command."""
@@ -432,6 +526,98 @@ class TestCreateEdgeCases:
             assert result.exit_code == 0
             assert "创建成功" in result.output
 
+    def test_create_with_chunk_size(self, sample_schema, sample_tasks):
+        """Test create --chunk-size writes task chunks next to the HTML."""
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            schema_path = Path(tmpdir) / "schema.json"
+            tasks_path = Path(tmpdir) / "tasks.json"
+            output_path = Path(tmpdir) / "annotator.html"
+
+            schema_path.write_text(json.dumps(sample_schema, ensure_ascii=False))
+            tasks_path.write_text(json.dumps(sample_tasks, ensure_ascii=False))
+
+            result = runner.invoke(
+                main,
+                [
+                    "create",
+                    str(schema_path),
+                    str(tasks_path),
+                    "-o",
+                    str(output_path),
+                    "--chunk-size",
+                    "1",
+                ],
+            )
+
+            assert result.exit_code == 0
+            assert "任务分片: 2 个" in result.output
+            assert (Path(tmpdir) / "annotator_tasks" / "chunk_00001.js").exists()
+
+    def test_create_sharded_then_merge_with_manifest(self, sample_schema, sample_tasks):
+        """Test create --shard-size and merge/dashboard --manifest."""
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            schema_path = Path(tmpdir) / "schema.json"
+            tasks_path = Path(tmpdir) / "tasks.json"
+            out_dir = Path(tmpdir) / "bundles"
+
+            schema_path.write_text(json.dumps(sample_schema, ensure_ascii=False))
+            tasks_path.write_text(json.dumps(sample_tasks, ensure_ascii=False))
+
+            result = runner.invoke(
+                main,
+                [
+                    "create",
+                    str(schema_path),
+                    str(tasks_path),
+                    "-o",
+                    str(out_dir),
+                    "--shard-size",
+                    "1",
+                    "--annotators",
+                    "ann1, ann2",
+                    "--per-shard",
+                    "2",
+                ],
+            )
+            assert result.exit_code == 0, result.output
+            assert "2 个分片, 4 个标注包" in result.output
+            manifest_path = out_dir / "manifest.json"
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+            result_files = []
+            for shard, task in enumerate(sample_tasks):
+                for annotator, score in (("ann1", 4), ("ann2", 4 + shard)):
+                    path = Path(tmpdir) / f"{annotator}_{shard}.json"
+                    metadata = {"manifest_id": manifest["id"], "shard": shard,
+                                "annotator": annotator}
+                    responses = [{"task_id": task["id"], "score": score}]
+                    path.write_text(json.dumps({"metadata": metadata, "responses": responses}))
+                    result_files.append(str(path))
+
+            merged_path = Path(tmpdir) / "merged.json"
+            result = runner.invoke(
+                main,
+                ["merge", "--manifest", str(manifest_path), "-o", str(merged_path)]
+                + result_files[:3],
+            )
+            assert result.exit_code == 0, result.output
+            assert "1 个标注包尚无结果" in result.output
+            assert "标注员数: 2" in result.output
+            merged = json.loads(merged_path.read_text(encoding="utf-8"))
+            assert merged["metadata"]["annotator_count"] == 2
+
+            result = runner.invoke(
+                main,
+                ["dashboard", "--manifest", str(manifest_path),
+                 "-o", str(Path(tmpdir) / "dash.html")] + result_files,
+            )
+            assert result.exit_code == 0, result.output
+            assert "标注员数: 2" in result.output
+
     def test_create_invalid_schema(self, sample_tasks):
         """Test create with invalid schema → failure."""
         runner = CliRunner()
@@ -590,6 +776,45 @@ class TestValidateTaskWarnings:
             assert result.exit_code == 0
             assert "警告" in result.output
 
+    def test_validate_jsonl_streaming(self, sample_schema, sample_tasks, tmp_path):
+        """JSONL task files are checked line by line, with throughput."""
+        schema_path = tmp_path / "schema.json"
+        tasks_path = tmp_path / "tasks.jsonl"
+        schema_path.write_text(json.dumps(sample_schema, ensure_ascii=False))
+        tasks_path.write_text(
+            "".join(json.dumps(t, ensure_ascii=False) + "\n" for t in sample_tasks)
+        )
+
+        result = CliRunner().invoke(main, ["validate", str(schema_path), "-t", str(tasks_path)])
+        assert result.exit_code == 0
+        assert f"验证通过 ({len(sample_tasks)} 条" in result.output
+        assert "条/秒" in result.output
+
+    def test_validate_jsonl_error_budget(self, sample_schema, tmp_path):
+        schema_path = tmp_path / "schema.json"
+        tasks_path = tmp_path / "tasks.jsonl"
+        schema_path.write_text(json.dumps(sample_schema, ensure_ascii=False))
+        tasks_path.write_text("not json\n" * 20)
+
+        result = CliRunner().invoke(
+            main, ["validate", str(schema_path), "-t", str(tasks_path), "--max-errors", "5"]
+        )
+        assert result.exit_code == 1
+        assert result.output.count("JSON 解析失败") == 5
+        assert "错误上限 (5)" in result.output
+
+    def test_validate_csv_workers(self, sample_schema, tmp_path):
+        schema_path = tmp_path / "schema.json"
+        tasks_path = tmp_path / "tasks.csv"
+        schema_path.write_text(json.dumps(sample_schema, ensure_ascii=False))
+        tasks_path.write_text("id,text\nT1,a\nT2,b\nT1,c\n", encoding="utf-8")
+
+        result = CliRunner().invoke(
+            main, ["validate", str(schema_path), "-t", str(tasks_path), "--workers", "2"]
+        )
+        assert result.exit_code == 1
+        assert "第 4 行: 重复的任务 ID: T1" in result.output
+
 
 class TestLLMCommands:
     """Tests for LLM CLI commands with mocking."""
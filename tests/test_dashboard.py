@@ -102,6 +102,26 @@ class TestDashboardGenerate:
         content = Path(output).read_text(encoding="utf-8")
         assert "我的仪表盘" in content
 
+    def test_agreement_state(self, dashboard_gen, scoring_results_pair, tmp_path):
+        from datalabel.merger import ResultMerger
+
+        state = ResultMerger().build_agreement_state(scoring_results_pair)
+        fresh = tmp_path / "fresh.html"
+        cached = tmp_path / "cached.html"
+        dashboard_gen.generate(result_files=scoring_results_pair, output_path=str(fresh))
+        result = dashboard_gen.generate(
+            result_files=scoring_results_pair,
+            output_path=str(cached),
+            agreement_state=state,
+        )
+        assert result.success
+
+        def strip_timestamp(path):
+            return [line for line in path.read_text(encoding="utf-8").splitlines()
+                    if "generated" not in line.lower() and "生成" not in line]
+
+        assert strip_timestamp(cached) == strip_timestamp(fresh)
+
     def test_single_annotator(self, dashboard_gen, tmp_path):
         ann1 = {
             "metadata": {"annotator": "solo"},
@@ -0,0 +1,158 @@
+"""Tests for pushing stored submissions to antgather through a stand-in receiver."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from server import submission_store as store_module
+from server.submission_store import MemoryStore
+
+httpx = pytest.importorskip("httpx")
+Dispatcher = pytest.importorskip("server.dispatcher").Dispatcher
+
+URL = "http://antgather.test/api/datalabel/submissions"
+
+
+def _records(n):
+    return [
+        {
+            "submission_id": f"S{i}",
+            "task_id": f"T{i}",
+            "submitted_at": f"2026-01-01T00:00:{i:02d}",
+            "score": i,
+        }
+        for i in range(n)
+    ]
+
+
+class Receiver:
+    """Stand-in antgather endpoint: records the batches and answers with ``status``."""
+
+    def __init__(self, status=200, error=None):
+        self.status = status
+        self.error = error
+        self.batches = []
+
+    def __call__(self, request):
+        if self.error is not None:
+            raise self.error
+        self.batches.append(json.loads(request.content)["submissions"])
+        return httpx.Response(self.status)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(store_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def store():
+    store = MemoryStore()
+    store.add(_records(3))
+    return store
+
+
+def _run(dispatcher, receiver, steps):
+    """Start ``dispatcher`` against ``receiver``, run ``steps(dispatcher)`` and stop."""
+
+    async def main():
+        await dispatcher.start(transport=httpx.MockTransport(receiver))
+        try:
+            return await steps(dispatcher)
+        finally:
+            await dispatcher.stop()
+
+    return asyncio.run(main())
+
+
+class TestDispatchOnce:
+    def test_delivered_batch_is_deleted(self, store, clock):
+        receiver = Receiver()
+        dispatcher = Dispatcher(store, URL, batch_size=2, interval=60)
+
+        async def steps(d):
+            return [await d.dispatch_once(), await d.dispatch_once(), await d.dispatch_once()]
+
+        assert _run(dispatcher, receiver, steps) == [2, 1, 0]
+        assert receiver.batches == [_records(3)[:2], _records(3)[2:]]
+        assert store.count() == 0
+        assert dispatcher.delivered == 3
+        assert dispatcher.batches == 2
+        assert dispatcher.consecutive_failures == 0
+
+    @pytest.mark.parametrize("receiver", [
+        Receiver(status=503),
+        Receiver(error=httpx.ConnectError("refused")),
+        Receiver(error=RuntimeError("broken transport")),
+    ], ids=["5xx", "connect-error", "other-error"])
+    def test_failure_releases_batch_with_backoff(self, store, clock, receiver):
+        dispatcher = Dispatcher(store, URL, batch_size=10, interval=60)
+
+        async def steps(d):
+            delivered = await d.dispatch_once()
+            # Backed off: nothing is due right away
+            retried_too_soon = await d.dispatch_once()
+            return delivered, retried_too_soon
+
+        assert _run(dispatcher, receiver, steps) == (0, 0)
+        assert store.count() == 3
+        stats = store.outbox_stats()
+        assert stats["retrying"] == 3
+        assert stats["max_attempts"] == 1
+        assert dispatcher.failed_batches == 1
+        assert dispatcher.consecutive_failures == 1
+        assert dispatcher.last_error
+
+        # The first retry is due within one second (jittered 2**0)
+        clock[0] += 1.01
+        receiver.status, receiver.error = 200, None
+        assert _run(dispatcher, receiver, lambda d: d.dispatch_once()) == 3
+        assert store.count() == 0
+        assert dispatcher.consecutive_failures == 0
+
+    def test_expired_lease_is_claimed_again(self, store, clock):
+        receiver = Receiver()
+        dispatcher = Dispatcher(store, URL, batch_size=10, interval=60, lease=300)
+
+        # Another worker claims the batch and dies before delivering it
+        assert len(store.claim(10, dispatcher.lease)) == 3
+        assert _run(dispatcher, receiver, lambda d: d.dispatch_once()) == 0
+
+        clock[0] += dispatcher.lease + 1
+        assert _run(dispatcher, receiver, lambda d: d.dispatch_once()) == 3
+        assert store.count() == 0
+
+    def test_backoff_is_capped(self):
+        dispatcher = Dispatcher(MemoryStore(), URL, max_backoff=30)
+        dispatcher.consecutive_failures = 20
+        assert 15 <= dispatcher._backoff() <= 30
+
+
+class TestLoop:
+    def test_full_batch_wakes_the_loop(self, clock):
+        store = MemoryStore()
+        receiver = Receiver()
+        dispatcher = Dispatcher(store, URL, batch_size=2, interval=60)
+
+        async def steps(d):
+            store.add(_records(4))
+            d.notify(4)
+            for _ in range(200):
+                if not store.count():
+                    break
+                await asyncio.sleep(0.01)
+            return store.count()
+
+        assert _run(dispatcher, receiver, steps) == 0
+        assert [len(batch) for batch in receiver.batches] == [2, 2]
+
+    def test_stats(self, store):
+        dispatcher = Dispatcher(store, URL)
+        stats = asyncio.run(dispatcher.stats())
+        assert stats["enabled"] is False
+        assert stats["queue_depth"] == 3
+        assert stats["in_flight"] == 0
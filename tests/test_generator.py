@@ -1,10 +1,13 @@
 """Tests for AnnotatorGenerator."""
 
 import json
+import re
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from datalabel import AnnotatorGenerator
 
 
@@ -369,6 +372,203 @@ class TestAnnotatorGenerator:
             assert "toggleShortcutModal" in content
 
 
+class TestChunkedTasks:
+    """Tests for lazily loaded task chunks (chunk_size)."""
+
+    @staticmethod
+    def _tasks(n):
+        return [{"id": f"T{i}", "data": {"question": f"问题 {i}"}} for i in range(n)]
+
+    def test_chunks_written(self, sample_schema, tmp_path):
+        output_path = tmp_path / "annotator.html"
+        result = AnnotatorGenerator().generate(
+            schema=sample_schema, tasks=self._tasks(5), output_path=str(output_path), chunk_size=2
+        )
+
+        assert result.success
+        assert result.task_count == 5
+        assert result.chunk_count == 3
+        chunk_dir = tmp_path / "annotator_tasks"
+        assert sorted(p.name for p in chunk_dir.iterdir()) == [
+            "chunk_00000.js", "chunk_00001.js", "chunk_00002.js"
+        ]
+        last = (chunk_dir / "chunk_00002.js").read_text(encoding="utf-8")
+        assert last.startswith("window.DataLabelChunk(2,")
+        assert json.loads(last[len("window.DataLabelChunk(2,"):-len(");\n")])[0]["id"] == "T4"
+
+    def test_html_embeds_only_ids(self, sample_schema, tmp_path):
+        output_path = tmp_path / "annotator.html"
+        AnnotatorGenerator().generate(
+            schema=sample_schema, tasks=self._tasks(5), output_path=str(output_path), chunk_size=2
+        )
+
+        content = output_path.read_text(encoding="utf-8")
+        assert '"T4"' in content
+        assert "问题" not in content
+        assert '{"dir":"annotator_tasks","size":2}' in content.replace(" ", "")
+
+    def test_stale_chunks_removed(self, sample_schema, tmp_path):
+        output_path = tmp_path / "annotator.html"
+        generator = AnnotatorGenerator()
+        generator.generate(
+            schema=sample_schema, tasks=self._tasks(5), output_path=str(output_path), chunk_size=1
+        )
+        result = generator.generate(
+            schema=sample_schema, tasks=self._tasks(5), output_path=str(output_path), chunk_size=5
+        )
+
+        assert result.chunk_count == 1
+        assert [p.name for p in (tmp_path / "annotator_tasks").iterdir()] == ["chunk_00000.js"]
+
+    def test_invalid_chunk_size(self, sample_schema, sample_tasks, tmp_path):
+        result = AnnotatorGenerator().generate(
+            schema=sample_schema,
+            tasks=sample_tasks,
+            output_path=str(tmp_path / "annotator.html"),
+            chunk_size=0,
+        )
+
+        assert not result.success
+        assert "chunk_size" in result.error
+
+    def test_inline_by_default(self, sample_schema, sample_tasks, tmp_path):
+        output_path = tmp_path / "annotator.html"
+        result = AnnotatorGenerator().generate(
+            schema=sample_schema, tasks=sample_tasks, output_path=str(output_path)
+        )
+
+        assert result.chunk_count == 0
+        assert not (tmp_path / "annotator_tasks").exists()
+        assert "const TASK_CHUNKS = null;" in output_path.read_text(encoding="utf-8")
+
+
+class TestShardedGeneration:
+    """Tests for generate_sharded."""
+
+    @staticmethod
+    def _tasks(n):
+        return [{"data": {"question": f"问题 {i}"}} for i in range(n)]
+
+    @staticmethod
+    def _stable_html(path):
+        """Bundle HTML without the parts that differ between runs."""
+        html = Path(path).read_text(encoding="utf-8")
+        return re.sub(r'"manifest_id": ?"\w+"|generated_at.*', "", html)
+
+    def test_bundles_and_manifest(self, sample_schema, tmp_path):
+        result = AnnotatorGenerator().generate_sharded(
+            schema=sample_schema,
+            tasks=self._tasks(5),
+            output_dir=str(tmp_path / "out"),
+            shard_size=2,
+            annotators=["alice", "bob"],
+        )
+
+        assert result.success, result.error
+        assert result.shard_count == 3
+        assert result.task_count == 5
+        assert [Path(p).name for p in result.bundle_paths] == [
+            "annotator_0000_alice.html", "annotator_0001_bob.html", "annotator_0002_alice.html"
+        ]
+        manifest = json.loads(Path(result.output_path).read_text(encoding="utf-8"))
+        assert manifest["shards"][2]["first_task"] == "TASK_005"
+
+        last = Path(result.bundle_paths[2]).read_text(encoding="utf-8")
+        assert "问题 4" in last
+        assert "问题 1" not in last
+        assert "TASK_005" in last  # IDs are numbered across the whole task list
+        assert f'"manifest_id":"{manifest["id"]}"' in last.replace(" ", "")
+
+    def test_parallel_matches_serial(self, sample_schema, tmp_path):
+        generator = AnnotatorGenerator()
+        kwargs = dict(schema=sample_schema, tasks=self._tasks(7), shard_size=2)
+        serial = generator.generate_sharded(output_dir=str(tmp_path / "a"), **kwargs)
+        parallel = generator.generate_sharded(output_dir=str(tmp_path / "b"), workers=2, **kwargs)
+
+        assert parallel.success, parallel.error
+        assert len(parallel.bundle_paths) == len(serial.bundle_paths) == 4
+        for a, b in zip(serial.bundle_paths, parallel.bundle_paths):
+            assert self._stable_html(a) == self._stable_html(b)
+
+    def test_chunked_bundles(self, sample_schema, tmp_path):
+        result = AnnotatorGenerator().generate_sharded(
+            schema=sample_schema,
+            tasks=self._tasks(5),
+            output_dir=str(tmp_path),
+            shard_size=3,
+            chunk_size=2,
+        )
+
+        assert result.chunk_count == 3
+        assert (tmp_path / "annotator_0001_tasks" / "chunk_00000.js").exists()
+
+    def test_invalid_assignment(self, sample_schema, tmp_path):
+        result = AnnotatorGenerator().generate_sharded(
+            schema=sample_schema,
+            tasks=self._tasks(5),
+            output_dir=str(tmp_path),
+            shard_size=2,
+            annotators=["alice"],
+            annotators_per_shard=2,
+        )
+
+        assert not result.success
+        assert "annotators_per_shard" in result.error
+
+
+class TestStreamingRender:
+    """Tests for render_stream and the callback_url template variable."""
+
+    def test_stream_matches_file(self, sample_schema, sample_tasks, tmp_path):
+        generator = AnnotatorGenerator()
+        output_path = tmp_path / "annotator.html"
+        generator.generate(schema=sample_schema, tasks=sample_tasks, output_path=str(output_path))
+        streamed = "".join(generator.render_stream(schema=sample_schema, tasks=sample_tasks))
+
+        def strip(html):
+            return re.sub(r"generated_at.*", "", html)
+
+        assert strip(streamed) == strip(output_path.read_text(encoding="utf-8"))
+
+    def test_render_to_string(self, sample_schema, sample_tasks):
+        generator = AnnotatorGenerator()
+        kwargs = dict(schema=sample_schema, tasks=sample_tasks, title="T")
+        html = generator.render_to_string(**kwargs)
+        streamed = "".join(generator.render_stream(**kwargs))
+        assert html.startswith("<!DOCTYPE html>")
+        assert re.sub(r"generated_at.*", "", html) == re.sub(r"generated_at.*", "", streamed)
+        with pytest.raises(ValueError, match="Schema"):
+            generator.render_to_string(schema={"fields": "not_a_list"}, tasks=[])
+
+    def test_stream_pieces_are_batched(self, sample_schema):
+        tasks = [{"id": f"T{i}", "data": {"q": "x" * 100}} for i in range(2000)]
+        pieces = list(AnnotatorGenerator().render_stream(schema=sample_schema, tasks=tasks))
+        assert len(pieces) > 1
+        assert all(len(p) >= 64 * 1024 for p in pieces[:-1])
+
+    def test_stream_validates_up_front(self):
+        with pytest.raises(ValueError, match="Schema"):
+            AnnotatorGenerator().render_stream(schema={"fields": "not_a_list"}, tasks=[])
+
+    def test_callback_url(self, sample_schema, sample_tasks, tmp_path):
+        output_path = tmp_path / "annotator.html"
+        AnnotatorGenerator().generate(
+            schema=sample_schema,
+            tasks=sample_tasks,
+            output_path=str(output_path),
+            callback_url="https://example.com/submit?a=1&b='x'</script>",
+        )
+
+        content = output_path.read_text(encoding="utf-8")
+        assert "const CALLBACK_URL = " in content
+        assert "</script>'" not in content
+        assert "\\u003c/script\\u003e" in content
+
+    def test_no_callback_by_default(self, sample_schema, sample_tasks):
+        html = "".join(AnnotatorGenerator().render_stream(schema=sample_schema, tasks=sample_tasks))
+        assert "const CALLBACK_URL = null;" in html
+
+
 class TestGenerateFromDatarecipeErrors:
     """generate_from_datarecipe 错误路径测试."""
 
@@ -1,10 +1,20 @@
 """io.py 单元测试."""
 
+import io
 import json
 
 import pytest
 
-from datalabel.io import export_responses, extract_responses, import_tasks_from_file
+from datalabel.io import (
+    _JsonStream,
+    export_responses,
+    extract_responses,
+    import_tasks_from_file,
+    iter_json_array,
+    iter_responses,
+    iter_tasks,
+    write_json_array,
+)
 
 
 class TestExportResponses:
@@ -19,6 +29,14 @@ class TestExportResponses:
         assert len(data) == 2
         assert data[0]["task_id"] == "T1"
 
+    def test_export_json_compact(self, tmp_path):
+        responses = [{"task_id": "T1", "score": 3}, {"task_id": "T2", "score": 1}]
+        output = tmp_path / "out.json"
+        export_responses(responses, output, "json", compact=True)
+        text = output.read_text(encoding="utf-8")
+        assert "\n" not in text
+        assert json.loads(text) == responses
+
     def test_export_jsonl(self, tmp_path):
         responses = [{"task_id": "T1", "score": 3}]
         output = tmp_path / "out.jsonl"
@@ -154,6 +172,62 @@ class TestImportTasksFromFile:
             import_tasks_from_file(path, fmt="xml")
 
 
+class TestIterTasks:
+    """测试 iter_tasks / write_json_array."""
+
+    def test_json_samples_streamed(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text(
+            json.dumps({"metadata": {"n": 2}, "samples": [{"id": "S1"}, {"id": "S2"}]}),
+            encoding="utf-8",
+        )
+        tasks = iter_tasks(path)
+        assert next(tasks) == {"id": "S1"}
+        assert list(tasks) == [{"id": "S2"}]
+
+    def test_json_list_and_tasks_key(self, tmp_path):
+        path = tmp_path / "a.json"
+        path.write_text('[{"id": "T1"}]', encoding="utf-8")
+        assert list(iter_tasks(path)) == [{"id": "T1"}]
+        path.write_text('{"tasks": [{"id": "T2"}]}', encoding="utf-8")
+        assert list(iter_tasks(path)) == [{"id": "T2"}]
+
+    def test_csv_quoted_newline(self, tmp_path):
+        path = tmp_path / "t.csv"
+        path.write_bytes(b'id,text\r\nT1,"a\r\nb"\r\nT2,"[1, 2]"\r\n')
+        assert list(iter_tasks(path)) == [
+            {"id": "T1", "text": "a\r\nb"},
+            {"id": "T2", "text": [1, 2]},
+        ]
+
+    def test_invalid_format(self, tmp_path):
+        with pytest.raises(ValueError, match="不支持"):
+            list(iter_tasks(tmp_path / "x.txt", fmt="xml"))
+
+    @pytest.mark.parametrize("compact", [False, True])
+    @pytest.mark.parametrize("items", [[], [{"a": [1, {"b": "x\ny"}]}, 2, {}]])
+    def test_write_json_array_matches_dump(self, tmp_path, items, compact):
+        path = tmp_path / "out" / "tasks.json"
+        assert write_json_array(iter(items), path, compact=compact) == len(items)
+        expected = json.dumps(items, ensure_ascii=False, indent=None if compact else 2)
+        assert json.loads(path.read_text(encoding="utf-8")) == items
+        if not compact:
+            assert path.read_text(encoding="utf-8") == expected
+
+    def test_write_json_array_failure_keeps_old_file(self, tmp_path):
+        path = tmp_path / "tasks.json"
+        path.write_text("old", encoding="utf-8")
+
+        def items():
+            yield {"id": "T1"}
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            write_json_array(items(), path)
+        assert path.read_text(encoding="utf-8") == "old"
+        assert list(tmp_path.iterdir()) == [path]
+
+
 class TestExtractResponses:
     """测试 extract_responses."""
 
@@ -176,3 +250,62 @@ class TestExtractResponses:
 
     def test_empty_responses(self):
         assert extract_responses({"responses": []}) == []
+
+
+class TestIterJsonArray:
+    """测试增量 JSON 数组解析."""
+
+    def test_top_level_array(self):
+        assert list(iter_json_array(io.StringIO("[1, 22 , 333]"))) == [1, 22, 333]
+
+    def test_empty_array_and_object(self):
+        assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+        assert list(iter_json_array(io.StringIO("{}"), ("responses",))) == []
+
+    def test_keyed_array_skips_other_fields(self):
+        text = json.dumps({"metadata": {"s": "]}[{", "n": [1, 2]}, "responses": [{"a": 1}]})
+        assert list(iter_json_array(io.StringIO(text), ("responses",))) == [{"a": 1}]
+
+    def test_missing_key(self):
+        assert list(iter_json_array(io.StringIO('{"x": 1}'), ("responses",))) == []
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17])
+    def test_values_split_across_chunks(self, chunk_size):
+        items = [{"id": f"T{i}", "n": i * 1234567, "f": 1.5e10, "t": "中文" * i} for i in range(50)]
+        stream = _JsonStream(io.StringIO(json.dumps(items, indent=2)), chunk_size=chunk_size)
+        assert list(stream.items()) == items
+
+    def test_every_chunk_size(self):
+        """数字在任意位置被块边界截断都不能解析成更短的数."""
+        doc = '[{"a": 1}, 12.5, 3e5, -0.25E-2 , 1000, "x", true, null, [7]]'
+        expected = json.loads(doc)
+        for chunk_size in range(1, len(doc) + 1):
+            stream = _JsonStream(io.StringIO(doc), chunk_size=chunk_size)
+            assert list(stream.items()) == expected, chunk_size
+
+    def test_non_finite_tokens_read_as_null(self):
+        doc = '[NaN, -Infinity, {"a": Infinity}]'
+        for chunk_size in range(1, len(doc) + 1):
+            stream = _JsonStream(io.StringIO(doc), chunk_size=chunk_size)
+            assert list(stream.items()) == [None, None, {"a": None}], chunk_size
+
+    def test_truncated_input(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO('{"responses": [1, 2'), ("responses",)))
+
+
+class TestIterResponses:
+    """测试 iter_responses."""
+
+    def test_json_file(self, tmp_path):
+        path = tmp_path / "r.json"
+        path.write_text(
+            json.dumps({"metadata": {}, "responses": [{"task_id": "T1"}, {"task_id": "T2"}]}),
+            encoding="utf-8",
+        )
+        assert [r["task_id"] for r in iter_responses(path)] == ["T1", "T2"]
+
+    def test_jsonl_file(self, tmp_path):
+        path = tmp_path / "r.jsonl"
+        path.write_text('{"task_id": "T1"}\n\n{"task_id": "T2"}\n', encoding="utf-8")
+        assert [r["task_id"] for r in iter_responses(path)] == ["T1", "T2"]
@@ -0,0 +1,117 @@
+"""Tests for the pluggable JSON backend."""
+
+import json
+import math
+
+import pytest
+
+from datalabel import jsonlib
+
+AVAILABLE = [
+    name
+    for name, module in (("orjson", jsonlib.orjson), ("msgspec", jsonlib.msgspec), ("json", True))
+    if module is not None
+]
+
+
+@pytest.fixture(params=AVAILABLE)
+def backend(request):
+    previous = jsonlib.backend
+    jsonlib.set_backend(request.param)
+    yield request.param
+    jsonlib.set_backend(previous)
+
+
+SAMPLE = {
+    "task_id": "T1",
+    "data": {"question": "中文 </script>", "tags": ["a", "b"], "empty": {}, "none": []},
+    "score": 3,
+    "ratio": 0.25,
+    "ok": True,
+    "missing": None,
+}
+
+
+class TestBackends:
+    """Every backend must behave like stdlib json for annotation data."""
+
+    def test_round_trip(self, backend):
+        assert jsonlib.loads(jsonlib.dumps(SAMPLE)) == SAMPLE
+        assert jsonlib.loads(jsonlib.dumpb(SAMPLE, indent=True)) == SAMPLE
+
+    def test_indent_matches_stdlib(self, backend):
+        assert jsonlib.dumps(SAMPLE, indent=True) == json.dumps(
+            SAMPLE, indent=2, ensure_ascii=False
+        )
+
+    def test_non_ascii_not_escaped(self, backend):
+        assert "中文" in jsonlib.dumps(SAMPLE)
+        assert "中文".encode("utf-8") in jsonlib.dumpb(SAMPLE)
+
+    def test_non_str_keys_and_tuples(self, backend):
+        assert jsonlib.loads(jsonlib.dumps({1: (1, 2)})) == {"1": [1, 2]}
+
+    def test_big_int_falls_back(self, backend):
+        big = 2**70
+        assert jsonlib.loads(jsonlib.dumps({"n": big})) == {"n": big}
+
+    def test_unserializable_raises_type_error(self, backend):
+        with pytest.raises(TypeError):
+            jsonlib.dumps({"x": object()})
+
+    def test_decode_error_is_json_decode_error(self, backend):
+        with pytest.raises(json.JSONDecodeError):
+            jsonlib.loads("{bad")
+        with pytest.raises(ValueError):
+            jsonlib.loads(b"[1,")
+
+    def test_compact_has_no_spaces(self, backend):
+        assert jsonlib.dumps({"a": [1, 2], "b": "x y"}) == '{"a":[1,2],"b":"x y"}'
+
+    @pytest.mark.parametrize("indent", [False, True])
+    def test_non_finite_floats_written_as_null(self, backend, indent):
+        data = {"a": math.nan, "b": [math.inf, -math.inf, 1.5], "c": (math.nan,), "d": 2**70}
+        text = jsonlib.dumps(data, indent=indent)
+        # Valid JSON that any backend (and stdlib in strict mode) can read back
+        assert json.loads(text, parse_constant=pytest.fail) == {
+            "a": None, "b": [None, None, 1.5], "c": [None], "d": 2**70,
+        }
+        assert jsonlib.loads(jsonlib.dumpb(data, indent=indent)) == json.loads(text)
+
+    def test_non_finite_tokens_read_as_null(self, backend):
+        assert jsonlib.loads("[NaN, Infinity, -Infinity, 1]") == [None, None, None, 1]
+        assert jsonlib.loads(b'{"a": NaN}') == {"a": None}
+
+    def test_circular_reference_still_raises(self, backend):
+        data = []
+        data.append(data)
+        with pytest.raises((ValueError, TypeError)):
+            jsonlib.dumps(data)
+
+    def test_dump_and_load_file(self, backend, tmp_path):
+        path = tmp_path / "out.json"
+        jsonlib.dump(SAMPLE, path)
+        assert path.read_text(encoding="utf-8").startswith("{\n  ")
+        assert jsonlib.load(path) == SAMPLE
+        jsonlib.dump(SAMPLE, path, compact=True)
+        assert "\n" not in path.read_text(encoding="utf-8")
+        with open(path, encoding="utf-8") as f:
+            assert jsonlib.load(f) == SAMPLE
+
+
+class TestSetBackend:
+    def test_default_is_fastest_available(self):
+        previous = jsonlib.backend
+        try:
+            assert jsonlib.set_backend() == AVAILABLE[0]
+        finally:
+            jsonlib.set_backend(previous)
+
+    def test_unknown(self):
+        with pytest.raises(ValueError, match="未知"):
+            jsonlib.set_backend("ujson")
+
+    @pytest.mark.skipif(jsonlib.msgspec is not None, reason="msgspec installed")
+    def test_not_installed(self):
+        with pytest.raises(ValueError, match="未安装"):
+            jsonlib.set_backend("msgspec")
@@ -0,0 +1,121 @@
+"""Tests for shard manifests and reassembling sharded results."""
+
+import json
+
+import pytest
+
+from datalabel.manifest import assemble_results, load_manifest, missing_bundles, plan_shards
+
+TASK_IDS = [f"T{i}" for i in range(5)]
+
+
+def _write_result(path, manifest, shard, annotator, responses):
+    metadata = {"manifest_id": manifest["id"], "shard": shard, "annotator": annotator}
+    path.write_text(json.dumps({"metadata": metadata, "responses": responses}))
+    return str(path)
+
+
+class TestPlanShards:
+    """Tests for plan_shards."""
+
+    def test_ranges(self):
+        manifest = plan_shards(TASK_IDS, 2)
+        assert manifest["total_tasks"] == 5
+        assert [(s["start"], s["count"]) for s in manifest["shards"]] == [(0, 2), (2, 2), (4, 1)]
+        assert manifest["shards"][1]["first_task"] == "T2"
+        assert manifest["shards"][1]["last_task"] == "T3"
+        assert manifest["shards"][2]["bundles"] == [
+            {"annotator": None, "file": "annotator_0002.html"}
+        ]
+
+    def test_round_robin_assignment(self):
+        manifest = plan_shards(TASK_IDS, 2, annotators=["a", "b", "c"], annotators_per_shard=2)
+        assert [[b["annotator"] for b in s["bundles"]] for s in manifest["shards"]] == [
+            ["a", "b"], ["c", "a"], ["b", "c"]
+        ]
+        assert manifest["shards"][0]["bundles"][1]["file"] == "annotator_0000_b.html"
+
+    def test_file_names_are_sanitized(self):
+        manifest = plan_shards(TASK_IDS, 5, annotators=["张 三/x"])
+        assert manifest["shards"][0]["bundles"][0]["file"] == "annotator_0000_张_三_x.html"
+
+    @pytest.mark.parametrize("kwargs", [
+        {"shard_size": 0},
+        {"shard_size": 2, "annotators": ["a"], "annotators_per_shard": 2},
+        {"shard_size": 2, "annotators": ["a", "a"]},
+        {"shard_size": 1, "annotators": ["li lei", "li_lei"], "annotators_per_shard": 2},
+        {"shard_size": 2, "annotators": ["a/b", "a?b"]},
+    ])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            plan_shards(TASK_IDS, **kwargs)
+
+
+class TestAssembleResults:
+    """Tests for assemble_results / missing_bundles."""
+
+    def test_groups_shards_by_annotator(self, tmp_path):
+        manifest = plan_shards(TASK_IDS, 2, annotators=["a", "b"], annotators_per_shard=2)
+        files = [
+            _write_result(tmp_path / "a0.json", manifest, 0, "a",
+                          [{"task_id": "T0", "score": 1}, {"task_id": "T1", "score": 2}]),
+            _write_result(tmp_path / "b0.json", manifest, 0, "b", [{"task_id": "T0", "score": 1}]),
+            _write_result(tmp_path / "a1.json", manifest, 1, "a", [{"task_id": "T2", "score": 3}]),
+        ]
+        table = assemble_results(manifest, files)
+
+        assert table.sources == ["a", "b"]
+        assert table.annotations(0) == {"T0": 1, "T1": 2, "T2": 3}
+        assert table.metadata[0]["shards"] == [0, 1]
+        assert table.metadata[0]["total_tasks"] == 5
+        assert [(m["shard"], m["annotator"]) for m in missing_bundles(manifest, table)] == [
+            (1, "b"), (2, "a"), (2, "b")
+        ]
+
+    def test_unassigned_bundles(self, tmp_path):
+        manifest = plan_shards(TASK_IDS, 3)
+        files = [
+            _write_result(tmp_path / "s0.json", manifest, 0, None, [{"task_id": "T0", "score": 1}]),
+            _write_result(tmp_path / "s1.json", manifest, 1, None, [{"task_id": "T4", "score": 1}]),
+        ]
+        table = assemble_results(manifest, files)
+        assert table.n_sources == 2
+        assert [m["annotator"] for m in table.metadata] == ["s0", "s1"]
+        assert missing_bundles(manifest, table) == []
+
+    def test_plain_files_are_own_sources(self, tmp_path):
+        manifest = plan_shards(TASK_IDS, 5)
+        plain = tmp_path / "plain.json"
+        plain.write_text(json.dumps({"metadata": {"annotator": "x"}, "responses": [
+            {"task_id": "T0", "score": 2}
+        ]}))
+        table = assemble_results(manifest, [str(plain)])
+        assert table.sources == [str(plain)]
+        assert table.metadata == [{"annotator": "x"}]
+
+    def test_foreign_manifest_rejected(self, tmp_path):
+        manifest = plan_shards(TASK_IDS, 5)
+        other = plan_shards(TASK_IDS, 5)
+        path = _write_result(tmp_path / "a.json", other, 0, None, [])
+        with pytest.raises(ValueError, match="不属于"):
+            assemble_results(manifest, [path])
+
+    def test_unknown_shard_rejected(self, tmp_path):
+        manifest = plan_shards(TASK_IDS, 5)
+        path = _write_result(tmp_path / "a.json", manifest, 7, None, [])
+        with pytest.raises(ValueError, match="分片编号"):
+            assemble_results(manifest, [path])
+
+
+class TestLoadManifest:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        manifest = plan_shards(TASK_IDS, 2)
+        path.write_text(json.dumps(manifest))
+        assert load_manifest(str(path)) == manifest
+
+    def test_not_a_manifest(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        path.write_text(json.dumps({"responses": []}))
+        with pytest.raises(ValueError):
+            load_manifest(str(path))
@@ -6,6 +6,7 @@ from pathlib import Path
 from datalabel.mcp_server._tools import (
     TOOL_HANDLERS,
     TOOLS,
+    handle_adjudicate,
     handle_calculate_iaa,
     handle_create_annotator,
     handle_export_results,
@@ -140,6 +141,19 @@ class TestCalculateIAA:
         result = handle_calculate_iaa({"result_files": files})
         assert "一致性" in result[0].text or "IAA" in result[0].text
 
+    def test_bootstrap(
+        self,
+        annotator1_results,
+        annotator2_results,
+        annotator_results_factory,
+        tmp_path,
+    ):
+        files = annotator_results_factory(
+            tmp_path, [annotator1_results, annotator2_results]
+        )
+        result = handle_calculate_iaa({"result_files": files, "bootstrap": 20, "seed": 1})
+        assert '"intervals"' in result[0].text
+
 
 class TestExportResults:
     """测试 export_results handler."""
@@ -360,6 +374,46 @@ class TestGenerateDashboard:
         assert "失败" in result[0].text
 
 
+class TestAdjudicate:
+    """测试 adjudicate handler."""
+
+    def test_majority_across_formats(self, tmp_path):
+        f1 = tmp_path / "a1.json"
+        f2 = tmp_path / "a2.json"
+        f3 = tmp_path / "a3.json"
+        f1.write_text(json.dumps([
+            {"task_id": "A", "annotation": 1},
+            {"task_id": "B", "annotation": 2},
+        ]), encoding="utf-8")
+        f2.write_text(json.dumps({"responses": {
+            "A": {"task_id": "A", "annotation": 2},
+            "B": {"task_id": "B", "annotation": 2},
+        }}), encoding="utf-8")
+        f3.write_text(json.dumps([{"task_id": "A", "annotation": 1}]), encoding="utf-8")
+        output = tmp_path / "adjudicated.json"
+        result = handle_adjudicate({
+            "result_files": [str(f1), str(f2), str(f3)],
+            "output_path": str(output),
+        })
+        assert "总任务: 2" in result[0].text
+        assert "冲突数: 1" in result[0].text
+        records = json.loads(output.read_text(encoding="utf-8"))
+        assert records[0] == {
+            "task_id": "A", "annotation": 1,
+            "_adjudication": "majority", "_votes": {"1": 2, "2": 1},
+        }
+        assert records[1] == {"task_id": "B", "annotation": 2}
+
+    def test_needs_two_files(self, tmp_path):
+        f1 = tmp_path / "a1.json"
+        f1.write_text(json.dumps([{"task_id": "A", "annotation": 1}]), encoding="utf-8")
+        result = handle_adjudicate({
+            "result_files": [str(f1)],
+            "output_path": str(tmp_path / "out.json"),
+        })
+        assert "至少需要 2 个" in result[0].text
+
+
 class TestHandlerErrorPaths:
     """测试 handler 错误分支."""
 
@@ -4,7 +4,9 @@ import json
 import tempfile
 from pathlib import Path
 
-from datalabel import ResultMerger
+import pytest
+
+from datalabel import ResultMerger, jsonlib
 
 
 class TestResultMerger:
@@ -539,3 +541,200 @@ class TestMergerStrategyEdgeCases:
             )
             assert not result.success
             assert result.error
+
+
+class TestStreamingMerge:
+    """Tests for the constant-memory streaming merge path."""
+
+    @staticmethod
+    def _strip_timestamps(data):
+        data["metadata"].pop("merged_at")
+        for r in data["responses"]:
+            r.pop("merged_at", None)
+        return data
+
+    def test_matches_in_memory_merge(
+        self, annotator1_results, annotator2_results, annotator3_results, annotator_results_factory
+    ):
+        """Tiny buffer forces many spill runs; output must equal the in-memory merge."""
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(
+                tmpdir, [annotator1_results, annotator2_results, annotator3_results]
+            )
+            plain_path = Path(tmpdir) / "plain.json"
+            stream_path = Path(tmpdir) / "stream.json"
+
+            plain = merger.merge(files, str(plain_path))
+            streamed = merger.merge(files, str(stream_path), streaming=True, buffer_size=1)
+
+            assert streamed.success
+            assert streamed.total_tasks == plain.total_tasks
+            assert streamed.annotator_count == plain.annotator_count
+            assert streamed.agreement_rate == plain.agreement_rate
+            assert streamed.conflict_count == plain.conflict_count == 2
+            assert streamed.conflicts == []
+
+            plain_data = self._strip_timestamps(json.loads(plain_path.read_text()))
+            stream_data = self._strip_timestamps(json.loads(stream_path.read_text()))
+            assert stream_data == plain_data
+
+    def test_output_layout_matches_json_dump(self, annotator1_results, annotator_results_factory):
+        """Spooled output is byte-identical to json.dump(indent=2) of the same data."""
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [annotator1_results, {"responses": []}])
+            output_path = Path(tmpdir) / "merged.json"
+
+            result = merger.merge(files, str(output_path), streaming=True)
+            assert result.success
+
+            text = output_path.read_text(encoding="utf-8")
+            assert text == json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+
+    def test_compact_output(
+        self, annotator1_results, annotator2_results, annotator_results_factory
+    ):
+        """compact=True writes single-line JSON with the same content in both paths."""
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [annotator1_results, annotator2_results])
+            plain_path = Path(tmpdir) / "plain.json"
+            stream_path = Path(tmpdir) / "stream.json"
+
+            assert merger.merge(files, str(plain_path), compact=True).success
+            assert merger.merge(files, str(stream_path), streaming=True, compact=True).success
+
+            for path in (plain_path, stream_path):
+                text = path.read_text(encoding="utf-8")
+                assert "\n" not in text
+                # Same separators in both paths: byte-identical up to the timestamp
+                assert text == jsonlib.dumps(jsonlib.loads(text))
+            plain_data = self._strip_timestamps(json.loads(plain_path.read_text()))
+            stream_data = self._strip_timestamps(json.loads(stream_path.read_text()))
+            assert stream_data == plain_data
+
+    def test_empty_inputs(self, annotator_results_factory):
+        """No responses at all yields empty arrays."""
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = annotator_results_factory(tmpdir, [{"responses": []}, {"responses": []}])
+            output_path = Path(tmpdir) / "merged.json"
+
+            result = merger.merge(files, str(output_path), streaming=True)
+            assert result.success
+            merged = json.loads(output_path.read_text())
+            assert merged["responses"] == []
+            assert merged["conflicts"] == []
+
+    def test_jsonl_inputs_and_duplicates(self, tmp_path):
+        """JSONL results are accepted; a later duplicate task in one file wins."""
+        f1 = tmp_path / "a1.jsonl"
+        f2 = tmp_path / "a2.jsonl"
+        f1.write_text(
+            '{"task_id": "T2", "score": 1}\n{"task_id": "T1", "score": 1}\n'
+            '{"task_id": "T1", "score": 3}\n',
+            encoding="utf-8",
+        )
+        f2.write_text('{"task_id": "T1", "score": 3}\n{"task_id": "T2", "score": 2}\n')
+        output_path = tmp_path / "merged.json"
+
+        result = ResultMerger().merge(
+            [str(f1), str(f2)], str(output_path), streaming=True, buffer_size=2
+        )
+
+        assert result.success
+        merged = json.loads(output_path.read_text())
+        assert [r["task_id"] for r in merged["responses"]] == ["T1", "T2"]
+        assert merged["responses"][0]["individual_scores"] == [3, 3]
+        assert merged["conflicts"][0]["annotators"] == [str(f1), str(f2)]
+
+    def test_multi_pass_run_merge(self, tmp_path, monkeypatch):
+        """More runs than the merge fan-in are reduced in several passes."""
+        import datalabel.merger as merger_module
+
+        monkeypatch.setattr(merger_module, "_MAX_MERGE_FANIN", 2)
+        files = []
+        for a in range(2):
+            path = tmp_path / f"ann{a}.json"
+            responses = [{"task_id": f"T{i:03d}", "score": (i + a) % 3} for i in range(20)]
+            path.write_text(json.dumps({"responses": responses}))
+            files.append(str(path))
+        output_path = tmp_path / "merged.json"
+
+        result = ResultMerger().merge(files, str(output_path), streaming=True, buffer_size=3)
+
+        assert result.success
+        merged = json.loads(output_path.read_text())
+        assert [r["task_id"] for r in merged["responses"]] == [f"T{i:03d}" for i in range(20)]
+        assert all(r["annotation_count"] == 2 for r in merged["responses"])
+        assert result.conflict_count == 20
+
+    def test_corrupted_file(self, tmp_path):
+        """Invalid JSON is reported as a failed merge."""
+        f1 = tmp_path / "a1.json"
+        f1.write_text('{"responses": [{"task_id": "T1", "score": 1}', encoding="utf-8")
+        result = ResultMerger().merge(
+            [str(f1), str(f1)], str(tmp_path / "out.json"), streaming=True
+        )
+        assert not result.success
+        assert result.error
+
+
+class TestParallelMerge:
+    """Tests for merging tasks in a process pool."""
+
+    @staticmethod
+    def _results(tmpdir, n_files=3, n_tasks=40):
+        files = []
+        for a in range(n_files):
+            responses = []
+            for t in range(n_tasks):
+                if t % 2:
+                    responses.append({"task_id": f"T{t:03d}", "ranking": [(a + t) % 3, 1, 2]})
+                else:
+                    responses.append(
+                        {"task_id": f"T{t:03d}", "fields": {"q": (a * t) % 4, "note": f"n{a}"}}
+                    )
+            path = Path(tmpdir) / f"ann_{a}.json"
+            path.write_text(json.dumps({"responses": responses}), encoding="utf-8")
+            files.append(str(path))
+        return files
+
+    @staticmethod
+    def _load(path):
+        return TestStreamingMerge._strip_timestamps(json.loads(Path(path).read_text()))
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_matches_serial_merge(self, monkeypatch, streaming):
+        import datalabel.merger as merger_module
+
+        monkeypatch.setattr(merger_module, "_PARALLEL_CHUNK_TASKS", 3)
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = self._results(tmpdir)
+            serial = merger.merge(files, f"{tmpdir}/serial.json", streaming=streaming)
+            parallel = merger.merge(
+                files, f"{tmpdir}/parallel.json", streaming=streaming, workers=2
+            )
+
+            assert parallel.success
+            assert parallel.total_tasks == serial.total_tasks == 40
+            assert parallel.conflict_count == serial.conflict_count
+            assert parallel.agreement_rate == serial.agreement_rate
+            assert parallel.conflicts == serial.conflicts
+            assert self._load(parallel.output_path) == self._load(serial.output_path)
+
+    def test_invalid_input_with_workers(self):
+        merger = ResultMerger()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "bad.json"
+            path.write_text(json.dumps({"responses": [{"score": 1}]}), encoding="utf-8")
+            result = merger.merge([str(path)], f"{tmpdir}/out.json", workers=2)
+            assert not result.success
@@ -72,6 +72,21 @@ class TestFindDisagreements:
         ]
         assert _find_disagreements(results) == []
 
+    def test_latest_response_per_annotator_counts(self):
+        # As in merge and IAA, a later response for the same task replaces the earlier one
+        results = [
+            {"annotator": "a1", "responses": [
+                {"task_id": "T1", "score": 0}, {"task_id": "T1", "score": 1},
+            ]},
+            {"annotator": "a2", "responses": [{"task_id": "T1", "score": 1}]},
+        ]
+        assert _find_disagreements(results) == []
+        results[1]["responses"].append({"task_id": "T1", "score": 0})
+        (disag,) = _find_disagreements(results)
+        assert disag["annotations"] == [
+            {"annotator": "a1", "score": 1}, {"annotator": "a2", "score": 0},
+        ]
+
 
 def _mock_quality_client(
     quality_response: dict,
@@ -0,0 +1,147 @@
+"""Tests for the server's render cache, ETags and precompressed pages."""
+
+import gzip
+
+import pytest
+
+render_cache_module = pytest.importorskip("server.render_cache")
+Request = pytest.importorskip("starlette.requests").Request
+RenderCache = render_cache_module.RenderCache
+RenderedPage = render_cache_module.RenderedPage
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+@pytest.fixture(autouse=True)
+def _clear_render_cache():
+    render_cache_module.render_cache.clear()
+    yield
+    render_cache_module.render_cache.clear()
+
+
+class TestRenderCache:
+    def test_hit_and_miss(self):
+        cache = RenderCache(max_bytes=1 << 20)
+        assert cache.get("k") is None
+        page = cache.put("k", "<html>页面</html>")
+        assert cache.get("k") is page
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert page.encoded["gzip"] and gzip.decompress(page.encoded["gzip"]) == page.html
+
+    @pytest.mark.skipif(render_cache_module.brotli is None, reason="brotli not installed")
+    def test_brotli_variant(self):
+        page = RenderedPage.build("k", "<html>页面</html>")
+        assert render_cache_module.brotli.decompress(page.encoded["br"]) == page.html
+
+    def test_lru_eviction_by_bytes(self):
+        cache = RenderCache(max_bytes=250, compress=False)
+        cache.put("a", "a" * 100)
+        cache.put("b", "b" * 100)
+        cache.get("a")
+        cache.put("c", "c" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.nbytes == 200
+
+    def test_oversized_page_is_not_cached(self):
+        cache = RenderCache(max_bytes=10, compress=False)
+        page = cache.put("k", "x" * 100)
+        assert page.html == b"x" * 100
+        assert len(cache) == 0
+
+    def test_ttl(self):
+        cache = RenderCache(ttl=10, compress=False)
+        page = cache.put("k", "page")
+        page.created -= 9
+        assert cache.get("k") is page
+        page.created -= 2
+        assert cache.get("k") is None
+        assert cache.nbytes == 0
+
+    def test_render_key_depends_on_params(self):
+        key = render_cache_module.render_key({"schema": {"a": 1}, "tasks": []})
+        assert key == render_cache_module.render_key({"schema": {"a": 1}, "tasks": []})
+        assert key != render_cache_module.render_key({"schema": {"a": 2}, "tasks": []})
+
+
+class TestPageResponse:
+    @pytest.fixture
+    def page(self):
+        page = RenderedPage.build("0" * 64, "<html>hello</html>")
+        # brotli is optional; stand in a br variant to check the negotiation
+        page.encoded["br"] = b"br-bytes"
+        return page
+
+    @pytest.mark.parametrize("header", ['"x", W/{etag}', "{etag}", "*"])
+    def test_if_none_match(self, page, header):
+        request = _request(if_none_match=header.format(etag=page.etag))
+        response = render_cache_module.page_response(page, request)
+        assert response.status_code == 304
+        assert response.headers["etag"] == page.etag
+        assert response.body == b""
+
+    def test_etag_mismatch(self, page):
+        response = render_cache_module.page_response(page, _request(if_none_match='"other"'))
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("accept, encoding", [
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("*", "br"),
+        ("identity", None),
+        ("", None),
+    ])
+    def test_encoding_negotiation(self, page, accept, encoding):
+        response = render_cache_module.page_response(page, _request(accept_encoding=accept))
+        assert response.headers.get("content-encoding") == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.body == (page.encoded[encoding] if encoding else page.html)
+
+
+class TestGenerateEndpoint:
+    @pytest.fixture
+    def body(self, sample_schema, sample_tasks):
+        return {"schema": sample_schema, "tasks": sample_tasks, "title": "缓存测试"}
+
+    def test_etag_and_304(self, server_client, body):
+        first = server_client.post("/api/render/generate", json=body)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert "缓存测试" in first.text
+
+        second = server_client.post("/api/render/generate", json=body)
+        assert second.headers["etag"] == etag
+        assert render_cache_module.render_cache.hits == 1
+
+        cached = server_client.post(
+            "/api/render/generate", json=body, headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        body["title"] = "另一个标题"
+        changed = server_client.post("/api/render/generate", json=body)
+        assert changed.headers["etag"] != etag
+
+    def test_gzip_and_identity(self, server_client, body):
+        plain = server_client.post(
+            "/api/render/generate", json=body, headers={"Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in plain.headers
+
+        zipped = server_client.post(
+            "/api/render/generate", json=body, headers={"Accept-Encoding": "gzip"}
+        )
+        assert zipped.headers["content-encoding"] == "gzip"
+        # httpx decodes the body transparently
+        assert zipped.text == plain.text
+
+    def test_invalid_schema(self, server_client):
+        response = server_client.post("/api/render/generate", json={"tasks": []})
+        assert response.status_code == 422
@@ -0,0 +1,96 @@
+"""Tests for the task batch routes and submits that reference a batch."""
+
+import pytest
+
+from server import submission_store
+
+pytest.importorskip("fastapi")
+
+
+@pytest.fixture
+def schema_id(server_client, sample_schema):
+    response = server_client.post("/api/schemas", json=sample_schema)
+    assert response.status_code == 200
+    return response.json()["schema_id"]
+
+
+@pytest.fixture
+def batch_id(server_client, schema_id, sample_tasks):
+    response = server_client.post("/api/batches", json={
+        "schema_id": schema_id, "tasks": sample_tasks, "title": "批次页面",
+    })
+    assert response.status_code == 200
+    return response.json()["task_batch_id"]
+
+
+class TestBatchRoutes:
+    def test_create_get_render_delete(self, server_client, batch_id):
+        info = server_client.get(f"/api/batches/{batch_id}").json()
+        assert info["task_count"] == 2
+        assert info["url"] == f"/api/render/{batch_id}"
+
+        page = server_client.get(info["url"])
+        assert page.status_code == 200
+        assert "批次页面" in page.text
+        assert server_client.get(
+            info["url"], headers={"If-None-Match": page.headers["etag"]}
+        ).status_code == 304
+
+        assert server_client.delete(f"/api/batches/{batch_id}").status_code == 200
+        assert server_client.get(f"/api/batches/{batch_id}").status_code == 404
+        assert server_client.get(info["url"]).status_code == 404
+        assert server_client.delete(f"/api/batches/{batch_id}").status_code == 404
+
+    def test_render_after_schema_deleted(self, server_client, schema_id, batch_id):
+        server_client.delete(f"/api/schemas/{schema_id}")
+        assert server_client.get(f"/api/render/{batch_id}").status_code == 404
+
+    @pytest.mark.parametrize("body", [
+        {"schema_id": "missing", "tasks": []},
+        {"tasks": []},
+    ])
+    def test_unknown_schema(self, server_client, body):
+        assert server_client.post("/api/batches", json=body).status_code == 404
+
+    def test_tasks_required(self, server_client, schema_id):
+        response = server_client.post("/api/batches", json={"schema_id": schema_id})
+        assert response.status_code == 422
+
+
+class TestIngestValidation:
+    def test_task_batch_id(self, server_client, batch_id):
+        params = {"task_batch_id": batch_id}
+        assert server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": 3}, params=params
+        ).status_code == 200
+        assert server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": "3"}, params=params
+        ).status_code == 422
+
+    def test_unknown_batch(self, server_client):
+        response = server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": 1}, params={"task_batch_id": "missing"}
+        )
+        assert response.status_code == 404
+
+
+class TestSharedAcrossWorkers:
+    def test_registered_on_one_worker_used_on_another(
+        self, server_client, monkeypatch, tmp_path, sample_schema, sample_tasks
+    ):
+        path = str(tmp_path / "submissions.db")
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        schema_id = server_client.post("/api/schemas", json=sample_schema).json()["schema_id"]
+        batch_id = server_client.post("/api/batches", json={
+            "schema_id": schema_id, "tasks": sample_tasks,
+        }).json()["task_batch_id"]
+        submission_store.get_submission_store().close()
+
+        # Another worker (or the same one after a restart) opens the same database
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        assert server_client.get(f"/api/render/{batch_id}").status_code == 200
+        response = server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": 9}, params={"task_batch_id": batch_id}
+        )
+        assert response.status_code == 422
+        submission_store.get_submission_store().close()
@@ -0,0 +1,39 @@
+"""Tests for the merge and IAA routes."""
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+
+def _responses(*labels):
+    return [
+        {"responses": [{"task_id": f"T{i}", "score": score} for i, score in enumerate(scores)]}
+        for scores in labels
+    ]
+
+
+class TestIaaRoute:
+    def test_bootstrap(self, server_client):
+        response = server_client.post("/api/merge/iaa", json={
+            "responses": _responses([1, 2, 3, 1], [1, 2, 2, 1]),
+            "bootstrap": 20,
+            "seed": 7,
+            "confidence": 0.9,
+        })
+        assert response.status_code == 200
+        assert "bootstrap" in response.json()["metrics"]
+
+    @pytest.mark.parametrize("params", [
+        {"bootstrap": True},
+        {"bootstrap": -1},
+        {"bootstrap": 5, "confidence": "x"},
+        {"bootstrap": 5, "confidence": 1},
+        {"bootstrap": 5, "confidence": 0},
+        {"bootstrap": 5, "confidence": True},
+        {"bootstrap": 5, "seed": "7"},
+        {"bootstrap": 5, "seed": 1.5},
+        {"bootstrap": 5, "seed": False},
+    ])
+    def test_invalid_parameters(self, server_client, params):
+        body = {"responses": _responses([1, 2], [1, 2]), **params}
+        assert server_client.post("/api/merge/iaa", json=body).status_code == 422
@@ -0,0 +1,109 @@
+"""Tests for the schema routes and schema validation on submit."""
+
+import pytest
+
+from server import submission_store
+
+pytest.importorskip("fastapi")
+
+
+@pytest.fixture
+def schema_id(server_client, sample_schema):
+    response = server_client.post("/api/schemas", json=sample_schema)
+    assert response.status_code == 200
+    return response.json()["schema_id"]
+
+
+class TestSchemaRoutes:
+    def test_crud(self, server_client, schema_id, sample_schema):
+        response = server_client.get(f"/api/schemas/{schema_id}")
+        assert response.json() == {"schema_id": schema_id, "schema": sample_schema}
+
+        sample_schema["project_name"] = "改名"
+        assert server_client.put(f"/api/schemas/{schema_id}", json=sample_schema).status_code == 200
+        assert server_client.get(f"/api/schemas/{schema_id}").json()["schema"] == sample_schema
+
+        assert server_client.delete(f"/api/schemas/{schema_id}").status_code == 200
+        assert server_client.get(f"/api/schemas/{schema_id}").status_code == 404
+        assert server_client.delete(f"/api/schemas/{schema_id}").status_code == 404
+        assert server_client.put(f"/api/schemas/{schema_id}", json=sample_schema).status_code == 404
+
+    def test_invalid_schema(self, server_client):
+        response = server_client.post("/api/schemas", json={"annotation_config": {"type": "bogus"}})
+        assert response.status_code == 422
+        assert response.json()["detail"]["errors"]
+
+
+class TestIngestValidation:
+    def test_schema_id_in_body_and_query(self, server_client, schema_id):
+        good = {"task_id": "T1", "score": 2}
+        assert server_client.post(
+            "/api/submit", json={**good, "schema_id": schema_id}
+        ).status_code == 200
+        assert server_client.post(
+            "/api/submit", json=good, params={"schema_id": schema_id}
+        ).status_code == 200
+
+        response = server_client.post("/api/submit", json={
+            "task_id": "T1", "score": 5, "schema_id": schema_id,
+        })
+        assert response.status_code == 422
+        assert "评分标准" in response.json()["detail"]
+
+    def test_unknown_references(self, server_client):
+        response = server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": 1}, params={"schema_id": "missing"}
+        )
+        assert response.status_code == 404
+
+    def test_batch_rejected_as_a_whole(self, server_client, schema_id):
+        response = server_client.post("/api/submit/batch", json={
+            "schema_id": schema_id,
+            "results": [{"task_id": "T1", "score": 1}, {"task_id": "T2", "score": 9}],
+        })
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("results[1]")
+        assert server_client.get("/api/submit/pending").json()["count"] == 0
+
+    def test_per_result_schema_overrides_default(self, server_client, schema_id):
+        choice = server_client.post("/api/schemas", json={
+            "fields": [{"name": "q", "type": "text"}],
+            "annotation_config": {"type": "single_choice", "options": [
+                {"value": 1, "label": "是"}, {"value": 2, "label": "否"},
+            ]},
+        }).json()["schema_id"]
+        response = server_client.post("/api/submit/batch", json={
+            "schema_id": schema_id,
+            "results": [
+                {"task_id": "T1", "score": 1},
+                {"task_id": "T2", "choice": "2", "schema_id": choice},
+            ],
+        })
+        assert response.status_code == 200
+        assert response.json()["count"] == 2
+
+    def test_schema_update_changes_validation(self, server_client, schema_id, sample_schema):
+        body = {"task_id": "T1", "score": 4, "schema_id": schema_id}
+        assert server_client.post("/api/submit", json=body).status_code == 422
+        sample_schema["scoring_rubric"].append({"score": 4, "label": "很好"})
+        server_client.put(f"/api/schemas/{schema_id}", json=sample_schema)
+        assert server_client.post("/api/submit", json=body).status_code == 200
+
+
+class TestSharedAcrossWorkers:
+    def test_registered_on_one_worker_used_on_another(
+        self, server_client, monkeypatch, tmp_path, sample_schema
+    ):
+        path = str(tmp_path / "submissions.db")
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        schema_id = server_client.post("/api/schemas", json=sample_schema).json()["schema_id"]
+        submission_store.get_submission_store().close()
+
+        # Another worker (or the same one after a restart) opens the same database
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        assert server_client.get(f"/api/schemas/{schema_id}").status_code == 200
+        response = server_client.post(
+            "/api/submit", json={"task_id": "T1", "score": 9}, params={"schema_id": schema_id}
+        )
+        assert response.status_code == 422
+        submission_store.get_submission_store().close()
@@ -0,0 +1,177 @@
+"""Tests for the submission routes: pending list, NDJSON drain, ack and live IAA."""
+
+import json
+
+import pytest
+
+from server import submission_store
+
+pytest.importorskip("fastapi")
+
+
+def _submit(client, *task_ids, annotator="alice", score=1):
+    response = client.post("/api/submit/batch", json={
+        "results": [{"task_id": t, "annotator": annotator, "score": score} for t in task_ids],
+    })
+    assert response.status_code == 200
+    return response.json()["submission_ids"]
+
+
+class TestPendingPages:
+    def test_cursor_paging_across_inserts(self, server_client):
+        _submit(server_client, "T1", "T2", "T3")
+        page = server_client.get("/api/submit/pending", params={"limit": 2}).json()
+        assert [s["task_id"] for s in page["submissions"]] == ["T1", "T2"]
+        assert page["has_more"]
+
+        # New submissions land after the cursor, never before it
+        _submit(server_client, "T4")
+        page = server_client.get(
+            "/api/submit/pending", params={"cursor": page["next_cursor"], "limit": 2}
+        ).json()
+        assert [s["task_id"] for s in page["submissions"]] == ["T3", "T4"]
+        assert not page["has_more"]
+
+        last = server_client.get(
+            "/api/submit/pending", params={"cursor": page["next_cursor"]}
+        ).json()
+        assert last["count"] == 0
+        assert last["next_cursor"] == page["next_cursor"]
+
+    def test_filters(self, server_client):
+        _submit(server_client, "T1", "T2")
+        _submit(server_client, "T1", annotator="bob")
+        page = server_client.get(
+            "/api/submit/pending", params={"task_id": "T1", "annotator": "bob"}
+        ).json()
+        assert page["count"] == 1
+        assert page["submissions"][0]["annotator"] == "bob"
+
+    def test_bad_format(self, server_client):
+        response = server_client.get("/api/submit/pending", params={"format": "xml"})
+        assert response.status_code == 422
+
+
+class TestNdjsonDrain:
+    def test_streams_snapshot(self, server_client, monkeypatch):
+        from server.routers import submit
+
+        monkeypatch.setattr(submit, "_STREAM_BATCH", 2)
+        ids = _submit(server_client, "T1", "T2", "T3", "T4", "T5")
+        response = server_client.get("/api/submit/pending", params={"format": "ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert [json.loads(line)["submission_id"] for line in lines] == ids
+
+        cursor = int(response.headers["X-Next-Cursor"])
+        _submit(server_client, "T6")
+        response = server_client.get(
+            "/api/submit/pending",
+            params={"cursor": cursor},
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert [json.loads(line)["task_id"] for line in response.text.splitlines()] == ["T6"]
+
+    def test_limit(self, server_client):
+        _submit(server_client, "T1", "T2", "T3")
+        response = server_client.get(
+            "/api/submit/pending", params={"format": "ndjson", "limit": 2}
+        )
+        assert len(response.text.splitlines()) == 2
+        page = server_client.get(
+            "/api/submit/pending", params={"cursor": response.headers["X-Next-Cursor"]}
+        ).json()
+        assert [s["task_id"] for s in page["submissions"]] == ["T3"]
+
+
+class TestBulkAck:
+    def test_ack_by_ids(self, server_client):
+        ids = _submit(server_client, "T1", "T2", "T3")
+        response = server_client.post(
+            "/api/submit/ack", json={"submission_ids": ids[:2] + ["missing"]}
+        )
+        assert response.json() == {"success": True, "deleted": 2}
+        page = server_client.get("/api/submit/pending").json()
+        assert [s["submission_id"] for s in page["submissions"]] == ids[2:]
+
+    def test_ack_through_cursor_with_filters(self, server_client):
+        _submit(server_client, "T1", "T2")
+        _submit(server_client, "T3", annotator="bob")
+        page = server_client.get("/api/submit/pending", params={"annotator": "alice"}).json()
+        _submit(server_client, "T4")
+
+        response = server_client.post("/api/submit/ack", json={
+            "cursor": page["next_cursor"], "annotator": "alice",
+        })
+        assert response.json()["deleted"] == 2
+        # bob's record and the submission made after the pull are still pending
+        remaining = server_client.get("/api/submit/pending").json()["submissions"]
+        assert [s["task_id"] for s in remaining] == ["T3", "T4"]
+
+    @pytest.mark.parametrize("body", [
+        {},
+        {"submission_ids": ["a"], "cursor": 1},
+        {"submission_ids": "a"},
+        {"cursor": -1},
+        {"cursor": True},
+    ])
+    def test_invalid(self, server_client, body):
+        assert server_client.post("/api/submit/ack", json=body).status_code == 422
+
+    def test_ack_single(self, server_client):
+        (sid,) = _submit(server_client, "T1")
+        assert server_client.delete(f"/api/submit/pending/{sid}").status_code == 200
+        assert server_client.delete(f"/api/submit/pending/{sid}").status_code == 404
+
+
+class TestLiveIaa:
+    def _iaa(self, client, **params):
+        response = client.get("/api/submit/iaa", params=params)
+        assert response.status_code == 200
+        return response.json()["metrics"]
+
+    def test_metrics_follow_submissions(self, server_client):
+        _submit(server_client, "T1", "T2", annotator="alice")
+        _submit(server_client, "T1", "T2", annotator="bob")
+        metrics = self._iaa(server_client)
+        assert metrics["files"] == ["alice", "bob"]
+        assert metrics["common_tasks"] == 2
+        assert metrics["exact_agreement_rate"] == 1.0
+
+        # A resubmission replaces bob's earlier label for T2
+        _submit(server_client, "T2", annotator="bob", score=3)
+        assert self._iaa(server_client)["exact_agreement_rate"] == 0.5
+
+    def test_survives_ack(self, server_client):
+        _submit(server_client, "T1", annotator="alice")
+        _submit(server_client, "T1", annotator="bob")
+        server_client.post("/api/submit/ack", json={"cursor": 10**9})
+        assert server_client.get("/api/submit/pending").json()["count"] == 0
+        assert self._iaa(server_client)["common_tasks"] == 1
+
+    def test_shared_between_workers(self, server_client, monkeypatch, tmp_path):
+        path = str(tmp_path / "submissions.db")
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        _submit(server_client, "T1", "T2", annotator="alice")
+        first = submission_store.get_submission_store()
+
+        # Another worker writes to the same database; this worker catches up
+        other = submission_store.SQLiteStore(path)
+        other.put_labels("bob", {"T1": "1", "T2": "2"})
+        assert self._iaa(server_client)["exact_agreement_rate"] == 0.5
+
+        # A restarted worker rebuilds the same statistics from the database
+        first.close()
+        monkeypatch.setattr(submission_store, "_store", submission_store.SQLiteStore(path))
+        assert self._iaa(server_client)["exact_agreement_rate"] == 0.5
+        submission_store.get_submission_store().close()
+        other.close()
+
+    @pytest.mark.parametrize("params", [{}, {"alpha_metric": "bogus"}])
+    def test_errors(self, server_client, params):
+        _submit(server_client, "T1", annotator="alice")
+        if params:
+            _submit(server_client, "T1", annotator="bob")
+        response = server_client.get("/api/submit/iaa", params=params)
+        assert response.status_code == 422
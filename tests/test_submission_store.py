@@ -0,0 +1,289 @@
+"""Contract tests for the server's submission store backends."""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from server import submission_store as store_module
+from server.submission_store import (
+    MemoryStore,
+    SQLiteStore,
+    SubmissionFilter,
+    SubmissionStore,
+    create_store,
+)
+
+
+def _record(i, task_id=None, annotator="alice", submitted_at=None):
+    return {
+        "submission_id": f"S{i}",
+        "task_id": task_id or f"T{i}",
+        "annotator": annotator,
+        "submitted_at": submitted_at or f"2026-01-01T00:00:{i:02d}",
+        "score": i,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = create_store(request.param, str(tmp_path / "submissions.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for lease and retry deadlines."""
+    now = [1000.0]
+    monkeypatch.setattr(store_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+class TestAppendAndFetch:
+    def test_fetch_in_submission_order(self, store):
+        store.add([_record(i) for i in range(1, 6)])
+        rows = store.fetch()
+        assert [record["submission_id"] for _, record in rows] == ["S1", "S2", "S3", "S4", "S5"]
+        seqs = [seq for seq, _ in rows]
+        assert seqs == sorted(seqs)
+        assert store.last_seq() == seqs[-1]
+        assert store.count() == 5
+
+    def test_cursor_pages(self, store):
+        store.add([_record(i) for i in range(1, 8)])
+        cursor, seen = 0, []
+        while True:
+            page = store.fetch(cursor, limit=3)
+            if not page:
+                break
+            seen += [record["submission_id"] for _, record in page]
+            cursor = page[-1][0]
+        assert seen == [f"S{i}" for i in range(1, 8)]
+
+    def test_cursor_survives_later_inserts(self, store):
+        store.add([_record(1), _record(2)])
+        cursor = store.fetch()[-1][0]
+        store.add([_record(3)])
+        assert [r["submission_id"] for _, r in store.fetch(cursor)] == ["S3"]
+
+    def test_through_and_filters(self, store):
+        store.add([
+            _record(1, task_id="A"),
+            _record(2, task_id="B", annotator="bob"),
+            _record(3, task_id="A", annotator="bob"),
+            _record(4, task_id="A"),
+        ])
+        through = store.fetch()[2][0]
+        rows = store.fetch(through=through, where=SubmissionFilter(task_id="A"))
+        assert [r["submission_id"] for _, r in rows] == ["S1", "S3"]
+        where = SubmissionFilter(annotator="bob", since="2026-01-01T00:00:03")
+        assert [r["submission_id"] for _, r in store.fetch(where=where)] == ["S3"]
+        assert store.count(SubmissionFilter(until="2026-01-01T00:00:02")) == 2
+
+    def test_raw_rows_are_json(self, store):
+        store.add([_record(1)])
+        ((_, body),) = store.fetch(raw=True)
+        assert isinstance(body, str)
+        assert store_module.jsonlib.loads(body) == _record(1)
+
+    def test_seq_not_reused_after_delete(self, store):
+        store.add([_record(1), _record(2)])
+        last = store.last_seq()
+        store.delete("S2")
+        store.add([_record(3)])
+        assert store.fetch()[-1][0] > last
+
+
+class TestDelete:
+    def test_delete(self, store):
+        store.add([_record(1)])
+        assert store.delete("S1")
+        assert not store.delete("S1")
+        assert store.count() == 0
+
+    def test_delete_many(self, store):
+        store.add([_record(i) for i in range(1, 5)])
+        assert store.delete_many(["S1", "S3", "S3", "missing"]) == 2
+        assert [r["submission_id"] for _, r in store.fetch()] == ["S2", "S4"]
+
+    def test_delete_through_with_filter(self, store):
+        store.add([
+            _record(1, annotator="alice"),
+            _record(2, annotator="bob"),
+            _record(3, annotator="alice"),
+            _record(4, annotator="alice"),
+        ])
+        through = store.fetch()[2][0]
+        assert store.delete_through(through, SubmissionFilter(annotator="alice")) == 2
+        assert [r["submission_id"] for _, r in store.fetch()] == ["S2", "S4"]
+        assert store.delete_through(store.last_seq()) == 2
+        assert store.count() == 0
+
+
+class TestOutbox:
+    def test_claim_hides_records_for_the_lease(self, store, clock):
+        store.add([_record(i) for i in range(1, 5)])
+        first = store.claim(2, lease=60)
+        assert [sid for sid, _ in first] == ["S1", "S2"]
+        assert store_module.jsonlib.loads(first[0][1]) == _record(1)
+        assert [sid for sid, _ in store.claim(10, lease=60)] == ["S3", "S4"]
+        assert store.claim(10, lease=60) == []
+
+    def test_expired_lease_can_be_claimed_again(self, store, clock):
+        store.add([_record(1)])
+        assert store.claim(10, lease=60)
+        clock[0] += 59
+        assert store.claim(10, lease=60) == []
+        clock[0] += 2
+        assert [sid for sid, _ in store.claim(10, lease=60)] == ["S1"]
+
+    def test_retry_later(self, store, clock):
+        store.add([_record(1), _record(2)])
+        store.claim(10, lease=60)
+        store.retry_later(["S1"], delay=5)
+        stats = store.outbox_stats()
+        assert stats["depth"] == 2
+        assert stats["retrying"] == 1
+        assert stats["max_attempts"] == 1
+        assert stats["oldest_submitted_at"] == _record(1)["submitted_at"]
+        assert store.claim(10, lease=60) == []
+        clock[0] += 6
+        assert [sid for sid, _ in store.claim(10, lease=60)] == ["S1"]
+
+    @pytest.mark.parametrize("remove", [
+        lambda store: store.delete("S1"),
+        lambda store: store.delete_many(["S1"]),
+        lambda store: store.delete_through(store.last_seq()),
+    ])
+    def test_delete_drops_delivery_state(self, store, clock, remove):
+        store.add([_record(1)])
+        store.claim(10, lease=60)
+        store.retry_later(["S1"], delay=600)
+        remove(store)
+        # A resubmission with the same ID starts with a clean delivery state
+        store.add([_record(1)])
+        assert [sid for sid, _ in store.claim(10, lease=60)] == ["S1"]
+        assert store.outbox_stats()["max_attempts"] == 0
+
+
+class TestDocuments:
+    def test_put_get_delete(self, store):
+        assert store.get_document("schema", "s1") is None
+        store.put_document("schema", "s1", {"name": "v1"})
+        store.put_document("batch", "s1", {"name": "batch"})
+        assert store.get_document("schema", "s1") == {"name": "v1"}
+        assert store_module.jsonlib.loads(store.get_document("schema", "s1", raw=True)) == {
+            "name": "v1"
+        }
+
+        store.put_document("schema", "s1", {"name": "v2"})
+        assert store.get_document("schema", "s1") == {"name": "v2"}
+        assert store.delete_document("schema", "s1")
+        assert not store.delete_document("schema", "s1")
+        assert store.get_document("batch", "s1") == {"name": "batch"}
+
+    def test_documents_are_copies(self, store):
+        doc = {"tasks": [1]}
+        store.put_document("batch", "b", doc)
+        doc["tasks"].append(2)
+        store.get_document("batch", "b")["tasks"].append(3)
+        assert store.get_document("batch", "b") == {"tasks": [1]}
+
+    def test_clear_keeps_documents(self, store):
+        store.add([_record(1)])
+        store.put_document("schema", "s1", {})
+        store.clear()
+        assert store.count() == 0
+        assert store.get_document("schema", "s1") == {}
+
+
+class TestLabels:
+    def test_latest_label_wins(self, store):
+        store.put_labels("alice", {"T1": "1", "T2": "2"})
+        store.put_labels("bob", {"T1": "1"})
+        rows = store.fetch_labels()
+        assert [row[1:] for row in rows] == [
+            ("alice", "T1", "1"), ("alice", "T2", "2"), ("bob", "T1", "1"),
+        ]
+
+        cursor = rows[-1][0]
+        store.put_labels("alice", {"T1": "3"})
+        changed = store.fetch_labels(cursor)
+        assert [row[1:] for row in changed] == [("alice", "T1", "3")]
+        assert changed[0][0] > cursor
+        assert len(store.fetch_labels()) == 3
+        assert store.fetch_labels(changed[0][0]) == []
+
+    def test_task_ids_are_strings(self, store):
+        store.put_labels("alice", {1: "x"})
+        store.put_labels("alice", {"1": "y"})
+        assert [row[1:] for row in store.fetch_labels()] == [("alice", "1", "y")]
+
+    def test_kept_when_submissions_are_acked(self, store):
+        store.add([_record(1)])
+        store.put_labels("alice", {"T1": "1"})
+        store.delete_through(store.last_seq())
+        store.clear()
+        assert len(store.fetch_labels()) == 1
+
+
+class TestSQLiteStore:
+    def test_persists_across_reopen(self, tmp_path):
+        path = str(tmp_path / "sub" / "submissions.db")
+        store = SQLiteStore(path)
+        store.add([_record(1), _record(2)])
+        store.close()
+
+        reopened = SQLiteStore(path)
+        assert [r["submission_id"] for _, r in reopened.fetch()] == ["S1", "S2"]
+        reopened.close()
+
+    def test_documents_shared_between_connections(self, tmp_path):
+        # Two stores on one file stand in for two uvicorn workers
+        path = str(tmp_path / "submissions.db")
+        first, second = SQLiteStore(path), SQLiteStore(path)
+        first.put_document("schema", "s1", {"name": "shared"})
+        assert second.get_document("schema", "s1") == {"name": "shared"}
+        assert second.delete_document("schema", "s1")
+        assert first.get_document("schema", "s1") is None
+        first.close()
+        second.close()
+
+    def test_batch_is_atomic(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / "submissions.db"))
+        store.add([_record(1)])
+        with pytest.raises(sqlite3.IntegrityError):
+            store.add([_record(2), _record(1)])
+        assert store.count() == 1
+        store.close()
+
+
+class TestSharedStore:
+    def test_created_lazily(self, tmp_path, monkeypatch):
+        path = tmp_path / "lazy.db"
+        monkeypatch.setattr(store_module, "_store", None)
+        monkeypatch.setattr(store_module.settings, "submission_store", "sqlite")
+        monkeypatch.setattr(store_module.settings, "submission_db", str(path))
+        assert not path.exists()
+
+        store = store_module.get_submission_store()
+        assert isinstance(store, SQLiteStore)
+        assert path.exists()
+        assert store_module.get_submission_store() is store
+
+        store_module.close_submission_store()
+        assert store_module._store is None
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_store("redis")
+        assert isinstance(create_store("Memory"), MemoryStore)
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class PartialStore(SubmissionStore):
+            def add(self, records):
+                pass
+
+        with pytest.raises(TypeError, match="fetch"):
+            PartialStore()
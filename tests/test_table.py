@@ -0,0 +1,255 @@
+"""Tests for the columnar AnnotationTable."""
+
+import json
+import random
+import sys
+
+import pytest
+
+from datalabel import agreement
+from datalabel import table as table_module
+from datalabel.agreement import MISSING
+from datalabel.merger import ResultMerger
+from datalabel.table import AnnotationTable, TableCache, load_table, table_cache
+
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not agreement.HAS_NUMPY, reason="numpy not installed"
+))]
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda v: "numpy" if v else "python")
+def use_numpy(request):
+    return request.param
+
+
+def _write(path, responses, metadata=None):
+    data = {"metadata": metadata or {}, "responses": responses}
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+class TestLoading:
+    """Tests for loading and rebuilding responses."""
+
+    def test_responses_round_trip(self, tmp_path):
+        responses = [
+            {"task_id": "T1", "data": {"q": "hi"}, "score": 3, "comment": "",
+             "annotated_at": "2025-01-01T08:00:00.123456"},
+            {"task_id": "T2", "choices": ["b", "a"], "annotated_at": "2025-01-01T08:01:00.500Z"},
+            {"annotated_at": "not a date", "task_id": "T3", "text": "自由文本"},
+        ]
+        path = _write(tmp_path / "a.json", responses, {"annotator": "alice"})
+        table = AnnotationTable.from_files([path])
+
+        assert table.sources == [path]
+        assert table.metadata == [{"annotator": "alice"}]
+        rebuilt = list(table.responses(0))
+        assert rebuilt == responses
+        assert [list(r) for r in rebuilt] == [list(r) for r in responses]
+
+    def test_later_duplicate_replaces_earlier(self, tmp_path):
+        path = _write(tmp_path / "a.json", [
+            {"task_id": "T1", "score": 1},
+            {"task_id": "T2", "score": 2},
+            {"task_id": "T1", "score": 5},
+        ])
+        table = AnnotationTable.from_files([path])
+        assert len(table) == 2
+        assert table.get(table.row("T1", 0), "score") == 5
+        assert table.annotations(0) == {"T1": 5, "T2": 2}
+
+    def test_bare_list_dict_and_jsonl(self, tmp_path):
+        bare = tmp_path / "bare.json"
+        bare.write_text(json.dumps([{"task_id": "T1", "score": 1}]))
+        keyed = tmp_path / "keyed.json"
+        keyed.write_text(json.dumps({"responses": {"T1": {"score": 2}}}))
+        lines = tmp_path / "c.jsonl"
+        lines.write_text(json.dumps({"task_id": "T1", "score": 3}) + "\n")
+
+        table = AnnotationTable.from_files([str(bare), str(keyed), str(lines)])
+        assert table.n_sources == 3
+        assert [table.get(r, "score") for r in table.task_rows("T1")] == [1, 2, 3]
+
+    def test_missing_ids(self, tmp_path):
+        path = _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}, {"score": 2}])
+        with pytest.raises(KeyError):
+            AnnotationTable.from_files([path])
+        table = AnnotationTable.from_files([path], skip_missing_ids=True)
+        assert table.task_ids == ["T1"]
+
+    def test_key_callable(self):
+        table = AnnotationTable()
+        table.add_source("a", [{"score": 1}, {"score": 2}], key=lambda i, r: i)
+        assert table.task_ids == [0, 1]
+
+    def test_task_rows_ordered_by_source(self):
+        table = AnnotationTable()
+        table.add_source("a", [{"task_id": "T2", "score": 1}])
+        table.add_source("b", [{"task_id": "T1", "score": 2}, {"task_id": "T2", "score": 3}])
+        assert [table.source_of(r) for r in table.task_rows("T2")] == [0, 1]
+        assert table.task_rows("missing") == []
+        assert table.row("T1", 0) is None
+        assert table.counts_per_source() == [1, 2]
+
+    def test_view_is_lazy_mapping(self):
+        table = AnnotationTable()
+        table.add_source("a", [{"task_id": "T1", "score": 2, "comment": "ok"}])
+        view = table.view(0)
+        assert view["score"] == 2
+        assert "choice" not in view
+        assert view.get("choice") is None
+        assert dict(view) == {"task_id": "T1", "score": 2, "comment": "ok"}
+
+    def test_shared_values_interned(self):
+        data = {"question": "q" * 1000}
+        table = AnnotationTable()
+        for name in ("a", "b", "c"):
+            table.add_source(name, [{"task_id": "T1", "data": dict(data), "score": 1}])
+        assert sum(1 for v in table._pool if v == data) == 1
+
+
+class TestTableCache:
+    """Tests for the (path, mtime, size)-keyed loader cache."""
+
+    def test_hit_skips_loading(self, tmp_path, monkeypatch):
+        path = _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}])
+        first = load_table([path])
+        monkeypatch.setattr(AnnotationTable, "from_files", None)
+        assert load_table([path]) is first
+        assert table_cache.hits == 1
+
+    def test_rewrite_invalidates(self, tmp_path):
+        path = _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}])
+        first = load_table([path])
+        _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}, {"task_id": "T2", "score": 2}])
+        second = load_table([path])
+        assert second is not first
+        assert second.task_ids == ["T1", "T2"]
+
+    def test_options_are_part_of_key(self, tmp_path):
+        path = _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}, {"score": 2}])
+        assert load_table([path], skip_missing_ids=True).task_ids == ["T1"]
+        with pytest.raises(KeyError):
+            load_table([path])
+
+    def test_lru_eviction_by_bytes(self, tmp_path):
+        paths = [
+            _write(tmp_path / f"{name}.json", [{"task_id": "T1", "score": 1}])
+            for name in "abc"
+        ]
+        size = (tmp_path / "a.json").stat().st_size
+        cache = TableCache(max_bytes=2 * size)
+        a = cache.load([paths[0]])
+        cache.load([paths[1]])
+        assert cache.load([paths[0]]) is a  # a is now most recently used
+        cache.load([paths[2]])
+        assert len(cache) == 2
+        assert cache.nbytes == 2 * size
+        assert cache.load([paths[0]]) is a
+        assert cache.misses == 3
+        cache.load([paths[1]])  # b was evicted
+        assert cache.misses == 4
+
+    def test_oversized_not_cached(self, tmp_path):
+        path = _write(tmp_path / "a.json", [{"task_id": "T1", "score": 1}])
+        cache = TableCache(max_bytes=1)
+        cache.load([path])
+        assert len(cache) == 0
+
+    def test_bare_mapping(self, tmp_path):
+        path = tmp_path / "a.json"
+        path.write_text(json.dumps({"T1": {"score": 1}, "T2": {"score": 2}}))
+        assert load_table([str(path)]).task_ids == []
+        assert load_table([str(path)], bare_mapping=True).task_ids == ["T1", "T2"]
+
+
+class TestTimestamps:
+    """Tests for packed timestamp columns."""
+
+    @pytest.mark.parametrize("value", [
+        "2025-01-01T08:00:00",
+        "2025-01-01T08:00:00.000001",
+        "2025-03-04T05:06:07.890Z",
+        "2025-01-01T08:00:00+08:00",
+        "",
+    ])
+    def test_round_trip(self, value):
+        table = AnnotationTable()
+        table.add_source("a", [{"task_id": "T1", "annotated_at": value}])
+        assert table.get(0, "annotated_at") == value
+
+    def test_packed(self):
+        table = AnnotationTable()
+        table.add_source("a", [{"task_id": "T1", "annotated_at": "2025-01-01T08:00:00.5"}])
+        # "…:00.5" does not survive a round trip, so it is stored verbatim
+        assert table._columns["annotated_at"].codes[0] >= 0
+        table.add_source("b", [{"task_id": "T1", "annotated_at": "2025-01-01T08:00:00.500000"}])
+        assert table._columns["annotated_at"].codes[1] == table_module._PACKED_TIMESTAMP
+
+
+class TestAgreementInputs:
+    """label_matrix / unit_counts must match the dict-based encoders."""
+
+    @staticmethod
+    def _random_table(seed, n_sources=4, n_tasks=60):
+        rng = random.Random(seed)
+        table = AnnotationTable()
+        dicts = []
+        for s in range(n_sources):
+            responses = []
+            for t in range(n_tasks):
+                if rng.random() < 0.3:
+                    continue
+                key = rng.choice(["score", "choice", "choices"])
+                value = rng.randint(1, 3) if key == "score" else (
+                    rng.choice("xyz") if key == "choice" else rng.sample("xyz", 2)
+                )
+                responses.append({"task_id": f"T{t}", key: value})
+            table.add_source(f"s{s}", responses)
+            dicts.append({
+                r["task_id"]: ResultMerger()._extract_annotation_values([r])[0]
+                for r in responses
+            })
+        return table, dicts
+
+    def test_label_matrix_matches_encode(self, use_numpy):
+        table, dicts = self._random_table(1)
+        task_ids = sorted(table.task_ids)
+        expected = agreement.encode(dicts, task_ids, use_numpy=False)
+        matrix = table.label_matrix(task_ids, use_numpy=use_numpy)
+        assert matrix.n_annotators == 4
+
+        def decoded(m):
+            return [[None if c == MISSING else m.categories[c] for c in map(int, row)]
+                    for row in m.codes]
+
+        assert decoded(matrix) == decoded(expected)
+        assert agreement.fleiss_kappa(matrix) == pytest.approx(agreement.fleiss_kappa(expected))
+
+    def test_unit_counts_alpha(self, use_numpy):
+        table, dicts = self._random_table(2)
+        task_ids = sorted(table.task_ids)
+        expected = agreement.krippendorff_alpha(agreement.encode(dicts, task_ids, use_numpy=False))
+        alpha = agreement.krippendorff_alpha(table.unit_counts(use_numpy=use_numpy))
+        assert alpha == pytest.approx(expected)
+
+
+@pytest.mark.skipif(sys.implementation.name != "cpython", reason="sizes are CPython-specific")
+def test_smaller_than_dicts():
+    responses = [
+        {"task_id": f"T{i}", "data": {"q": f"question {i}"}, "score": i % 5, "comment": "",
+         "annotated_at": f"2025-01-01T08:{i % 60:02d}:00.{i:06d}"}
+        for i in range(2000)
+    ]
+    table = AnnotationTable()
+    for name in ("a", "b", "c"):
+        table.add_source(name, json.loads(json.dumps(responses)))
+    columns = sum(
+        c.codes.itemsize * len(c.codes)
+        + (c.micros.itemsize * len(c.micros) if c.micros is not None else 0)
+        + (c.formats.itemsize * len(c.formats) if c.formats is not None else 0)
+        for c in table._columns.values()
+    )
+    per_row = columns / len(table)
+    dict_row = sum(sys.getsizeof(v) for v in responses[0].values()) + sys.getsizeof(responses[0])
+    assert per_row * 5 < dict_row
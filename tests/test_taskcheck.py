@@ -0,0 +1,167 @@
+"""Tests for streaming task file validation."""
+
+import json
+
+import pytest
+
+from datalabel import taskcheck
+from datalabel.taskcheck import validate_task_file
+
+SCHEMA = {"fields": [{"name": "q"}, {"name": "a"}]}
+
+
+def _write_jsonl(path, lines):
+    path.write_text("".join(
+        (line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n"
+        for line in lines
+    ), encoding="utf-8")
+    return path
+
+
+class TestValidateTaskFile:
+    def test_valid(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", [
+            {"id": f"T{i}", "data": {"q": "问", "a": "答"}} for i in range(50)
+        ])
+        report = validate_task_file(path, SCHEMA)
+        assert report.valid
+        assert report.total == 50
+        assert report.bytes_read == path.stat().st_size
+        assert report.errors == [] and report.warnings == []
+        assert report.tasks_per_second > 0
+
+    def test_line_errors(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", [
+            {"id": "A", "data": {"q": 1, "a": 2}},
+            "{bad json",
+            "",
+            "[1, 2]",
+            {"id": "B", "data": "text"},
+        ])
+        report = validate_task_file(path, SCHEMA)
+        assert not report.valid
+        assert report.total == 4
+        assert [e.split(":")[0] for e in report.errors] == ["第 2 行", "第 4 行", "第 5 行"]
+
+    @pytest.mark.parametrize("run_size", [1, 3, 1000])
+    def test_duplicates_across_runs(self, tmp_path, run_size):
+        ids = ["A", "B", "C", "A", "D", 1, "1", "B", "A"]
+        path = _write_jsonl(tmp_path / "t.jsonl", [{"id": i, "data": {}} for i in ids])
+        report = validate_task_file(path, run_size=run_size)
+        assert report.errors == [
+            "第 4 行: 重复的任务 ID: A",
+            "第 8 行: 重复的任务 ID: B",
+            "第 9 行: 重复的任务 ID: A",
+        ]
+
+    def test_many_runs_are_merged(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("datalabel.taskcheck._MAX_MERGE_FANIN", 2)
+        ids = [f"T{i}" for i in range(20)] + ["T3"]
+        path = _write_jsonl(tmp_path / "t.jsonl", [{"id": i} for i in ids])
+        report = validate_task_file(path, run_size=2)
+        assert report.errors == ["第 21 行: 重复的任务 ID: T3"]
+
+    def test_error_budget(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", ["x"] * 10 + [{"id": "A"}, {"id": "A"}])
+        report = validate_task_file(path, max_errors=3)
+        assert len(report.errors) == 3
+        assert report.truncated
+        assert report.total == 3
+
+    def test_budget_limits_duplicates(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", [{"id": "A"}] * 6)
+        report = validate_task_file(path, max_errors=2)
+        assert len(report.errors) == 2
+        assert report.truncated
+
+    def test_budgeted_duplicates_in_file_order(self, tmp_path):
+        ids = [f"T{i}" for i in range(50)] * 2
+        path = _write_jsonl(tmp_path / "t.jsonl", [{"id": i} for i in ids])
+        report = validate_task_file(path, max_errors=3, run_size=7)
+        assert report.errors == [
+            "第 51 行: 重复的任务 ID: T0",
+            "第 52 行: 重复的任务 ID: T1",
+            "第 53 行: 重复的任务 ID: T2",
+        ]
+        assert report.truncated
+
+        report = validate_task_file(path, max_errors=50)
+        assert len(report.errors) == 50
+        assert not report.truncated
+
+    def test_missing_fields_are_warnings(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", [
+            {"id": "A", "data": {"q": 1}},
+            {"id": "B", "q": 1},
+            {"id": "C", "data": {"q": 1, "a": 2}},
+        ])
+        report = validate_task_file(path, SCHEMA)
+        assert report.valid
+        assert report.missing_fields == {"a": 2}
+        assert report.warnings == ["2 条任务的 data 缺少字段 a"]
+
+    def test_empty_file(self, tmp_path):
+        report = validate_task_file(_write_jsonl(tmp_path / "t.jsonl", []))
+        assert report.valid
+        assert report.warnings == ["任务列表为空"]
+
+
+class TestParallelValidation:
+    @pytest.fixture(autouse=True)
+    def small_ranges(self, monkeypatch):
+        monkeypatch.setattr(taskcheck, "_MIN_RANGE_BYTES", 64)
+
+    @staticmethod
+    def _summary(report):
+        return (report.valid, report.total, report.bytes_read, report.truncated,
+                report.errors, report.warnings, report.missing_fields)
+
+    def test_jsonl_matches_serial(self, tmp_path):
+        lines = [{"id": f"T{i % 40}", "data": {"q": i}} for i in range(60)]
+        lines[7] = "{bad json"
+        lines[33] = "[1]"
+        path = _write_jsonl(tmp_path / "t.jsonl", lines)
+        serial = validate_task_file(path, SCHEMA, workers=1)
+        parallel = validate_task_file(path, SCHEMA, workers=3)
+        assert self._summary(parallel) == self._summary(serial)
+        assert serial.errors[0].startswith("第 8 行: JSON 解析失败")
+        assert serial.errors[1] == "第 34 行: 任务必须是字典"
+        # T0..T19 repeat in lines 41-60; T7's first line is the broken one
+        assert len(serial.errors) == 2 + 19
+        assert serial.errors[-1] == "第 60 行: 重复的任务 ID: T19"
+
+    def test_csv_quoted_newlines(self, tmp_path):
+        rows = ["id,q,a"]
+        for i in range(40):
+            rows.append(f'T{i % 30},"line one\nline ""two""",{i}')
+        rows.append("T99,only two")
+        path = tmp_path / "t.csv"
+        path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+        serial = validate_task_file(path, SCHEMA, workers=1)
+        parallel = validate_task_file(path, SCHEMA, workers=4)
+        assert self._summary(parallel) == self._summary(serial)
+        assert serial.total == 41
+        assert serial.bytes_read == path.stat().st_size
+        # Every record takes two physical lines after the one-line header
+        assert serial.errors[0] == "第 82 行: 列数 2 与表头 3 不一致"
+        assert serial.errors[1] == "第 62 行: 重复的任务 ID: T0"
+        assert len(serial.errors) == 11
+
+    def test_csv_values_decoded(self, tmp_path):
+        path = tmp_path / "t.csv"
+        path.write_text('id,data\nA,"{""q"": 1, ""a"": 2}"\nB,"[1]"\n', encoding="utf-8")
+        report = validate_task_file(path, SCHEMA)
+        assert report.errors == ["第 3 行: data 必须是字典"]
+
+    def test_error_budget_drops_later_ranges(self, tmp_path):
+        path = _write_jsonl(tmp_path / "t.jsonl", ["x"] * 40)
+        serial = validate_task_file(path, max_errors=5, workers=1)
+        parallel = validate_task_file(path, max_errors=5, workers=2)
+        assert self._summary(parallel) == self._summary(serial)
+        assert serial.truncated and len(serial.errors) == 5
+        assert serial.errors[-1].startswith("第 5 行")
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            validate_task_file(_write_jsonl(tmp_path / "t.jsonl", []), fmt="parquet")
@@ -0,0 +1,52 @@
+"""Tests for the shared template environment and its bytecode cache."""
+
+import pytest
+
+from datalabel import AnnotatorGenerator, DashboardGenerator, templating
+
+
+class TestSharedEnvironment:
+    def test_generators_share_one_environment(self):
+        assert AnnotatorGenerator().env is DashboardGenerator().env
+        assert AnnotatorGenerator().env is templating.get_environment()
+
+    def test_template_compiled_once(self):
+        env = templating.get_environment()
+        assert env.get_template("annotator.html") is env.get_template("annotator.html")
+
+
+class TestBytecodeCache:
+    def test_fresh_environment_loads_from_cache(self, tmp_path, monkeypatch):
+        templating.create_environment(tmp_path).get_template("annotator.html")
+        assert len(list(tmp_path.iterdir())) == 1
+
+        env = templating.create_environment(tmp_path)
+        monkeypatch.setattr(env, "compile", None)  # would fail if called
+        assert "DataLabelChunk" in env.get_template("annotator.html").render(
+            **AnnotatorGenerator()._prepare_template_data({}, [], None, None)
+        )
+
+    def test_unwritable_directory_still_renders(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        env = templating.create_environment(blocker / "cache")
+        assert env.bytecode_cache is None
+        assert env.get_template("dashboard.html")
+
+    @pytest.mark.parametrize("value, expected", [
+        ("off", None),
+        ("", None),
+        ("/some/dir", "/some/dir"),
+    ])
+    def test_cache_dir_from_environment(self, monkeypatch, value, expected):
+        monkeypatch.setenv(templating.TEMPLATE_CACHE_ENV, value)
+        result = templating.default_cache_dir()
+        assert (str(result) if result else None) == expected
+
+    def test_default_cache_dir(self, monkeypatch, tmp_path):
+        monkeypatch.delenv(templating.TEMPLATE_CACHE_ENV, raising=False)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert templating.default_cache_dir() == tmp_path / "datalabel" / "jinja"
+
+    def test_warm_cache(self):
+        assert set(templating.warm_cache()) >= {"annotator.html", "dashboard.html"}
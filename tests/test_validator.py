@@ -1,6 +1,8 @@
 """Tests for SchemaValidator."""
 
-from datalabel.validator import SchemaValidator
+import pytest
+
+from datalabel.validator import ResponseValidator, SchemaValidator, compile_schema, schema_hash
 
 
 class TestSchemaValidation:
@@ -246,3 +248,141 @@ class TestTaskValidation:
         ]
         result = self.validator.validate_tasks(tasks)
         assert result.valid
+
+
+OPTIONS = [{"value": "a", "label": "A"}, {"label": "B"}]
+
+
+class TestResponseValidator:
+    """Tests for ResponseValidator."""
+
+    def test_scoring_uses_rubric(self, sample_schema):
+        validator = ResponseValidator(sample_schema)
+        assert validator.validate({"task_id": "T1", "score": 2}) is None
+        assert validator.validate({"task_id": "T1", "score": 2.0}) is None
+        assert "评分标准" in validator.validate({"task_id": "T1", "score": 5})
+        assert "数字" in validator.validate({"task_id": "T1", "score": "2"})
+        assert "数字" in validator.validate({"task_id": "T1", "score": True})
+        assert "score" in validator.validate({"task_id": "T1"})
+
+    def test_scoring_without_rubric_accepts_any_number(self):
+        validator = ResponseValidator({})
+        assert validator.validate({"score": 0.37}) is None
+
+    @pytest.mark.parametrize("ann_type,key,good,bad", [
+        ("single_choice", "choice", "B", "c"),
+        ("single_choice", "choice", "a", ["a"]),
+        ("multi_choice", "choices", ["a", "B"], ["a", "x"]),
+        ("multi_choice", "choices", [], "a"),
+        ("ranking", "ranking", ["B", "a"], ["a", "a"]),
+        ("ranking", "ranking", ["a"], ["a", "z"]),
+    ])
+    def test_option_types(self, ann_type, key, good, bad):
+        validator = ResponseValidator({"annotation_config": {"type": ann_type, "options": OPTIONS}})
+        assert validator.validate({key: good}) is None
+        assert validator.validate({key: bad}) is not None
+
+    @pytest.mark.parametrize("ann_type,key,good,bad", [
+        ("single_choice", "choice", "1", "3"),
+        ("single_choice", "choice", 2, "2.5"),
+        ("multi_choice", "choices", ["1", 2], ["1", "x"]),
+        ("ranking", "ranking", ["2", "1"], ["1", 1]),
+        ("ranking", "ranking", [1, 2], ["1", "3"]),
+    ])
+    def test_numeric_option_values(self, ann_type, key, good, bad):
+        # The annotator page submits option values as data-value strings
+        options = [{"value": 1, "label": "Yes"}, {"value": 2, "label": "No"}]
+        validator = ResponseValidator({"annotation_config": {"type": ann_type, "options": options}})
+        assert validator.validate({key: good}) is None
+        assert validator.validate({key: bad}) is not None
+
+    def test_text(self):
+        validator = ResponseValidator({"annotation_config": {"type": "text"}})
+        assert validator.validate({"text": "ok"}) is None
+        assert validator.validate({"text": 3}) is not None
+
+    def test_multi_field(self):
+        validator = ResponseValidator({"annotation_config": {"type": "multi_field", "fields": [
+            {"name": "n", "type": "number", "label": "N"},
+            {"name": "t", "type": "text", "label": "T"},
+            {"name": "c", "type": "single_choice", "label": "C", "options": OPTIONS},
+            {"name": "m", "type": "multi_choice", "label": "M", "options": OPTIONS},
+            {"name": "img", "type": "image_upload", "label": "I"},
+        ]}})
+        good = {"n": 1.5, "t": "x", "c": "a", "m": ["B"], "img": ["a.png"]}
+        assert validator.validate({"fields": good}) is None
+        assert validator.validate({"fields": {"n": None}}) is None
+        assert "fields.n" in validator.validate({"fields": {"n": "1"}})
+        assert "fields.c" in validator.validate({"fields": {"c": "x"}})
+        assert "fields.m" in validator.validate({"fields": {"m": "a"}})
+        assert "未知" in validator.validate({"fields": {"zzz": 1}})
+        assert validator.validate({"fields": []}) is not None
+
+
+class TestCompiledSchema:
+    """Tests for compile_schema / SchemaValidator.compile."""
+
+    def test_cached_by_content(self, sample_schema):
+        compiled = compile_schema(sample_schema)
+        assert SchemaValidator().compile(dict(sample_schema)) is compiled
+        assert compile_schema({**sample_schema, "project_name": "x"}) is not compiled
+
+    def test_lookup_tables(self, sample_schema):
+        compiled = compile_schema(sample_schema)
+        assert compiled.valid
+        assert compiled.annotation_type == "scoring"
+        assert compiled.field_names == {"instruction", "response"}
+        assert compiled.rubric_scores == {1, 2, 3}
+        assert compiled.rubric_scores is compiled.responses.scores
+        assert compiled.responses.validate({"score": 3}) is None
+
+    def test_lookup_tables_of_invalid_schema(self):
+        compiled = compile_schema({
+            "annotation_config": {"type": "single_choice", "options": [{"value": 1}]},
+            "scoring_rubric": "bad",
+        })
+        assert not compiled.valid
+        assert compiled.option_values == {"1"}
+        assert compiled.rubric_scores == frozenset()
+
+    def test_results_are_copies(self):
+        first = compile_schema({"fields": "bad"}).validation_result()
+        first.errors.append("mutated")
+        second = compile_schema({"fields": "bad"}).validation_result()
+        assert not second.valid
+        assert second.errors == ["fields 必须是列表"]
+
+    def test_validate_tasks(self, sample_schema, sample_tasks):
+        compiled = compile_schema(sample_schema)
+        assert compiled.validate_tasks(sample_tasks).valid
+        result = compiled.validate_tasks([{"id": "A"}, "x", {"id": "A"}])
+        assert result.errors == ["tasks[1] 必须是字典", "重复的任务 ID: A"]
+
+    def test_validate_tasks_warns_about_missing_fields(self, sample_schema):
+        compiled = compile_schema(sample_schema)
+        result = compiled.validate_tasks([
+            {"id": "A", "data": {"instruction": "q"}},
+            {"id": "B", "data": {}},
+            {"id": "C", "instruction": "q", "response": "r"},
+        ])
+        assert result.valid
+        assert result.warnings == [
+            "1 条任务的 data 缺少字段 instruction",
+            "2 条任务的 data 缺少字段 response",
+        ]
+
+    def test_key_ignores_key_order(self, sample_schema):
+        reordered = dict(reversed(list(sample_schema.items())))
+        assert schema_hash(reordered) == schema_hash(sample_schema)
+        assert compile_schema(reordered) is compile_schema(sample_schema)
+        assert schema_hash({**sample_schema, "project_name": "x"}) != schema_hash(sample_schema)
+
+    def test_invalid_schema_has_no_response_validator(self):
+        compiled = compile_schema({"annotation_config": {"type": "nope"}})
+        assert not compiled.valid
+        with pytest.raises(ValueError, match="Schema 验证失败"):
+            _ = compiled.responses
+
+    def test_unencodable_schema_not_cached(self):
+        schema = {"project_name": object()}
+        assert compile_schema(schema) is not compile_schema(schema)